@@ -1,15 +1,64 @@
 import os
-import io
-import fitz  # PyMuPDF for PDF handling
-import docx  # python-docx for DOCX handling
-import pptx  # python-pptx for PPTX handling
-import sqlite3
-import pdfplumber
-from PyPDF2 import PdfReader
-from PIL import Image
 from io import BytesIO
-from docx import Document
-from pptx import Presentation
+from itertools import islice
+from Data_extraction.parsed_document import ParsedDocument
+from Data_extraction.pdf_engine import SinglePassPDFEngine, parse_pdf_date
+from Data_extraction.ooxml_engine import W, StreamingOOXMLEngine, docx_blocks_in_range, docx_image_rel_ids
+from Data_extraction.page_parallel import PageParallelExtractor
+from Data_extraction.image_probe import probe_image
+from Data_extraction.records import LinkRecord, ImageRecord, TableRecord
+from metrics import NULL_METRICS, timed, timed_iter
+
+# Available PDF engines: "default" combines PyPDF2, PyMuPDF and pdfplumber,
+# "single_pass" walks each page once with PyMuPDF (see SinglePassPDFEngine)
+PDF_ENGINES = ("default", "single_pass")
+
+# Available DOCX/PPTX engines: "default" walks the python-docx/python-pptx object model,
+# "streaming" reads the XML parts straight from the zip (see StreamingOOXMLEngine)
+OOXML_ENGINES = ("default", "streaming")
+
+# Image format reported for a PDF image stream when its bytes are not extracted
+PDF_FILTER_FORMATS = {"DCTDecode": "jpeg", "JPXDecode": "jpx", "JBIG2Decode": "jb2"}
+
+# Most recently extracted PDF images kept per extractor, so an image repeated on consecutive pages
+# (a logo, a header) is extracted once without holding every image of the document
+PDF_IMAGE_CACHE_SIZE = 8
+
+# Bump whenever a change alters the extracted output, so cached results are not reused
+EXTRACTOR_VERSION = "6"
+
+# Separator placed between the texts yielded by FileDataExtractor.iter_pages()
+TEXT_SEPARATORS = {'.pdf': '', '.docx': '\n', '.pptx': '\n'}
+
+# Artifact types that can be selected for extraction and storage (see select_artifacts)
+ARTIFACTS = ("text", "metadata", "links", "images", "tables")
+
+
+def select_artifacts(include=None, exclude=None):
+    """
+    Resolve an include/exclude selection into the tuple of artifact types to extract, in ARTIFACTS order.
+
+    :param include: Artifact types to extract, as a list or a comma-separated string; None selects all.
+    :param exclude: Artifact types to leave out, in the same forms.
+    """
+    def parse(names):
+        if names is None:
+            return None
+        if isinstance(names, str):
+            names = names.split(",")
+        names = {name.strip().lower() for name in names if name.strip()}
+        unknown = names - set(ARTIFACTS)
+        if unknown:
+            raise ValueError(f"Unknown artifact type(s): {', '.join(sorted(unknown))}. "
+                             f"Expected any of: {', '.join(ARTIFACTS)}.")
+        return names
+
+    included, excluded = parse(include), parse(exclude) or set()
+    selected = tuple(artifact for artifact in ARTIFACTS
+                     if (included is None or artifact in included) and artifact not in excluded)
+    if not selected:
+        raise ValueError("The artifact selection is empty, so there is nothing to extract.")
+    return selected
 
 class FileDataExtractor:
     """
@@ -20,34 +69,247 @@ class FileDataExtractor:
         extract_images(): Extracts image data from the file.
         extract_tables(): Extracts tables from the file.
         extract_links(): Extracts hyperlinks from the file.
+        extract_metadata(): Extracts the file metadata only.
+        extract_selected(): Extracts only the selected artifacts (see `artifacts`).
+        iter_pages(), iter_images(), iter_tables(): Generator variants yielding one page, image
+            or table at a time, so large documents can be processed with bounded memory.
+        streams_pages(): Whether iter_pages() can stream with the selected engines.
+        close(): Closes the parsed document shared by all extraction methods.
+
+    The file is parsed at most once per library: every method reuses the handles cached
+    on `self.document`, which can also be handed to the loader and storage backends.
+
+    Links, images and tables come back as compact records (LinkRecord, ImageRecord, TableRecord)
+    with a uniform `location`, the one-based page or slide (None for DOCX); they still read like the
+    dicts and lists of rows they replace (see Record).
+
+    `artifacts` selects what FileProcessor and the storage backends extract and store. The engines
+    that extract everything in one walk (single-pass and page-parallel PDF, streaming OOXML) skip
+    the artifacts that are not selected, so their extract_* methods then return empty results.
+
+    `page_range`, `max_chars` and `max_tables` limit the work to the start of a document: pages and
+    slides outside the range are never read, and parsing stops once the text reaches `max_chars`
+    characters (the text is cut there) and `max_tables` tables were found, unless a selected artifact
+    without a budget (links, images) still needs the rest of the range.
     """
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, document=None, pdf_engine="default", page_range=None,
+                 page_workers=None, pages_per_chunk=PageParallelExtractor.DEFAULT_PAGES_PER_CHUNK,
+                 include_image_bytes=True, metrics=None, ooxml_engine="default", artifacts=None,
+                 max_chars=None, max_tables=None, ocr=None, limits=None):
+        """
+        :param file_path: Path of the PDF, DOCX or PPTX file.
+        :param document: Optional ParsedDocument to reuse; a new one is created otherwise.
+        :param pdf_engine: PDF backend to use, one of PDF_ENGINES.
+        :param page_range: Optional (start, stop) zero-based, half-open range of the PDF pages, PPTX slides
+                           or DOCX pages (see DocxPageCounter) to extract.
+        :param page_workers: When greater than 1, PDF pages are split into chunks of `pages_per_chunk`
+                             and extracted in that many worker processes (see PageParallelExtractor).
+        :param pages_per_chunk: Number of pages handled by one worker task.
+        :param include_image_bytes: When False, images only carry their format, resolution and location
+                                    (an inventory); storage fetches the bytes via load_image_bytes().
+        :param metrics: Optional Metrics collecting stage timings and counters; the loader and storage
+                        backends given this extractor report into it too. Disabled (NULL_METRICS) by default.
+        :param ooxml_engine: DOCX/PPTX backend to use, one of OOXML_ENGINES.
+        :param artifacts: Artifact types to extract (see select_artifacts); all of ARTIFACTS by default.
+        :param max_chars: Optional budget: only the first `max_chars` characters of text are extracted.
+        :param max_tables: Optional budget: only the first `max_tables` tables are extracted.
+        :param ocr: Optional PageOCR recognising the text of PDF pages that have no text layer.
+        :param limits: Optional ResourceLimits; a document over its page, OOXML size or image byte limits
+                       raises ResourceLimitExceeded, before anything is parsed where the size is known upfront.
+        """
+        if pdf_engine not in PDF_ENGINES:
+            raise ValueError(f"Unknown PDF engine '{pdf_engine}'. Expected one of: {', '.join(PDF_ENGINES)}.")
+        if ooxml_engine not in OOXML_ENGINES:
+            raise ValueError(f"Unknown OOXML engine '{ooxml_engine}'. Expected one of: {', '.join(OOXML_ENGINES)}.")
+        if page_range is not None and (len(page_range) != 2 or page_range[0] < 0 or page_range[1] < page_range[0]):
+            raise ValueError(f"Invalid page range {page_range!r}. Expected a zero-based (start, stop) with start <= stop.")
+        for name, budget in (("max_chars", max_chars), ("max_tables", max_tables)):
+            if budget is not None and budget < 0:
+                raise ValueError(f"{name} must not be negative, got {budget}.")
         self.file_path = file_path
         self.file_extension = os.path.splitext(file_path)[1].lower()
+        self.document = document or ParsedDocument(file_path)
+        self.pdf_engine = pdf_engine
+        self.ooxml_engine = ooxml_engine
+        self.page_range = tuple(page_range) if page_range is not None else None
+        self.max_chars = max_chars
+        self.max_tables = max_tables
+        self.ocr = ocr
+        self.limits = limits
+        # Image bytes extracted from a PDF so far, checked against limits.max_image_bytes
+        self._image_bytes = 0
+        self.page_workers = page_workers
+        self.pages_per_chunk = pages_per_chunk
+        self._single_pass_engine = None
+        self._streaming_engine = None
+        self._page_parallel = None
+        self.include_image_bytes = include_image_bytes
+        self.artifacts = select_artifacts(artifacts)
+        self._pdf_images = {}
+        self.metrics = metrics or NULL_METRICS
+        if limits is not None:
+            try:
+                limits.check_document(self.document)
+            except Exception:
+                # The caller never gets this extractor to close, so a document opened here is released now
+                if document is None:
+                    self.document.close()
+                raise
+        if self.metrics.enabled:
+            self.metrics.increment("files")
+            self.metrics.increment("bytes_read", self.document.file_size)
+            self.metrics.increment("pages", self.document.page_count or 0)
+
+    def cache_config(self):
+        """Settings that change the extracted output; used to key ExtractionCache entries."""
+        return {
+            "version": EXTRACTOR_VERSION,
+            "pdf_engine": self.pdf_engine,
+            "ooxml_engine": self.ooxml_engine,
+            "page_range": self.page_range,
+            "max_chars": self.max_chars,
+            "max_tables": self.max_tables,
+            "include_image_bytes": self.include_image_bytes,
+            "artifacts": self.artifacts,
+            "ocr": self.ocr.config() if self.ocr is not None else None,
+        }
+
+    def wants(self, artifact):
+        """Whether `artifact` (one of ARTIFACTS) is selected for extraction."""
+        return artifact in self.artifacts
+
+    def close(self):
+        """Close the parsed document and release its file handles."""
+        self.document.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def extract_selected(self):
+        """
+        Extract the selected artifacts into the dict used by FileProcessor and the storage backends:
+        'text' holds (text, metadata), with None for whichever of the two is not selected, and
+        'links', 'images' and 'tables' are only present when selected. Nothing else is extracted.
+        """
+        data = {}
+        if self._uses_streaming_ooxml():
+            # One walk of the document collects every selected artifact for the extract_* calls below
+            self._streaming_ooxml()
+        if self.wants("text"):
+            text, metadata = self.extract_text()
+            data['text'] = (text, metadata if self.wants("metadata") else None)
+        else:
+            data['text'] = (None, self.extract_metadata() if self.wants("metadata") else None)
+        if self.wants("links"):
+            data['links'] = self.extract_links()
+        if self.wants("images"):
+            data['images'] = self.extract_images()
+        if self.wants("tables"):
+            data['tables'] = self.extract_tables()
+        return data
 
+    @timed("extract.text")
     def extract_text(self):
         """
         Extract text content from the file based on its type (PDF, DOCX, PPTX).
         """
+        if self._uses_page_parallel():
+            result = self._parallel_result()
+            return result["text"], result["metadata"]
+
+        elif self._uses_single_pass():
+            result = self._single_pass()
+            return result["text"], result["metadata"]
+
+        elif self._uses_streaming_ooxml():
+            result = self._streaming_ooxml()
+            return result["text"], result["metadata"]
+
+        elif self.file_extension == '.pdf':
+            return self._budgeted_text(), self._extract_pdf_metadata(self.document.pdf_reader.metadata)
+
+        elif self.file_extension == '.docx':
+            return self._budgeted_text(), self._extract_metadata(self.document.docx.core_properties)
+
+        elif self.file_extension == '.pptx':
+            return self._budgeted_text(), self._extract_metadata(self.document.presentation.core_properties)
+
+        else:
+            raise ValueError("Unsupported file format. Only PDF, DOCX, and PPTX are supported.")
+
+    @timed("extract.metadata")
+    def extract_metadata(self):
+        """
+        Extract only the metadata of the file, without reading its text.
+        """
+        if self._uses_page_parallel():
+            return self._parallel_result()["metadata"]
+        elif self._uses_single_pass():
+            return self._single_pass()["metadata"]
+        elif self._uses_streaming_ooxml():
+            # Only the core properties part is read; the document body is not walked
+            return self._streaming_engine_instance().metadata()
+        elif self.file_extension == '.pdf':
+            return self._extract_pdf_metadata(self.document.pdf_reader.metadata)
+        elif self.file_extension == '.docx':
+            return self._extract_metadata(self.document.docx.core_properties)
+        elif self.file_extension == '.pptx':
+            return self._extract_metadata(self.document.presentation.core_properties)
+        else:
+            raise ValueError("Unsupported file format. Only PDF, DOCX, and PPTX are supported.")
+
+    @timed_iter("extract.pages", counter="text_chunks")
+    def iter_pages(self):
+        """
+        Yield the text of the file one page (PDF), paragraph (DOCX) or slide (PPTX) at a time,
+        as dicts with 'text' and 'page_number' (or 'slide_number' for PPTX).
+
+        Joining the yielded texts with TEXT_SEPARATORS[file_extension] gives the text of extract_text().
+        Raises ValueError when the selected engines cannot stream (see streams_pages()).
+        """
+        if not self.streams_pages():
+            raise ValueError("Streaming needs the default PDF engine and a single page worker; the single-pass "
+                             "and page-parallel engines extract the whole document at once.")
+
+        if self._uses_streaming_ooxml():
+            yield from self._within_char_budget(self._streaming_engine_instance().items("pages"))
+
+        else:
+            yield from self._within_char_budget(self._pages())
+
+    def streams_pages(self):
+        """
+        Whether iter_pages() yields the text page by page. The single-pass and page-parallel PDF engines
+        extract the whole document at once, so they would neither bound memory nor keep page numbers.
+        """
+        return not (self._uses_page_parallel() or self._uses_single_pass())
+
+    def _pages(self):
+        """The page dicts of iter_pages() for the default engines, within `page_range` but without budgets."""
         if self.file_extension == '.pdf':
-            with open(self.file_path, "rb") as f:
-                reader = PdfReader(f)
-                text = "".join([page.extract_text() or "" for page in reader.pages])
-                metadata = self._extract_metadata(reader.metadata)
-            return text, metadata
+            reader = self.document.pdf_reader
+            pages = ({"text": reader.pages[page_num].extract_text() or "", "page_number": page_num + 1}
+                     for page_num in self._page_numbers(len(reader.pages)))
+            if self.ocr is not None:
+                # Pages without a text layer are OCR'd
+                pages = self.ocr.fill(pages, self.document.fitz_doc, self.metrics)
+            yield from pages
 
         elif self.file_extension == '.docx':
-            doc = Document(self.file_path)
-            text = "\n".join([para.text for para in doc.paragraphs])
-            metadata = self._extract_metadata(doc.core_properties)
-            return text, metadata
+            # DOCX has no page model, so paragraphs are the unit of streaming
+            for para in self._docx_blocks(paragraphs=True):
+                yield {"text": para.text, "page_number": None}
 
         elif self.file_extension == '.pptx':
-            presentation = Presentation(self.file_path)
-            text = "\n".join([shape.text for slide in presentation.slides for shape in slide.shapes if hasattr(shape, "text")])
-            metadata = self._extract_metadata(presentation.core_properties)
-            return text, metadata
+            slides = self.document.presentation.slides
+            for slide_num in self._page_numbers(len(slides)):
+                texts = [shape.text for shape in slides[slide_num].shapes if hasattr(shape, "text")]
+                if texts:
+                    yield {"text": "\n".join(texts), "slide_number": slide_num + 1}
 
         else:
             raise ValueError("Unsupported file format. Only PDF, DOCX, and PPTX are supported.")
@@ -56,87 +318,152 @@ class FileDataExtractor:
         """
         Extract images from the file based on its type (PDF, DOCX, PPTX).
         """
-        images = []
-        if self.file_extension == '.pdf':
-            with fitz.open(self.file_path) as doc:
-                for page_num in range(len(doc)):
-                    for img in doc[page_num].get_images(full=True):
-                        images.append(self._process_image("pdf", img, doc, page_num + 1))
+        return list(self.iter_images())
+
+    @timed_iter("extract.images", counter="images")
+    def iter_images(self):
+        """
+        Yield the images of the file one at a time, in page/slide order, so callers can
+        write each image out before the next one is decoded.
+        """
+        if self._uses_page_parallel():
+            yield from self._parallel_result()["images"]
+
+        elif self._uses_single_pass():
+            yield from self._single_pass()["images"]
+
+        elif self._uses_streaming_ooxml():
+            # Image parts are only read (and probed) as they are yielded
+            for part_name, slide_number in self._streaming_engine_instance().items("image_parts"):
+                yield self._process_image_part(part_name, self.document.archive.read(part_name), slide_number)
+
+        elif self.file_extension == '.pdf':
+            doc = self.document.fitz_doc
+            for page_num in self._page_numbers(len(doc)):
+                for img in doc[page_num].get_images(full=True):
+                    yield self._process_image("pdf", img, doc, page_num + 1)
 
         elif self.file_extension == '.docx':
-            doc = Document(self.file_path)
-            for rel in doc.part.rels.values():
+            doc = self.document.docx
+            rels = doc.part.rels
+            if self.page_range is not None:
+                # Only the pictures placed on the pages of the range, each image part once
+                rel_ids = dict.fromkeys(rel_id for block in self._docx_blocks()
+                                        for rel_id in docx_image_rel_ids(block._element))
+                rels = {rel_id: rels[rel_id] for rel_id in rel_ids if rel_id in rels and not rels[rel_id].is_external}
+            for rel in rels.values():
                 if "image" in rel.target_ref:
-                    image_blob = rel.target_part.blob
-                    images.append(self._process_image("docx", image_blob))
+                    yield self._process_image("docx", rel.target_part)
 
         elif self.file_extension == '.pptx':
-            presentation = Presentation(self.file_path)
-            for slide_num, slide in enumerate(presentation.slides):
-                for shape in slide.shapes:
+            slides = self.document.presentation.slides
+            for slide_num in self._page_numbers(len(slides)):
+                for shape in slides[slide_num].shapes:
                     if hasattr(shape, "image") and shape.image:
-                        images.append(self._process_image("pptx", shape, slide_num + 1))
+                        yield self._process_image("pptx", shape, page_number=slide_num + 1)
 
         else:
             raise ValueError("Unsupported file format. Only PDF, DOCX, and PPTX are supported.")
 
-        return images
-
     def extract_tables(self):
         """
         Extract tables from the file based on its type (PDF, DOCX, PPTX).
         """
-        tables = []
+        return list(self.iter_tables())
+
+    @timed_iter("extract.tables", counter="tables")
+    def iter_tables(self):
+        """
+        Yield the tables of the file one at a time (each a TableRecord), in page/slide order.
+        """
+        if self._uses_page_parallel():
+            yield from self._parallel_result()["tables"]
+
+        elif self._uses_single_pass():
+            yield from self._single_pass()["tables"]
+
+        elif self._uses_streaming_ooxml():
+            yield from islice(self._streaming_engine_instance().items("tables"), self.max_tables)
+
+        else:
+            # islice stops pulling tables once the budget is met, so later pages are never parsed
+            yield from islice(self._tables(), self.max_tables)
+
+    def _tables(self):
+        """The tables of iter_tables() for the default engines, within `page_range` but without budgets."""
         if self.file_extension == '.pdf':
-            with pdfplumber.open(self.file_path) as pdf:
-                for page in pdf.pages:
-                    tables.extend(page.extract_tables() or [])
+            pages = self.document.plumber_pdf.pages
+            for page_num in self._page_numbers(len(pages)):
+                for table in pages[page_num].extract_tables() or []:
+                    yield TableRecord.from_rows(table, page_num + 1)
+                # pdfplumber caches parsed layout objects per page; drop them once the page is done
+                pages[page_num].flush_cache()
 
         elif self.file_extension == '.docx':
-            doc = Document(self.file_path)
-            tables = [[self._extract_table_row(row) for row in table.rows] for table in doc.tables]
+            for table in self._docx_blocks(tables=True):
+                yield TableRecord.from_rows(self._extract_table_row(row) for row in table.rows)
 
         elif self.file_extension == '.pptx':
-            presentation = Presentation(self.file_path)
-            for slide in presentation.slides:
-                for shape in slide.shapes:
+            slides = self.document.presentation.slides
+            for slide_num in self._page_numbers(len(slides)):
+                for shape in slides[slide_num].shapes:
                     if shape.has_table:
-                        tables.append([self._extract_table_row(row) for row in shape.table.rows])
+                        yield TableRecord.from_rows((self._extract_table_row(row) for row in shape.table.rows),
+                                                    slide_num + 1, "slide_number")
 
         else:
             raise ValueError("Unsupported file format. Only PDF, DOCX, and PPTX are supported.")
 
-        return tables
-
+    @timed("extract.links")
     def extract_links(self):
         """
         Extract links from the file based on its type (PDF, DOCX, PPTX).
         """
         links = []
-        if self.file_extension == '.pdf':
-            with fitz.open(self.file_path) as doc:
-                for page_num in range(len(doc)):
-                    links.extend(self._extract_pdf_link(doc[page_num], page_num + 1))
+        if self._uses_page_parallel():
+            links = self._parallel_result()["links"]
+
+        elif self._uses_single_pass():
+            links = self._single_pass()["links"]
+
+        elif self._uses_streaming_ooxml():
+            links = list(self._streaming_engine_instance().items("links"))
+
+        elif self.file_extension == '.pdf':
+            doc = self.document.fitz_doc
+            for page_num in self._page_numbers(len(doc)):
+                links.extend(self._extract_pdf_link(doc[page_num], page_num + 1))
 
         elif self.file_extension == '.docx':
-            doc = Document(self.file_path)
-            for para in doc.paragraphs:
+            for para in self._docx_blocks(paragraphs=True):
                 for rel in para._p.xpath('.//w:hyperlink'):
                     rId = rel.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id')
                     if rId in para.part.rels:
-                        links.append({"url": para.part.rels[rId].target_ref, "page_number": None})
+                        links.append(LinkRecord(para.part.rels[rId].target_ref))
 
         elif self.file_extension == '.pptx':
-            presentation = Presentation(self.file_path)
-            links = [{"url": shape.hyperlink.address, "slide_number": slide_num + 1}
-                     for slide_num, slide in enumerate(presentation.slides)
-                     for shape in slide.shapes if hasattr(shape, "hyperlink") and shape.hyperlink.address]
+            slides = self.document.presentation.slides
+            links = [LinkRecord(shape.hyperlink.address, slide_num + 1, "slide_number")
+                     for slide_num in self._page_numbers(len(slides))
+                     for shape in slides[slide_num].shapes if hasattr(shape, "hyperlink") and shape.hyperlink.address]
 
         else:
             raise ValueError("Unsupported file format. Only PDF, DOCX, and PPTX are supported.")
 
         return links
 
+    def _extract_pdf_metadata(self, info):
+        """
+        Extract metadata from the PyPDF2 document information of a PDF (None when it has none), with
+        the same plain values as the single-pass engine: the creation date as a datetime, "" when missing.
+        """
+        return {
+            "author": getattr(info, 'author', None) or "",
+            "created": parse_pdf_date(getattr(info, 'creation_date_raw', None)),
+            "last_modified_by": "",
+            "title": getattr(info, 'title', None) or ""
+        }
+
     def _extract_metadata(self, properties):
         """
         Extract metadata from the file properties for DOCX and PPTX files.
@@ -152,39 +479,167 @@ class FileDataExtractor:
     def _process_image(self, file_type, img, doc=None, page_number=None):
         """
         Process images from PDF, DOCX, and PPTX files.
+
+        Returns an ImageRecord. Format and resolution are read from the image header (see probe_image)
+        instead of decoding it. When `include_image_bytes` is off, `image` is None and `image_ref` tells load_image_bytes()
+        where to fetch the bytes from later. Image bytes are wrapped in a memoryview (what
+        sqlite3.Binary is an alias of), without importing sqlite3 for it; the storage backends
+        write that view as-is, so the payload is never copied between parser and storage.
         """
         if file_type == "pdf":
-            base_image = doc.extract_image(img[0])
-            return {
-                "image": sqlite3.Binary(base_image["image"]),
-                "image_format": base_image["ext"],
-                "image_resolution": f"{base_image['width']}x{base_image['height']}",
-                "page_number": page_number
-            }
+            xref = img[0]
+            if not self.include_image_bytes:
+                # get_images(full=True) already lists size and filter; nothing is extracted
+                return ImageRecord(None, xref, PDF_FILTER_FORMATS.get(img[8], "png"), f"{img[2]}x{img[3]}",
+                                   page_number)
+            base_image = self._pdf_image(xref)
+            self._count_image_bytes(len(base_image["image"]))
+            return ImageRecord(memoryview(base_image["image"]), xref, base_image["ext"],
+                               f"{base_image['width']}x{base_image['height']}", page_number)
         elif file_type == "docx":
-            image_blob = img  # Directly use the blob for DOCX
-            image = Image.open(BytesIO(image_blob))
-            return {
-                "image": sqlite3.Binary(image_blob),
-                "image_format": image.format.lower(),
-                "image_resolution": f"{image.width}x{image.height}",
-            }
+            image_part = img  # The related image part of the DOCX
+            return self._process_image_part(str(image_part.partname), image_part.blob)
         elif file_type == "pptx":
-            image_blob = io.BytesIO(img.image.blob)
-            img = Image.open(image_blob)
-            return {
-                "image": sqlite3.Binary(image_blob.getvalue()),
-                "image_format": img.format.lower(),
-                "image_resolution": f"{img.width}x{img.height}",
-                "slide_number": page_number
-            }
+            image_part = img.part.related_part(img._element.blip_rId)
+            return self._process_image_part(str(image_part.partname), image_part.blob, page_number)
         else:
             raise ValueError("Unsupported file type for image processing.")
 
+    def _process_image_part(self, part_name, blob, slide_number=None):
+        """Describe a DOCX or PPTX image part; `slide_number` is only recorded for PPTX files."""
+        image_format, width, height = self._probe_image(blob)
+        # DOCX images never had a location key, so their record has none either
+        location_key = "slide_number" if self.file_extension == '.pptx' else None
+        return ImageRecord(memoryview(blob) if self.include_image_bytes else None, "/" + part_name.lstrip("/"),
+                           image_format, f"{width}x{height}", slide_number, location_key)
+
+    def load_image_bytes(self, image):
+        """
+        Return the bytes of an image produced by iter_images()/extract_images(), fetching them
+        from the document when they were left out (include_image_bytes=False).
+        """
+        if image.image is not None:
+            return image.image
+        if self.file_extension == '.pdf':
+            image_bytes = self._pdf_image(image.image_ref)["image"]
+            self._count_image_bytes(len(image_bytes))
+            return memoryview(image_bytes)
+        return memoryview(self.document.archive.read(image.image_ref.lstrip("/")))
+
+    def _probe_image(self, blob):
+        probed = probe_image(blob)
+        if probed is None:
+            # Unknown header: let Pillow identify it (this still does not decode the pixels).
+            # Imported here, since the header probe covers nearly every image Pillow would be loaded for
+            from PIL import Image
+            image = Image.open(BytesIO(blob))
+            probed = image.format.lower(), image.width, image.height
+        return probed
+
+    def _count_image_bytes(self, size):
+        # OOXML media sizes are checked upfront (see ResourceLimits.check_document); PDF images as they come
+        if self.limits is not None:
+            self._image_bytes += size
+            self.limits.check_image_bytes(self._image_bytes)
+
+    def _pdf_image(self, xref):
+        # PDF images keyed by xref, least recently used first (dicts keep insertion order)
+        base_image = self._pdf_images.pop(xref, None)
+        if base_image is None:
+            base_image = self.document.fitz_doc.extract_image(xref)
+            if len(self._pdf_images) >= PDF_IMAGE_CACHE_SIZE:
+                del self._pdf_images[next(iter(self._pdf_images))]
+        self._pdf_images[xref] = base_image
+        return base_image
+
+    # --------------------------- Page Range and Budget Helpers --------------------------- #
+
+    def _page_numbers(self, page_count):
+        """Zero-based page (or slide) indexes to extract, honouring `page_range` when it is set."""
+        if self.page_range is None:
+            return range(page_count)
+        start, stop = self.page_range
+        return range(max(start, 0), min(stop, page_count))
+
+    def _docx_blocks(self, paragraphs=False, tables=False):
+        """
+        Body-level paragraphs and/or tables of the DOCX in document order, limited to the blocks
+        starting on a page of `page_range`; both kinds when neither is asked for.
+        """
+        blocks = self.document.docx.iter_inner_content()
+        if self.page_range is not None:
+            # Pages are counted over paragraphs and tables alike, whichever kind is kept
+            blocks = docx_blocks_in_range(blocks, self.page_range, element_of=lambda block: block._element)
+        if paragraphs == tables:
+            return blocks
+        return (block for block in blocks if (block._element.tag == W + "p") == paragraphs)
+
+    def _text_budget_left(self, chars):
+        """Whether text is still wanted once `chars` characters have been extracted."""
+        return self.max_chars is None or chars < self.max_chars
+
+    def _table_budget_left(self, tables):
+        """Whether tables are still wanted once `tables` tables have been extracted."""
+        return self.max_tables is None or tables < self.max_tables
+
+    def _within_char_budget(self, pages):
+        """
+        Yield the page dicts of `pages` until their texts, joined with TEXT_SEPARATORS, reach `max_chars`
+        characters. The last page is cut at the budget and the pages after it are never pulled.
+        """
+        if self.max_chars is None:
+            yield from pages
+            return
+        separator = TEXT_SEPARATORS[self.file_extension]
+        remaining = self.max_chars
+        if remaining <= 0:
+            return
+        for page in pages:
+            if len(page["text"]) >= remaining:
+                yield dict(page, text=page["text"][:remaining])
+                return
+            yield page
+            remaining -= len(page["text"]) + len(separator)
+            if remaining <= 0:
+                return
+
+    def _budgeted_text(self):
+        return TEXT_SEPARATORS[self.file_extension].join(page["text"] for page in self._within_char_budget(self._pages()))
+
     # --------------------------- PDF Helper Methods --------------------------- #
 
+    def _uses_page_parallel(self):
+        # Budgets are met page after page, which page-parallel extraction cannot stop early
+        return (self.file_extension == '.pdf' and (self.page_workers or 1) > 1 and self.page_range is None
+                and self.max_chars is None and self.max_tables is None)
+
+    def _parallel_result(self):
+        if self._page_parallel is None:
+            self._page_parallel = PageParallelExtractor(self, self.page_workers, self.pages_per_chunk)
+        return self._page_parallel.run()
+
+    def _uses_streaming_ooxml(self):
+        return self.file_extension in ('.docx', '.pptx') and self.ooxml_engine == "streaming"
+
+    def _streaming_engine_instance(self):
+        if self._streaming_engine is None:
+            self._streaming_engine = StreamingOOXMLEngine(self)
+        return self._streaming_engine
+
+    def _streaming_ooxml(self):
+        return self._streaming_engine_instance().run()
+
+    def _uses_single_pass(self):
+        return self.file_extension == '.pdf' and self.pdf_engine == "single_pass"
+
+    def _single_pass(self):
+        # One engine per extractor, so all four extract_* calls share a single page walk
+        if self._single_pass_engine is None:
+            self._single_pass_engine = SinglePassPDFEngine(self)
+        return self._single_pass_engine.run()
+
     def _extract_pdf_link(self, page, page_number):
-        return [{"url": link.get("uri", ""), "page_number": page_number} for link in page.get_links()]
+        return [LinkRecord(link.get("uri", ""), page_number) for link in page.get_links()]
 
     # --------------------------- Common Helper Methods --------------------------- #
 
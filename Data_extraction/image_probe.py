@@ -0,0 +1,87 @@
+import struct
+
+# JPEG start-of-frame markers carry the image size; C4 (DHT), C8 (JPG) and CC (DAC) share the range but do not
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Markers that stand alone, without a length field
+JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8}
+WMF_PLACEABLE_MAGIC = b"\xd7\xcd\xc6\x9a"
+EMF_SIGNATURE = b" EMF"
+
+
+def probe_image(data):
+    """
+    Read the format and pixel size of an image from its header, without decoding it.
+
+    Supports PNG, JPEG, GIF, BMP, TIFF, EMF and placeable WMF.
+    Returns a (format, width, height) tuple with a lowercase format name, or None when the
+    header is not recognised (callers can then fall back to a full decoder). Format names
+    match Pillow's, so EMF is reported as 'wmf' like Pillow's WMF plugin does.
+
+    :param data: The image bytes (bytes, bytearray or memoryview).
+    """
+    header = bytes(data[:32])
+    try:
+        if header.startswith(b"\x89PNG\r\n\x1a\n"):
+            width, height = struct.unpack(">II", header[16:24])
+            return "png", width, height
+        if header.startswith(b"\xff\xd8"):
+            return _probe_jpeg(data)
+        if header[:6] in (b"GIF87a", b"GIF89a"):
+            width, height = struct.unpack("<HH", header[6:10])
+            return "gif", width, height
+        if header.startswith(b"BM"):
+            width, height = struct.unpack("<ii", header[18:26])
+            return "bmp", width, abs(height)  # Negative height means a top-down bitmap
+        if header[:4] in (b"II*\x00", b"MM\x00*"):
+            return _probe_tiff(data)
+        if header.startswith(b"\x01\x00\x00\x00") and bytes(data[40:44]) == EMF_SIGNATURE:
+            # EMR_HEADER bounds (rclBounds) are inclusive device-unit coordinates
+            left, top, right, bottom = struct.unpack("<iiii", header[8:24])
+            return "wmf", right - left, bottom - top
+        if header.startswith(WMF_PLACEABLE_MAGIC):
+            left, top, right, bottom, units_per_inch = struct.unpack("<hhhhH", header[6:16])
+            # Same 72 dpi convention as Pillow's WMF plugin
+            return "wmf", abs(right - left) * 72 // units_per_inch, abs(bottom - top) * 72 // units_per_inch
+    except (struct.error, ZeroDivisionError):
+        return None
+    return None
+
+
+def _probe_jpeg(data):
+    view = memoryview(data)
+    offset = 2
+    while offset + 4 <= len(view):
+        if view[offset] != 0xFF:
+            return None
+        marker = view[offset + 1]
+        if marker == 0xFF:  # Fill byte before a marker
+            offset += 1
+            continue
+        if marker in JPEG_STANDALONE_MARKERS:
+            offset += 2
+            continue
+        segment_length = struct.unpack(">H", view[offset + 2:offset + 4])[0]
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", view[offset + 5:offset + 9])
+            return "jpeg", width, height
+        if marker == 0xDA:  # Start of scan: no frame header found before the image data
+            return None
+        offset += 2 + segment_length
+    return None
+
+
+def _probe_tiff(data):
+    view = memoryview(data)
+    endian = "<" if bytes(view[:2]) == b"II" else ">"
+    ifd_offset = struct.unpack(endian + "I", view[4:8])[0]
+    entry_count = struct.unpack(endian + "H", view[ifd_offset:ifd_offset + 2])[0]
+    size = {}
+    for index in range(entry_count):
+        entry = ifd_offset + 2 + index * 12
+        tag, field_type = struct.unpack(endian + "HH", view[entry:entry + 4])
+        if tag in (256, 257):  # ImageWidth, ImageLength
+            value_format = "H" if field_type == 3 else "I"
+            size[tag] = struct.unpack(endian + value_format, view[entry + 8:entry + 8 + struct.calcsize(value_format)])[0]
+    if 256 in size and 257 in size:
+        return "tiff", size[256], size[257]
+    return None
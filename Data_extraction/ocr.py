@@ -0,0 +1,204 @@
+import os
+import math
+import hashlib
+from contextlib import ExitStack
+from metrics import NULL_METRICS
+
+
+def _recognize(width, height, samples, languages, tesseract_config):
+    """
+    Run Tesseract on one grayscale page image inside an OCR worker and return its text.
+    Only the raw pixels cross the process boundary; the PDF stays open in the parent.
+    """
+    # Imported here: OCR is optional, and only the processes that run it need pytesseract and Pillow
+    import pytesseract
+    from PIL import Image
+
+    image = Image.frombytes("L", (width, height), samples)
+    return pytesseract.image_to_string(image, lang=languages, config=tesseract_config)
+
+
+class PageOCR:
+    """
+    Recognises the text of PDF pages that have no text layer (scanned or image-only pages) with a
+    local Tesseract install, through pytesseract.
+
+    Only pages whose extracted text is empty and that hold at least one image are OCR'd. Each one is
+    rendered in grayscale at `dpi`, lowered further for pages that would exceed `max_pixels`, and the
+    rendered pixels are hashed: pages already recognised, in this document or in an earlier one
+    (recurring cover pages, stamped forms), are served from `cache_dir` and never OCR'd twice.
+    The remaining pages are recognised in a pool of `workers` processes.
+
+    Methods:
+        recognize(fitz_doc, page_indexes): Returns {page index: text} for the given pages.
+        fill(pages, fitz_doc): Fills in the empty page texts of a stream of page dicts.
+        serial(): A single-process copy, for page-parallel and batch workers.
+        config(): Settings that change the recognised text, for cache keys.
+    """
+
+    DEFAULT_DPI = 200
+    # A letter page at 200 DPI is about 3.7 million pixels; posters and drawings are rendered smaller
+    DEFAULT_MAX_PIXELS = 16 * 1024 * 1024
+    # Pages gathered from a page stream before the pool recognises them together
+    PAGES_PER_WORKER = 4
+    # Recently recognised page images kept in memory, so repeated pages skip Tesseract even without cache_dir
+    MEMO_SIZE = 256
+
+    def __init__(self, workers=1, dpi=DEFAULT_DPI, languages="eng", cache_dir=None,
+                 max_pixels=DEFAULT_MAX_PIXELS, tesseract_config=""):
+        """
+        :param workers: Number of OCR worker processes; 1 runs Tesseract in this process.
+        :param dpi: Resolution pages are rendered at; lower is faster, 200-300 suits most scans.
+        :param languages: Tesseract language codes, e.g. 'eng' or 'eng+deu'.
+        :param cache_dir: Directory of the page-image cache, or None to OCR every page.
+        :param max_pixels: Pixel count above which a page is rendered below `dpi`.
+        :param tesseract_config: Extra Tesseract command-line options, e.g. '--psm 6'.
+        """
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.dpi = dpi
+        self.languages = languages
+        self.cache_dir = cache_dir
+        self.max_pixels = max_pixels
+        self.tesseract_config = tesseract_config
+        self._memo = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def config(self):
+        """Settings that change the recognised text; used in ExtractionCache keys."""
+        return {"dpi": self.dpi, "languages": self.languages, "max_pixels": self.max_pixels,
+                "tesseract_config": self.tesseract_config}
+
+    def serial(self):
+        """A copy that runs Tesseract in the calling process, for use inside other worker processes."""
+        return PageOCR(1, self.dpi, self.languages, self.cache_dir, self.max_pixels, self.tesseract_config)
+
+    def recognize(self, fitz_doc, page_indexes, metrics=NULL_METRICS, executor=None):
+        """
+        Return {page index: text} for the zero-based `page_indexes` of `fitz_doc` that need OCR
+        (no text layer, at least one image); other pages are left out.
+
+        :param executor: Optional process pool to reuse; one is started when several pages need OCR.
+        """
+        texts, pending = {}, {}
+        for page_index in page_indexes:
+            page = fitz_doc[page_index]
+            if not page.get_images():
+                continue
+            with metrics.timer("extract.ocr.render"):
+                width, height, samples = self._render(page)
+            key = self._cache_key(width, height, samples)
+            cached = self._cached(key)
+            if cached is not None:
+                metrics.increment("ocr_cache_hits")
+                texts[page_index] = cached
+            else:
+                # Identical pages of this document are recognised once
+                pending.setdefault(key, ((width, height, samples), []))[1].append(page_index)
+        if not pending:
+            return texts
+
+        metrics.increment("ocr_pages", len(pending))
+        images = [image for image, _ in pending.values()]
+        with metrics.timer("extract.ocr"), ExitStack() as stack:
+            if executor is None and self.workers > 1 and len(images) > 1:
+                # Imported here: process pools are only needed when several pages are recognised
+                from concurrent.futures import ProcessPoolExecutor
+                executor = stack.enter_context(ProcessPoolExecutor(max_workers=min(self.workers, len(images))))
+            arguments = ([width for width, _, _ in images], [height for _, height, _ in images],
+                         [samples for _, _, samples in images], [self.languages] * len(images),
+                         [self.tesseract_config] * len(images))
+            results = executor.map(_recognize, *arguments) if executor is not None else map(_recognize, *arguments)
+            for (key, (_, indexes)), text in zip(pending.items(), results):
+                self._store(key, text)
+                for page_index in indexes:
+                    texts[page_index] = text
+        return texts
+
+    def fill(self, pages, fitz_doc, metrics=NULL_METRICS):
+        """
+        Yield the page dicts of `pages` (with 'text' and a one-based 'page_number'), replacing empty
+        texts with their OCR text. Pages are gathered a few per worker at a time, so a consumer that
+        stops early (see the extractor's budgets) leaves the rest of the document unrendered.
+        """
+        window = self.workers * self.PAGES_PER_WORKER
+        with ExitStack() as stack:
+            executor = None
+            batch = []
+            for page in pages:
+                batch.append(page)
+                if len(batch) >= window:
+                    executor = executor or self._executor(stack)
+                    yield from self._fill_batch(batch, fitz_doc, metrics, executor)
+                    batch = []
+            if batch:
+                yield from self._fill_batch(batch, fitz_doc, metrics, executor)
+
+    def _fill_batch(self, batch, fitz_doc, metrics, executor):
+        empty = [page["page_number"] - 1 for page in batch if not page["text"].strip()]
+        texts = self.recognize(fitz_doc, empty, metrics, executor) if empty else {}
+        for page in batch:
+            text = texts.get(page["page_number"] - 1)
+            yield dict(page, text=text) if text is not None else page
+
+    def _executor(self, stack):
+        # One pool serves every batch of a page stream
+        if self.workers <= 1:
+            return None
+        from concurrent.futures import ProcessPoolExecutor
+        return stack.enter_context(ProcessPoolExecutor(max_workers=self.workers))
+
+    def _render(self, page):
+        """Render `page` in grayscale at `dpi`, or lower when that would exceed `max_pixels`."""
+        # Imported here: PyMuPDF is only loaded for PDF documents
+        import fitz
+
+        dpi = self.dpi
+        pixels = page.rect.width * page.rect.height * (dpi / 72) ** 2
+        if pixels > self.max_pixels:
+            dpi = max(1, int(dpi * math.sqrt(self.max_pixels / pixels)))
+        pixmap = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+        return pixmap.width, pixmap.height, pixmap.samples
+
+    # --------------------------- Page Image Cache --------------------------- #
+
+    def _cache_key(self, width, height, samples):
+        digest = hashlib.sha256(f"{width}x{height}:".encode("ascii"))
+        digest.update(samples)
+        settings = hashlib.sha256(repr((self.languages, self.tesseract_config)).encode("utf-8")).hexdigest()[:16]
+        return f"{digest.hexdigest()}-{settings}"
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.txt")
+
+    def _cached(self, key):
+        if key in self._memo:
+            return self._memo[key]
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._entry_path(key), encoding="utf-8") as entry:
+                text = entry.read()
+        except OSError:
+            return None
+        self._remember(key, text)
+        return text
+
+    def _remember(self, key, text):
+        if len(self._memo) >= self.MEMO_SIZE:
+            # Dicts keep insertion order, so this drops the oldest entry
+            self._memo.pop(next(iter(self._memo)), None)
+        self._memo[key] = text
+
+    def _store(self, key, text):
+        self._remember(key, text)
+        # Entries are a few kilobytes of text, so unlike ExtractionCache this cache is never evicted
+        if not self.cache_dir:
+            return
+        entry_path = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        # Written under a temporary name, so concurrent workers never read a partial entry
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as entry:
+            entry.write(text)
+        os.replace(temp_path, entry_path)
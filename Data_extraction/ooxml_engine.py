@@ -0,0 +1,478 @@
+import posixpath
+import datetime as dt
+import xml.etree.ElementTree as ET
+from Data_extraction.records import LinkRecord, TableRecord
+
+# XML namespaces of the WordprocessingML, PresentationML and DrawingML parts read below
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+P = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+DC = "{http://purl.org/dc/elements/1.1/}"
+DCTERMS = "{http://purl.org/dc/terms/}"
+CP = "{http://schemas.openxmlformats.org/package/2006/metadata/core-properties}"
+
+TABLE_URI = "http://schemas.openxmlformats.org/drawingml/2006/table"
+OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+CORE_PROPERTIES_REL = "http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties"
+
+# Core properties python-docx/python-pptx report for a package without docProps/core.xml
+DEFAULT_CORE_PROPERTIES = {
+    '.docx': {"title": "Word Document", "last_modified_by": "python-docx"},
+    '.pptx': {"title": "PowerPoint Presentation", "last_modified_by": "python-pptx"},
+}
+
+# Children of a slide's shape tree that python-pptx counts as shapes
+SLIDE_SHAPE_TAGS = {P + "sp", P + "grpSp", P + "graphicFrame", P + "cxnSp", P + "pic", P + "contentPart"}
+
+# The kinds of items the document walk yields, and the artifact each one belongs to
+ITEM_ARTIFACTS = {"pages": "text", "links": "links", "tables": "tables", "image_parts": "images"}
+
+
+class StreamingOOXMLEngine:
+    """
+    Extracts text, metadata, links, images and tables from a DOCX or PPTX file by streaming its
+    XML parts straight from the zip archive, without building the python-docx/python-pptx object model.
+
+    `word/document.xml` and every `ppt/slides/slideN.xml` are read once with an incremental parser
+    (iterparse); each top-level paragraph, table or shape is handled as soon as it is complete and
+    then dropped, so memory stays bounded by the largest single element. The results match those
+    of the default engine: text, links and tables follow python-docx/python-pptx semantics, and
+    images are the same parts, probed lazily when the extractor yields them.
+
+    The extractor's `page_range` limits the walk to those slides, or to the DOCX paragraphs and tables
+    starting on those pages (see DocxPageCounter). Once the `max_chars`/`max_tables` budgets are met and
+    nothing else is selected, the walk stops and the rest of the document is never parsed.
+
+    Methods:
+        run(): Walks the document (once) and returns the collected results.
+        items(kind): Yields the pages, links, tables or image parts as the document is parsed.
+        metadata(): Reads the core properties only.
+    """
+
+    def __init__(self, extractor):
+        """
+        :param extractor: The FileDataExtractor whose parsed document and helpers are used.
+        """
+        self.extractor = extractor
+        self.document = extractor.document
+        self.file_extension = extractor.file_extension
+        self._result = None
+        self._metadata = None
+
+    def run(self):
+        """
+        Walk the document once and return a dict with 'text', 'metadata', 'pages', 'links', 'tables'
+        and 'image_parts' (the (partname, slide_number) of every image, read by the extractor on demand).
+        """
+        if self._result is None:
+            result = {kind: [] for kind in ITEM_ARTIFACTS}
+            for kind, item in self._walk(self.extractor.artifacts):
+                result[kind].append(item)
+            pages = list(self.extractor._within_char_budget(result["pages"]))
+            result.update(text="\n".join(page["text"] for page in pages), pages=pages,
+                          tables=result["tables"][:self.extractor.max_tables], metadata=self.metadata())
+            self._result = result
+        return self._result
+
+    def items(self, kind):
+        """
+        Yield the items of one kind ('pages', 'links', 'tables' or 'image_parts') as the document is parsed,
+        reading only what that artifact needs, so the caller holds one item at a time. The caller applies the
+        `max_chars`/`max_tables` budgets; the walk stops once the caller stops pulling. Once run() walked the
+        whole document, its results are reused instead.
+        """
+        if self._result is not None:
+            yield from self._result[kind]
+            return
+        for _, item in self._walk((ITEM_ARTIFACTS[kind],)):
+            yield item
+
+    def _walk(self, artifacts):
+        """Yield (kind, item) pairs for the `artifacts` (a subset of the selected ones) in document order."""
+        wants = artifacts.__contains__
+        if self.file_extension == '.docx':
+            return self._walk_docx(wants)
+        if self.file_extension == '.pptx':
+            return self._walk_pptx(wants)
+        raise ValueError("The streaming OOXML engine only supports DOCX and PPTX files.")
+
+    def metadata(self):
+        """Map docProps/core.xml onto the keys used by FileDataExtractor._extract_metadata()."""
+        if self._metadata is None:
+            core_part = next((target for target, _, rel_type in self._rels("").values()
+                              if rel_type == CORE_PROPERTIES_REL), None)
+            if core_part is None or core_part not in self.document.archive.NameToInfo:
+                self._metadata = dict({"author": "", "created": None},
+                                      **DEFAULT_CORE_PROPERTIES[self.file_extension])
+                return self._metadata
+            core = self._parse(core_part)
+            # python-docx reports creation times in UTC, python-pptx as naive datetimes
+            created = _parse_w3cdtf(_child_text(core, DCTERMS + "created"), utc=self.file_extension == '.docx')
+            self._metadata = {
+                "author": _child_text(core, DC + "creator"),
+                "created": created,
+                "last_modified_by": _child_text(core, CP + "lastModifiedBy"),
+                "title": _child_text(core, DC + "title"),
+            }
+        return self._metadata
+
+    # --------------------------- DOCX --------------------------- #
+
+    def _walk_docx(self, wants):
+        extractor = self.extractor
+        main_part = self._main_part("word/document.xml")
+        rels = self._rels(main_part)
+        image_rel_ids = []
+        chars = tables = 0
+
+        # Images come from the relationships alone, so the body is only read for the other artifacts,
+        # or to find the images placed on the pages of `page_range`
+        body = ()
+        if wants("text") or wants("links") or wants("tables") or (wants("images") and extractor.page_range):
+            # Only body-level paragraphs and tables, like Document.paragraphs and Document.tables
+            body = (element for element in self._iter_children(main_part, W + "body")
+                    if element.tag in (W + "p", W + "tbl"))
+            if extractor.page_range is not None:
+                body = docx_blocks_in_range(body, extractor.page_range)
+        for element in body:
+            collect_text = wants("text") and extractor._text_budget_left(chars)
+            collect_tables = wants("tables") and extractor._table_budget_left(tables)
+            if not (collect_text or collect_tables or wants("links") or (wants("images") and extractor.page_range)):
+                # Every budget is met: the rest of the part is never parsed
+                break
+            if extractor.page_range is not None and wants("images"):
+                image_rel_ids.extend(docx_image_rel_ids(element))
+            if element.tag == W + "p":
+                if collect_text:
+                    text = _docx_paragraph_text(element)
+                    yield "pages", {"text": text, "page_number": None}
+                    chars += len(text) + 1
+                if wants("links"):
+                    for hyperlink in element.iter(W + "hyperlink"):
+                        rel_id = hyperlink.get(R + "id")
+                        if rel_id in rels:
+                            yield "links", LinkRecord(rels[rel_id][0])
+            elif collect_tables:
+                yield "tables", TableRecord.from_rows(_docx_table(element))
+                tables += 1
+
+        # Images are the document part's relationships whose target names an image, as in the default engine;
+        # with a page range, only those placed on its pages
+        if wants("images"):
+            used = rels if extractor.page_range is None else dict.fromkeys(image_rel_ids)
+            for rel_id in used:
+                if rel_id in rels and not rels[rel_id][1] and "image" in rels[rel_id][0]:
+                    yield "image_parts", (rels[rel_id][0], None)
+
+    # --------------------------- PPTX --------------------------- #
+
+    def _walk_pptx(self, wants):
+        main_part = self._main_part("ppt/presentation.xml")
+        presentation_rels = self._rels(main_part)
+        slide_ids = self._parse(main_part).find(P + "sldIdLst")
+        slide_parts = [presentation_rels[slide_id.get(R + "id")][0]
+                       for slide_id in (slide_ids if slide_ids is not None else [])]
+
+        extractor = self.extractor
+        chars = tables = 0
+        # Only the slides of `page_range` are read
+        slide_indexes = extractor._page_numbers(len(slide_parts))
+        # Links are never reported for PPTX (see below), so slides are only read for the other artifacts
+        if not (wants("text") or wants("images") or wants("tables")):
+            slide_indexes = []
+        for slide_index in slide_indexes:
+            collect_text = wants("text") and extractor._text_budget_left(chars)
+            collect_tables = wants("tables") and extractor._table_budget_left(tables)
+            if not (collect_text or collect_tables or wants("images")):
+                # Every budget is met: the remaining slides are never parsed
+                break
+            slide_part = slide_parts[slide_index]
+            slide_number = slide_index + 1
+            rels = self._rels(slide_part)
+            slide_texts = []
+            for element in self._iter_children(slide_part, P + "spTree"):
+                if element.tag not in SLIDE_SHAPE_TAGS:
+                    continue
+                if element.tag == P + "sp" and collect_text:
+                    slide_texts.append(_pptx_text_body(element.find(P + "txBody")))
+                elif element.tag == P + "pic" and wants("images"):
+                    rel_id = _picture_image_rel(element)
+                    if rel_id in rels:
+                        yield "image_parts", (rels[rel_id][0], slide_number)
+                elif element.tag == P + "graphicFrame" and collect_tables:
+                    graphic_data = element.find(f"{A}graphic/{A}graphicData")
+                    if graphic_data is not None and graphic_data.get("uri") == TABLE_URI:
+                        yield "tables", TableRecord.from_rows(_pptx_table(graphic_data.find(A + "tbl")),
+                                                              slide_number, "slide_number")
+                        tables += 1
+            if slide_texts:
+                text = "\n".join(slide_texts)
+                yield "pages", {"text": text, "slide_number": slide_number}
+                chars += len(text) + 1
+        # python-pptx shapes have no `hyperlink` attribute, so the default engine reports no PPTX
+        # links; the streaming engine keeps the output identical and yields none
+
+    # --------------------------- Package Helpers --------------------------- #
+
+    def _iter_children(self, part_name, container_tag):
+        """
+        Stream `part_name` and yield every complete child of the first `container_tag` element.
+        Children are removed from the tree once the caller is done with them.
+        """
+        stack = []
+        container = None
+        with self.document.archive.open(part_name) as stream:
+            for event, element in ET.iterparse(stream, events=("start", "end")):
+                if event == "start":
+                    if container is None and element.tag == container_tag:
+                        container = element
+                    stack.append(element)
+                    continue
+                stack.pop()
+                if stack and stack[-1] is container:
+                    yield element
+                    container.remove(element)
+
+    def _parse(self, part_name):
+        with self.document.archive.open(part_name) as stream:
+            return ET.parse(stream).getroot()
+
+    def _main_part(self, default):
+        """Name of the main document part, as declared by the package relationships."""
+        for target, _, rel_type in self._rels("").values():
+            if rel_type == OFFICE_DOCUMENT_REL:
+                return target
+        return default
+
+    def _rels(self, part_name):
+        """
+        Return {rId: (target, external, type)} for the relationships of `part_name` ('' for the package).
+        Internal targets are resolved to zip member names; external ones are kept as written.
+        """
+        directory, name = posixpath.split(part_name)
+        rels_name = posixpath.join(directory, "_rels", f"{name}.rels")
+        if rels_name not in self.document.archive.NameToInfo:
+            return {}
+        rels = {}
+        for rel in self._parse(rels_name).iter(REL + "Relationship"):
+            target = rel.get("Target", "")
+            external = rel.get("TargetMode") == "External"
+            if not external:
+                if target.startswith("/"):
+                    target = target.lstrip("/")
+                else:
+                    target = posixpath.normpath(posixpath.join(directory, target))
+            rels[rel.get("Id")] = (target, external, rel.get("Type"))
+        return rels
+
+
+class DocxPageCounter:
+    """
+    Tracks the page each body-level paragraph or table of a DOCX starts on.
+
+    DOCX files have no page model, so pages are counted from the breaks recorded in the XML: explicit
+    page breaks (<w:br w:type="page"/>, pageBreakBefore, section breaks starting a new page) and the
+    <w:lastRenderedPageBreak/> markers Word leaves where it last laid out a new page. Word also writes
+    such a marker after an explicit break, so that pair counts as one break. A document that was never
+    laid out by Word (e.g. one written by python-docx) only has its explicit breaks.
+    """
+
+    def __init__(self):
+        self.page = 0
+        self._after_explicit_break = False
+
+    def advance(self, element):
+        """Return the zero-based page `element` starts on, and move past the page breaks inside it."""
+        start = None
+        section_breaks = 0
+        for node in element.iter():
+            tag = node.tag
+            if tag == W + "sectPr":
+                # A paragraph's section properties end its section: the new page starts after the paragraph
+                section_type = node.find(W + "type")
+                if section_type is None or section_type.get(W + "val", "nextPage") != "continuous":
+                    section_breaks += 1
+            elif tag == W + "t":
+                if node.text:
+                    # The element starts where its first text is; leading breaks move it to the next page
+                    if start is None:
+                        start = self.page
+                    self._after_explicit_break = False
+            elif tag == W + "lastRenderedPageBreak":
+                if self._after_explicit_break:
+                    self._after_explicit_break = False
+                else:
+                    self.page += 1
+            elif _is_explicit_page_break(node):
+                self.page += 1
+                self._after_explicit_break = True
+        start = self.page if start is None else start
+        if section_breaks:
+            self.page += section_breaks
+            self._after_explicit_break = True
+        return start
+
+
+def docx_blocks_in_range(blocks, page_range, element_of=None):
+    """
+    Yield the body-level DOCX `blocks` (paragraphs and tables, in document order) that start on a page
+    of the zero-based, half-open `page_range`, counting pages with DocxPageCounter.
+    Stops at the first block past the range, so the rest of the body is never read.
+
+    :param element_of: Callable returning the XML element of a block; blocks are elements by default.
+    """
+    start, stop = page_range
+    counter = DocxPageCounter()
+    for block in blocks:
+        page = counter.advance(element_of(block) if element_of else block)
+        if page >= stop:
+            return
+        if page >= start:
+            yield block
+
+
+def docx_image_rel_ids(element):
+    """Relationship ids of the pictures placed in a DOCX paragraph or table."""
+    return [blip.get(R + "embed") for blip in element.iter(A + "blip") if blip.get(R + "embed")]
+
+
+def _is_explicit_page_break(node):
+    tag = node.tag
+    if tag == W + "br":
+        return node.get(W + "type") == "page"
+    if tag == W + "pageBreakBefore":
+        return node.get(W + "val", "true") not in ("false", "0", "off")
+    return False
+
+
+def _child_text(element, tag):
+    if element is None:
+        return ""
+    child = element.find(tag)
+    return child.text or "" if child is not None else ""
+
+
+def _parse_w3cdtf(value, utc):
+    """Parse a W3CDTF timestamp the way python-docx/python-pptx core properties do; None when invalid."""
+    if not value:
+        return None
+    parsed = None
+    for template in ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%d", "%Y-%m", "%Y"):
+        try:
+            parsed = dt.datetime.strptime(value[:19], template)
+        except ValueError:
+            continue
+    if parsed is None:
+        return None
+    offset = value[19:]
+    if len(offset) == 6:
+        if offset[0] not in "+-" or offset[3] != ":" or not (offset[1:3] + offset[4:]).isdigit():
+            return None
+        delta = dt.timedelta(hours=int(offset[1:3]), minutes=int(offset[4:]))
+        parsed = parsed - delta if offset[0] == "+" else parsed + delta
+    return parsed.replace(tzinfo=dt.timezone.utc) if utc else parsed
+
+
+def _docx_run_text(run):
+    # Same translation of run content as python-docx's Run.text
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == W + "t":
+            parts.append(child.text or "")
+        elif tag == W + "tab" or tag == W + "ptab":
+            parts.append("\t")
+        elif tag == W + "br":
+            # Only line breaks count as text; page and column breaks do not
+            if child.get(W + "type", "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag == W + "cr":
+            parts.append("\n")
+        elif tag == W + "noBreakHyphen":
+            parts.append("-")
+    return "".join(parts)
+
+
+def _docx_paragraph_text(paragraph):
+    # Runs directly in the paragraph, plus the runs of its hyperlinks, like Paragraph.text
+    parts = []
+    for child in paragraph:
+        if child.tag == W + "r":
+            parts.append(_docx_run_text(child))
+        elif child.tag == W + "hyperlink":
+            parts.extend(_docx_run_text(run) for run in child.findall(W + "r"))
+    return "".join(parts)
+
+
+def _grid_value(properties, tag, default):
+    element = properties.find(tag) if properties is not None else None
+    if element is None:
+        return default
+    return element.get(W + "val", default)
+
+
+def _continues_merge(properties):
+    # A bare <w:vMerge/> continues the vertical merge above it, like w:val="continue"
+    merge = properties.find(W + "vMerge") if properties is not None else None
+    return merge is not None and merge.get(W + "val", "continue") == "continue"
+
+
+def _docx_table(table):
+    """
+    Rows of cell texts, with a horizontally spanned cell repeated for every grid column it covers
+    and a vertically merged cell repeating the text of the cell it continues, like _Row.cells.
+    """
+    rows = []
+    cells_above = {}
+    for row in table.findall(W + "tr"):
+        grid_offset = int(_grid_value(row.find(W + "trPr"), W + "gridBefore", 0))
+        texts = []
+        cells = {}
+        for cell in row.findall(W + "tc"):
+            properties = cell.find(W + "tcPr")
+            grid_span = int(_grid_value(properties, W + "gridSpan", 1))
+            if _continues_merge(properties) and grid_offset in cells_above:
+                text, span = cells_above[grid_offset]
+            else:
+                text = "\n".join(_docx_paragraph_text(paragraph) for paragraph in cell.findall(W + "p")).strip()
+                span = grid_span
+            texts.extend([text] * span)
+            cells[grid_offset] = (text, span)
+            grid_offset += grid_span
+        rows.append(texts)
+        cells_above = cells
+    return rows
+
+
+def _pptx_text_body(text_body):
+    # Paragraphs joined by newlines and line breaks as vertical tabs, like TextFrame.text
+    if text_body is None:
+        return ""
+    paragraphs = []
+    for paragraph in text_body.findall(A + "p"):
+        parts = []
+        for child in paragraph:
+            if child.tag == A + "r" or child.tag == A + "fld":
+                text = child.find(A + "t")
+                parts.append(text.text or "" if text is not None else "")
+            elif child.tag == A + "br":
+                parts.append("\v")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs)
+
+
+def _picture_image_rel(picture):
+    # Movies are pictures with a video file; python-pptx gives them no `image`
+    if picture.find(f"{P}nvPicPr/{P}nvPr/{A}videoFile") is not None:
+        return None
+    blip = picture.find(f"{P}blipFill/{A}blip")
+    return blip.get(R + "embed") if blip is not None else None
+
+
+def _pptx_table(table):
+    if table is None:
+        return []
+    return [[_pptx_text_body(cell.find(A + "txBody")).strip() for cell in row.findall(A + "tc")]
+            for row in table.findall(A + "tr")]
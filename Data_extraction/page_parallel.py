@@ -0,0 +1,136 @@
+from metrics import Metrics
+
+# Recorded by the parent extractor over the merged result, so left out of the reports of the page ranges
+PARENT_COUNTERS = ("files", "bytes_read", "pages", "text_chunks", "images", "tables")
+PARENT_STAGES = ("extract.text", "extract.metadata", "extract.pages", "extract.links", "extract.images",
+                 "extract.tables")
+
+
+def _extract_page_range(file_path, page_range, pdf_engine, include_image_bytes, artifacts=None, ocr=None,
+                        limits=None, collect_metrics=False, document=None):
+    """
+    Extract the selected artifacts (text, metadata, links, images, tables) from one page range in
+    a worker process. The worker opens its own handles, so nothing but the file path crosses the
+    process boundary. Artifacts that were not selected come back empty. With `ocr`, the worker
+    OCRs its own pages without a text layer.
+
+    :param limits: Optional ResourceLimits checked on this range; the image bytes it extracted are
+                   returned under 'image_bytes', so the parent checks the total of the document.
+    :param collect_metrics: Return the stage timings and counters of the range (OCR, table detection) under
+                            'metrics', a Metrics report for the parent to merge, since a Metrics object cannot
+                            cross processes.
+    :param document: Optional ParsedDocument to extract from in the calling process; it is left open.
+    """
+    # Imported here to avoid a circular import between the extractor and this module
+    from Data_extraction.file_extractor import FileDataExtractor
+
+    metrics = Metrics() if collect_metrics else None
+    extractor = FileDataExtractor(file_path, document=document, pdf_engine=pdf_engine, page_range=page_range,
+                                  include_image_bytes=include_image_bytes, artifacts=artifacts, ocr=ocr,
+                                  limits=limits, metrics=metrics)
+    try:
+        if extractor.wants("text"):
+            text, metadata = extractor.extract_text()
+        else:
+            text, metadata = "", extractor.extract_metadata()
+        # ImageRecords pickle their bytes and come back to the parent process as memoryviews again
+        result = {
+            "text": text,
+            "metadata": metadata,
+            "links": extractor.extract_links() if extractor.wants("links") else [],
+            "images": extractor.extract_images() if extractor.wants("images") else [],
+            "tables": extractor.extract_tables() if extractor.wants("tables") else [],
+            "image_bytes": extractor._image_bytes,
+        }
+    finally:
+        if document is None:
+            extractor.close()
+    if metrics is not None:
+        result["metrics"] = metrics.report()
+        for name in PARENT_COUNTERS:
+            result["metrics"]["counters"].pop(name, None)
+        for stage in PARENT_STAGES:
+            result["metrics"]["stages"].pop(stage, None)
+    return result
+
+
+class PageParallelExtractor:
+    """
+    Extracts a single PDF by splitting it into page ranges handled by worker processes.
+
+    Each worker opens its own handles on the file and extracts one range of pages. The partial
+    results are merged back in page order, so text, links, images and tables come out exactly
+    as a serial extraction would produce them, including their locations.
+
+    Methods:
+        run(): Extracts all page ranges (once) and returns the merged results.
+    """
+
+    DEFAULT_PAGES_PER_CHUNK = 25
+
+    def __init__(self, extractor, workers, pages_per_chunk=DEFAULT_PAGES_PER_CHUNK):
+        """
+        :param extractor: The FileDataExtractor of the PDF being extracted.
+        :param workers: Number of worker processes.
+        :param pages_per_chunk: Number of pages in each range handed to a worker.
+        """
+        self.extractor = extractor
+        self.workers = workers
+        self.pages_per_chunk = max(1, pages_per_chunk)
+        self._result = None
+
+    def run(self):
+        """Return a dict with 'text', 'metadata', 'links', 'images' and 'tables' for the whole PDF."""
+        if self._result is None:
+            self._result = self._merge(self._extract_chunks())
+        return self._result
+
+    def page_ranges(self):
+        """Split the document into consecutive (start, stop) page ranges."""
+        page_count = len(self.extractor.document.fitz_doc)
+        return [(start, min(start + self.pages_per_chunk, page_count))
+                for start in range(0, page_count, self.pages_per_chunk)]
+
+    def _extract_chunks(self):
+        ranges = self.page_ranges()
+        file_path = self.extractor.file_path
+        pdf_engine = self.extractor.pdf_engine
+        include_image_bytes = self.extractor.include_image_bytes
+        artifacts = self.extractor.artifacts
+        ocr = self.extractor.ocr
+        limits = self.extractor.limits
+        collect_metrics = self.extractor.metrics.enabled
+
+        # Not worth starting processes for a document that fits in a single chunk: it is extracted
+        # here, from the document the parent already parsed
+        if len(ranges) <= 1:
+            return [_extract_page_range(file_path, page_range, pdf_engine, include_image_bytes, artifacts, ocr,
+                                        limits, collect_metrics, self.extractor.document)
+                    for page_range in ranges]
+
+        # Imported here: process pools are only needed by documents spanning several chunks
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(ranges))) as executor:
+            # map() yields results in submission order, which is page order
+            return list(executor.map(_extract_page_range, [file_path] * len(ranges), ranges,
+                                     [pdf_engine] * len(ranges), [include_image_bytes] * len(ranges),
+                                     [artifacts] * len(ranges), [ocr.serial() if ocr else None] * len(ranges),
+                                     [limits] * len(ranges), [collect_metrics] * len(ranges)))
+
+    def _merge(self, chunks):
+        result = {
+            "text": "".join(chunk["text"] for chunk in chunks),
+            "metadata": chunks[0]["metadata"] if chunks else {},
+            "links": [],
+            "images": [],
+            "tables": [],
+        }
+        for chunk in chunks:
+            result["links"].extend(chunk["links"])
+            result["images"].extend(chunk["images"])
+            result["tables"].extend(chunk["tables"])
+            if "metrics" in chunk:
+                self.extractor.metrics.merge(chunk["metrics"])
+        # Every worker only checked the image bytes of its own pages against the limits
+        self.extractor._count_image_bytes(sum(chunk["image_bytes"] for chunk in chunks))
+        return result
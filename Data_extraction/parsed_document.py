@@ -0,0 +1,237 @@
+import io
+import os
+import re
+import mmap
+import hashlib
+import zipfile
+
+# The format backends (PyMuPDF, pdfplumber, PyPDF2, python-docx, python-pptx) are imported by the
+# property that first needs them: a DOCX job never pays for loading the PDF stacks, and vice versa.
+
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(file_path):
+    """Return the SHA-256 hex digest of the file contents."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(READ_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def buffer_bytes(data):
+    """
+    Return `data` as bytes, without copying when it is a memoryview spanning a whole bytes
+    object (what the extractor hands out for image payloads). Other views are copied.
+    """
+    if isinstance(data, memoryview):
+        if isinstance(data.obj, bytes) and data.nbytes == len(data.obj):
+            return data.obj
+        return data.tobytes()
+    return data
+
+
+class MappedFile(io.RawIOBase):
+    """
+    Read-only file object over a shared memory map.
+
+    Every parser gets its own MappedFile, so each keeps an independent position while all of them
+    read the same mapping; reads copy only the bytes requested, never the whole file.
+    """
+
+    def __init__(self, buffer):
+        """
+        :param buffer: memoryview of the mapped file.
+        """
+        self._buffer = buffer
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._buffer)
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset}")
+        self._position = offset
+        return self._position
+
+    def read(self, size=-1):
+        end = len(self._buffer) if size is None or size < 0 else min(self._position + size, len(self._buffer))
+        data = self._buffer[self._position:end].tobytes() if end > self._position else b""
+        self._position = max(self._position, end)
+        return data
+
+    def readall(self):
+        return self.read()
+
+    def readinto(self, target):
+        data = self.read(len(target))
+        target[:len(data)] = data
+        return len(data)
+
+
+class ParsedDocument:
+    """
+    Holds the parsed handles of a single PDF, DOCX or PPTX file.
+
+    Every handle is opened the first time it is requested and then cached, so the loader,
+    the extractor and the storage backends all share one parse of the file instead of
+    re-opening it for every step. The file is memory-mapped once; PyPDF2, pdfplumber, the zip
+    archive and the python-docx/python-pptx packages read from that mapping through MappedFile
+    objects instead of opening the file again.
+
+    Properties:
+        pdf_reader: PyPDF2 reader (text and metadata of PDF files).
+        fitz_doc: PyMuPDF document (images and links of PDF files).
+        plumber_pdf: pdfplumber document (tables of PDF files).
+        docx: python-docx Document.
+        presentation: python-pptx Presentation.
+        archive: zipfile.ZipFile of a DOCX or PPTX file.
+        buffer: Read-only memoryview of the mapped file.
+        content_hash: SHA-256 of the file bytes.
+        file_size: Size of the file in bytes.
+        page_count: Number of pages (PDF, DOCX when recorded by the editor) or slides (PPTX).
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.file_extension = os.path.splitext(file_path)[1].lower()
+        self._mmap = None
+        self._buffer = None
+        self._pdf_reader = None
+        self._fitz_doc = None
+        self._plumber_pdf = None
+        self._docx = None
+        self._presentation = None
+        self._archive = None
+        self._content_hash = None
+
+    @property
+    def buffer(self):
+        """The whole file as a read-only memoryview, mapped on first use and shared by every parser."""
+        if self._buffer is None:
+            with open(self.file_path, "rb") as file:
+                if os.fstat(file.fileno()).st_size == 0:
+                    # Empty files cannot be mapped; the parsers then fail on them as before
+                    self._buffer = memoryview(b"")
+                else:
+                    # The mapping stays valid after the file descriptor is closed
+                    self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                    self._buffer = memoryview(self._mmap)
+        return self._buffer
+
+    def open_stream(self):
+        """Return a new file object over the mapped file, with its own read position."""
+        return MappedFile(self.buffer)
+
+    @property
+    def content_hash(self):
+        if self._content_hash is None:
+            # Hashing the mapping reads the file once, without chunk copies
+            self._content_hash = hashlib.sha256(self.buffer).hexdigest()
+        return self._content_hash
+
+    @property
+    def file_size(self):
+        return os.path.getsize(self.file_path)
+
+    @property
+    def page_count(self):
+        if self.file_extension == '.pdf':
+            return len(self.fitz_doc)
+        # For OOXML files the count is read from the zip directly, without building the object model
+        archive = self.archive
+        if self.file_extension == '.pptx':
+            return sum(1 for name in archive.namelist() if re.fullmatch(r"ppt/slides/slide\d+\.xml", name))
+        if self.file_extension == '.docx' and "docProps/app.xml" in archive.namelist():
+            # Word records the page count of the last save in the extended properties
+            match = re.search(rb"<Pages>(\d+)</Pages>", archive.read("docProps/app.xml"))
+            return int(match.group(1)) if match else None
+        return None
+
+    @property
+    def archive(self):
+        """The raw zip archive of a DOCX or PPTX file, for reading individual parts."""
+        if self._archive is None:
+            self._archive = zipfile.ZipFile(self.open_stream())
+        return self._archive
+
+    @property
+    def pdf_reader(self):
+        if self._pdf_reader is None:
+            # PdfReader reads lazily, so the mapping must stay open as long as the reader
+            from PyPDF2 import PdfReader
+            self._pdf_reader = PdfReader(self.open_stream())
+        return self._pdf_reader
+
+    @property
+    def fitz_doc(self):
+        if self._fitz_doc is None:
+            import fitz  # PyMuPDF for PDF handling
+            # MuPDF does its own buffered file I/O; opening it from Python memory would make it copy the file
+            self._fitz_doc = fitz.open(self.file_path)
+        return self._fitz_doc
+
+    @property
+    def plumber_pdf(self):
+        if self._plumber_pdf is None:
+            import pdfplumber
+            self._plumber_pdf = pdfplumber.open(self.open_stream())
+        return self._plumber_pdf
+
+    @property
+    def docx(self):
+        if self._docx is None:
+            from docx import Document
+            self._docx = Document(self.open_stream())
+        return self._docx
+
+    @property
+    def presentation(self):
+        if self._presentation is None:
+            from pptx import Presentation
+            self._presentation = Presentation(self.open_stream())
+        return self._presentation
+
+    def close(self):
+        """Close every handle that was opened and drop the cached parses."""
+        if self._fitz_doc is not None:
+            self._fitz_doc.close()
+        if self._plumber_pdf is not None:
+            self._plumber_pdf.close()
+        if self._archive is not None:
+            self._archive.close()
+        if self._buffer is not None:
+            self._buffer.release()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # A parser still holds a view into the mapping; it is unmapped once that view is freed
+                pass
+        self._mmap = None
+        self._buffer = None
+        self._pdf_reader = None
+        self._fitz_doc = None
+        self._plumber_pdf = None
+        self._docx = None
+        self._presentation = None
+        self._archive = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,196 @@
+import re
+import datetime as dt
+from Data_extraction.records import TableRecord
+
+# PDF date strings, D:YYYYMMDDHHmmSSOHH'mm', with every part after the year optional (PDF 1.7, 7.9.4)
+PDF_DATE = re.compile(r"(?:D:)?(\d{4})(\d{2})?(\d{2})?(\d{2})?(\d{2})?(\d{2})?(?:([Zz+-])(\d{2})?'?(\d{2})?'?)?")
+
+
+def parse_pdf_date(value):
+    """
+    Convert a PDF date string ("D:20241013231411-07'00'") into a datetime, timezone-aware when the
+    string has an offset, like the DOCX/PPTX core properties. Missing or malformed dates give "".
+    """
+    match = PDF_DATE.match(value or "")
+    if match is None:
+        return ""
+    year, month, day, hour, minute, second, sign, offset_hours, offset_minutes = match.groups()
+    tzinfo = None
+    if sign in ("Z", "z"):
+        tzinfo = dt.timezone.utc
+    elif sign:
+        offset = dt.timedelta(hours=int(offset_hours or 0), minutes=int(offset_minutes or 0))
+        tzinfo = dt.timezone(offset if sign == "+" else -offset)
+    try:
+        return dt.datetime(int(year), int(month or 1), int(day or 1), int(hour or 0), int(minute or 0),
+                           int(second or 0), tzinfo=tzinfo)
+    except ValueError:
+        return ""
+
+
+class SinglePassPDFEngine:
+    """
+    Extracts text, metadata, links, images and tables from a PDF in one walk over its pages.
+
+    Every page is visited once through PyMuPDF. pdfplumber, which is by far the slowest part
+    of PDF extraction, is only run on pages where a cheap ruling-line or text-grid heuristic
+    says a table is likely. The walk honours the extractor's `page_range` and stops early once its
+    `max_chars`/`max_tables` budgets are met and no links or images are selected.
+
+    Methods:
+        run(): Walks the document (once) and returns the collected results.
+    """
+
+    # A page needs rulings at this many distinct y positions and x positions to look like a table;
+    # a border or a couple of boxes are not enough on their own
+    MIN_RULING_LINES = 3
+    # Rectangles at least this share of the page wide are header/footer bars or page borders, not cells
+    PAGE_WIDE_RATIO = 0.9
+    # A text grid needs this many consecutive lines sharing at least MIN_GRID_COLUMNS aligned word starts
+    MIN_GRID_ROWS = 3
+    MIN_GRID_COLUMNS = 3
+    # Tolerance (in points) used when deciding if a segment is straight or on which line a word sits
+    TOLERANCE = 2
+    # Distance (in points) within which word starts on different lines count as one column; table cells
+    # align almost exactly, while a wider window lets the random word starts of prose line up by chance
+    ALIGNMENT_TOLERANCE = 1
+
+    def __init__(self, extractor):
+        """
+        :param extractor: The FileDataExtractor whose parsed document and helpers are used.
+        """
+        self.extractor = extractor
+        self.document = extractor.document
+        self._result = None
+
+    def run(self):
+        """
+        Walk every page once and return a dict with 'text', 'metadata', 'links', 'images' and 'tables'.
+        The result is cached, so the extract_* methods can all call this without re-walking the file.
+        """
+        if self._result is None:
+            self._result = self._walk()
+        return self._result
+
+    def _walk(self):
+        doc = self.document.fitz_doc
+        extractor = self.extractor
+        metrics = extractor.metrics
+        wants = extractor.wants
+        page_texts, text_page_indexes, links, images, tables = [], [], [], [], []
+        chars = 0
+
+        for page_index in extractor._page_numbers(len(doc)):
+            collect_text = wants("text") and extractor._text_budget_left(chars)
+            collect_tables = wants("tables") and extractor._table_budget_left(len(tables))
+            if not (collect_text or collect_tables or wants("links") or wants("images")):
+                # Every budget is met: the remaining pages are never read
+                break
+            page = doc[page_index]
+            page_number = page_index + 1
+
+            # Artifacts that were not selected are skipped, not extracted and dropped
+            if collect_text:
+                page_texts.append(page.get_text())
+                text_page_indexes.append(page_index)
+                chars += len(page_texts[-1])
+            if wants("links"):
+                links.extend(extractor._extract_pdf_link(page, page_number))
+            if wants("images"):
+                for img in page.get_images(full=True):
+                    images.append(extractor._process_image("pdf", img, doc, page_number))
+
+            # Only hand the page to pdfplumber when it is likely to contain a table
+            if collect_tables and self._looks_like_table(page):
+                metrics.increment("table_candidate_pages")
+                with metrics.timer("extract.single_pass.pdfplumber"):
+                    plumber_page = self.document.plumber_pdf.pages[page_index]
+                    tables.extend(TableRecord.from_rows(table, page_number)
+                                  for table in plumber_page.extract_tables() or [])
+
+        if extractor.ocr is not None:
+            # Pages without a text layer are OCR'd once the walk is done, together in the OCR pool
+            empty = [page_index for page_index, text in zip(text_page_indexes, page_texts) if not text.strip()]
+            ocr_texts = extractor.ocr.recognize(doc, empty, metrics) if empty else {}
+            page_texts = [ocr_texts.get(page_index, text) for page_index, text in zip(text_page_indexes, page_texts)]
+
+        return {
+            # Page texts are joined without a separator, so cutting the joined text honours max_chars
+            "text": "".join(page_texts)[:extractor.max_chars],
+            "metadata": self._extract_metadata(doc.metadata or {}),
+            "links": links,
+            "images": images,
+            "tables": tables[:extractor.max_tables],
+        }
+
+    def _extract_metadata(self, metadata):
+        """Map PyMuPDF metadata onto the keys used by FileDataExtractor._extract_pdf_metadata()."""
+        return {
+            "author": metadata.get("author") or "",
+            "created": parse_pdf_date(metadata.get("creationDate")),
+            "last_modified_by": "",
+            "title": metadata.get("title") or "",
+        }
+
+    # --------------------------- Table Heuristics --------------------------- #
+
+    def _looks_like_table(self, page):
+        return self._has_ruling_lines(page) or self._has_text_grid(page)
+
+    def _has_ruling_lines(self, page):
+        """
+        Look for a grid of rulings: straight segments and cell rectangles at several distinct y and
+        x positions. Filled rectangles (shading, highlights) and page-wide ones (header and footer bars,
+        page borders) are ignored, except for hairline-thin filled ones: Word draws its table borders so.
+        """
+        rows, columns = set(), set()
+        page_wide = page.rect.width * self.PAGE_WIDE_RATIO
+        for drawing in page.get_drawings():
+            for item in drawing["items"]:
+                if item[0] == "l":
+                    start, end = item[1], item[2]
+                    if abs(start.y - end.y) <= self.TOLERANCE:
+                        rows.add(round(start.y / self.TOLERANCE))
+                    elif abs(start.x - end.x) <= self.TOLERANCE:
+                        columns.add(round(start.x / self.TOLERANCE))
+                elif item[0] == "re":
+                    rect = item[1]
+                    if drawing.get("fill") is not None:
+                        # A filled hairline is a ruling; the corner squares where two of them meet are not
+                        if rect.height <= self.TOLERANCE < rect.width:
+                            rows.add(round(rect.y0 / self.TOLERANCE))
+                        elif rect.width <= self.TOLERANCE < rect.height:
+                            columns.add(round(rect.x0 / self.TOLERANCE))
+                    elif rect.width < page_wide:
+                        # A rectangle contributes its top and bottom edges and its left and right edges
+                        rows.update((round(rect.y0 / self.TOLERANCE), round(rect.y1 / self.TOLERANCE)))
+                        columns.update((round(rect.x0 / self.TOLERANCE), round(rect.x1 / self.TOLERANCE)))
+                if len(rows) >= self.MIN_RULING_LINES and len(columns) >= self.MIN_RULING_LINES:
+                    return True
+        return False
+
+    def _has_text_grid(self, page):
+        """
+        Look for MIN_GRID_ROWS consecutive text lines whose words start at the same MIN_GRID_COLUMNS
+        x positions. The left margin, where every line of prose starts, does not count as a column.
+        """
+        # Group word start positions by baseline; table cells usually end up in separate text blocks,
+        # so grouping by PyMuPDF block/line numbers would split a table row apart
+        rows = {}
+        for word in page.get_text("words"):
+            x0, y0 = word[0], word[1]
+            rows.setdefault(round(y0 / self.TOLERANCE), []).append(x0)
+        if not rows:
+            return False
+        margin = min(min(starts) for starts in rows.values()) + self.TOLERANCE
+
+        lines = [starts for _, starts in sorted(rows.items())]
+        for index in range(len(lines) - self.MIN_GRID_ROWS + 1):
+            # Starts of the first line that every following line of the window repeats
+            aligned = [start for start in lines[index] if start > margin]
+            for starts in lines[index + 1:index + self.MIN_GRID_ROWS]:
+                aligned = [start for start in aligned
+                           if any(abs(start - other) <= self.ALIGNMENT_TOLERANCE for other in starts)]
+            if len(aligned) >= self.MIN_GRID_COLUMNS:
+                return True
+        return False
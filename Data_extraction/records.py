@@ -0,0 +1,207 @@
+from array import array
+from Data_extraction.parsed_document import buffer_bytes
+
+
+def _location_of(data):
+    """The (location, location_key) of a record or table dict; (None, None) when it has no location key."""
+    location_key = next((key for key in ("page_number", "slide_number") if key in data), None)
+    return (data[location_key] if location_key else None), location_key
+
+
+class Record:
+    """
+    Base of the compact records FileDataExtractor returns for links and images, in place of dicts.
+
+    Every record has a uniform `location`: the one-based page (PDF) or slide (PPTX) it was found on,
+    or None where the format has no page model (DOCX). `location_key` names the dict key the location
+    was reported under ('page_number' or 'slide_number', None when there was no such key), so code
+    written against the dicts keeps working: record['url'], record.get('slide_number') and
+    `'page_number' in record` read the record like the dict it replaces, and to_dict()/from_dict()
+    convert to and from that dict.
+
+    Methods:
+        to_dict(): The record in its original dict shape.
+        from_dict(data): Builds a record from that dict shape.
+        keys(), get(key, default), record[key]: Read-only dict access.
+    """
+
+    __slots__ = ()
+    # Dict keys of the record besides its location, in dict order; each one is an attribute of the same name
+    FIELDS = ()
+    # FIELDS the original dicts did not always have: left out of the dict while None
+    OPTIONAL_FIELDS = ()
+
+    def to_dict(self):
+        return {key: self[key] for key in self.keys()}
+
+    @classmethod
+    def from_dict(cls, data):
+        location, location_key = _location_of(data)
+        return cls(*(data.get(field) if field in cls.OPTIONAL_FIELDS else data[field] for field in cls.FIELDS),
+                   location=location, location_key=location_key)
+
+    def keys(self):
+        fields = tuple(field for field in self.FIELDS
+                       if field not in self.OPTIONAL_FIELDS or getattr(self, field) is not None)
+        return fields + ((self.location_key,) if self.location_key is not None else ())
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if key is not None and key == self.location_key:
+            return self.location
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # Pickled as constructor arguments: smaller and faster than the generic slots state
+        return type(self), tuple(getattr(self, field) for field in self.FIELDS) + (self.location, self.location_key)
+
+    def __repr__(self):
+        fields = ", ".join(f"{key}={self[key]!r}" for key in self.keys())
+        return f"{type(self).__name__}({fields})"
+
+
+class LinkRecord(Record):
+    """A hyperlink: its `url` and `location`."""
+
+    __slots__ = ("url", "location", "location_key")
+    FIELDS = ("url",)
+
+    def __init__(self, url, location=None, location_key="page_number"):
+        self.url = url
+        self.location = location
+        self.location_key = location_key
+
+
+class ImageRecord(Record):
+    """
+    An image: its bytes (`image`, a memoryview, or None when the extractor left them out), where to
+    fetch them from (`image_ref`), `image_format`, `image_resolution` ('WxH') and `location`.
+
+    Pickling sends the bytes behind the view, which memoryviews cannot do themselves; the unpickled
+    record wraps them in a memoryview again, so cached and worker results need no conversion.
+    """
+
+    __slots__ = ("image", "image_ref", "image_format", "image_resolution", "location", "location_key")
+    FIELDS = ("image", "image_ref", "image_format", "image_resolution")
+    # Image dicts only carried a reference once images could be extracted without their bytes
+    OPTIONAL_FIELDS = ("image_ref",)
+
+    def __init__(self, image, image_ref, image_format, image_resolution, location=None, location_key="page_number"):
+        self.image = memoryview(image) if isinstance(image, bytes) else image
+        self.image_ref = image_ref
+        self.image_format = image_format
+        self.image_resolution = image_resolution
+        self.location = location
+        self.location_key = location_key
+
+    def __reduce__(self):
+        image = buffer_bytes(self.image) if self.image is not None else None
+        return ImageRecord, (image, self.image_ref, self.image_format, self.image_resolution,
+                             self.location, self.location_key)
+
+
+class TableRecord:
+    """
+    A table stored as one flat tuple of cell values (`cells`) and an array of row offsets
+    (`row_offsets`, row i spanning cells[row_offsets[i]:row_offsets[i + 1]]), instead of one list per row.
+    Rows may be ragged, as extracted.
+
+    It reads like the list of rows it replaces: len(), iteration, indexing and slicing give rows as
+    lists, and it compares equal to that list. `location` and `location_key` work as on Record.
+
+    Methods:
+        from_rows(rows, location, location_key): Builds a table from a list of rows.
+        to_rows(): The table as a list of rows.
+        to_dict(): The rows under 'rows', plus the location under `location_key` as on Record.
+        from_dict(data): Builds a table from that dict, or from a plain list of rows.
+    """
+
+    __slots__ = ("cells", "row_offsets", "location", "location_key")
+
+    def __init__(self, cells, row_offsets, location=None, location_key="page_number"):
+        """
+        :param cells: Tuple of the cell values, row after row.
+        :param row_offsets: array('I') of the offsets in `cells` where each row starts, plus len(cells).
+        """
+        self.cells = cells
+        self.row_offsets = row_offsets
+        self.location = location
+        self.location_key = location_key
+
+    @classmethod
+    def from_rows(cls, rows, location=None, location_key="page_number"):
+        cells = []
+        row_offsets = array("I", [0])
+        for row in rows:
+            cells.extend(row)
+            row_offsets.append(len(cells))
+        return cls(tuple(cells), row_offsets, location, location_key)
+
+    def to_rows(self):
+        return list(self)
+
+    def to_dict(self):
+        data = {"rows": self.to_rows()}
+        if self.location_key is not None:
+            data[self.location_key] = self.location
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        if isinstance(data, list):
+            # Tables used to be plain lists of rows, without a location
+            return cls.from_rows(data, location_key=None)
+        location, location_key = _location_of(data)
+        return cls.from_rows(data["rows"], location, location_key)
+
+    def __len__(self):
+        return len(self.row_offsets) - 1
+
+    def __iter__(self):
+        cells, row_offsets = self.cells, self.row_offsets
+        for index in range(len(row_offsets) - 1):
+            yield list(cells[row_offsets[index]:row_offsets[index + 1]])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[row_index] for row_index in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("table row index out of range")
+        return list(self.cells[self.row_offsets[index]:self.row_offsets[index + 1]])
+
+    def __eq__(self, other):
+        if isinstance(other, TableRecord):
+            return self.cells == other.cells and self.row_offsets == other.row_offsets \
+                and self.location == other.location
+        if isinstance(other, list):
+            return self.to_rows() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return TableRecord, (self.cells, self.row_offsets, self.location, self.location_key)
+
+    def __repr__(self):
+        return f"TableRecord({self.to_rows()!r}, location={self.location!r})"
@@ -0,0 +1,143 @@
+import os
+import glob
+import pickle
+import hashlib
+from Data_extraction.parsed_document import file_digest
+
+try:
+    import fcntl
+except ImportError:  # Windows: the size total is updated without a lock, and recounted at every eviction
+    fcntl = None
+
+
+class ExtractionCache:
+    """
+    On-disk cache of extraction results, keyed by the file's content hash and the extractor config.
+
+    Entries are stored as pickles under `cache_dir/<digest[:2]>/<digest>-<config>.pkl`. A cache hit
+    refreshes the entry's modification time, and when the cache grows beyond `max_bytes` the least
+    recently used entries are evicted first. Because the key is derived from the file bytes, a
+    renamed or touched but unchanged file is still a hit, while any edit is a miss.
+
+    The total size of the entries is kept in `cache_dir/size`, shared by every process using the
+    cache, so a put() only lists the directory when that total crosses `max_bytes`.
+
+    Methods:
+        key(file_path, config): Builds the cache key for a file and extractor config.
+        get(key): Returns the cached data dict, or None on a miss.
+        put(key, data): Stores a data dict and evicts old entries if needed.
+        invalidate(file_path): Drops every cached entry for the file's current contents.
+        clear(): Empties the cache.
+    """
+
+    DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GiB
+    SIZE_FILE = "size"
+
+    def __init__(self, cache_dir="./.extraction_cache", max_bytes=DEFAULT_MAX_BYTES):
+        """
+        :param cache_dir: Directory holding the cache entries; created if missing.
+        :param max_bytes: Total size above which least recently used entries are evicted.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, file_path, config, digest=None):
+        """
+        :param file_path: File whose contents identify the entry.
+        :param config: Dict of extractor settings that change the output (including its version).
+        :param digest: SHA-256 of the file when the caller already computed it.
+        """
+        config_digest = hashlib.sha256(repr(sorted(config.items())).encode("utf-8")).hexdigest()[:16]
+        return f"{digest or file_digest(file_path)}-{config_digest}"
+
+    def get(self, key):
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "rb") as entry:
+                data = pickle.load(entry)
+            os.utime(entry_path)  # Mark the entry as recently used
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        return data
+
+    def put(self, key, data):
+        entry_path = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+
+        # ImageRecords pickle the bytes behind their memoryviews (see ImageRecord)
+        # Write to a temporary file first so concurrent readers never see a partial entry
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as entry:
+            pickle.dump(data, entry, protocol=pickle.HIGHEST_PROTOCOL)
+        size = os.path.getsize(temp_path)
+        try:
+            size -= os.path.getsize(entry_path)  # Replacing an entry only adds the difference
+        except FileNotFoundError:
+            pass
+        os.replace(temp_path, entry_path)
+
+        self._add_to_total(size)
+
+    def invalidate(self, file_path):
+        """Remove the cached entries (for every config) of the file's current contents."""
+        digest = file_digest(file_path)
+        for entry_path in glob.glob(os.path.join(self.cache_dir, digest[:2], f"{digest}-*.pkl")):
+            self._remove(entry_path)
+        # The total is recounted by the next put()
+        self._remove(self._size_path())
+
+    def clear(self):
+        for entry_path, _, _ in self._entries():
+            self._remove(entry_path)
+        self._remove(self._size_path())
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pkl")
+
+    def _size_path(self):
+        return os.path.join(self.cache_dir, self.SIZE_FILE)
+
+    def _add_to_total(self, size):
+        """
+        Add `size` bytes to the total in the size file. The entries are only listed when there is
+        no total yet, or when it crosses `max_bytes`: they are then evicted and the total recounted.
+        """
+        with open(os.open(self._size_path(), os.O_RDWR | os.O_CREAT), "r+") as size_file:
+            if fcntl is not None:
+                fcntl.flock(size_file, fcntl.LOCK_EX)  # Released when the file is closed
+            recorded = size_file.read().strip()
+            total = int(recorded) + size if recorded.isdigit() else None
+            if total is None or total > self.max_bytes:
+                total = self._evict()
+            size_file.seek(0)
+            size_file.truncate()
+            size_file.write(str(total))
+
+    def _entries(self):
+        entries = []
+        for entry_path in glob.glob(os.path.join(self.cache_dir, "*", "*.pkl")):
+            try:
+                stat = os.stat(entry_path)
+            except FileNotFoundError:
+                continue  # Removed by another process in the meantime
+            entries.append((entry_path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        """Remove the least recently used entries until the cache fits in `max_bytes`; return its size."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        # Oldest modification time first: get() refreshes it, so this is least recently used
+        for entry_path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            if total <= self.max_bytes:
+                break
+            self._remove(entry_path)
+            total -= size
+        return total
+
+    def _remove(self, entry_path):
+        try:
+            os.remove(entry_path)
+        except FileNotFoundError:
+            pass
@@ -1,52 +1,68 @@
 import os
-import docx
-import PyPDF2
-from pptx import Presentation
+from Data_extraction.parsed_document import ParsedDocument
+from metrics import NULL_METRICS
 
 class FileLoader:
     @staticmethod
-    def load_file(file_path):
+    def load_file(file_path, document=None, metrics=NULL_METRICS):
+        """
+        Load the text content of a PDF, DOCX or PPTX file.
+
+        :param file_path: Path of the file to load.
+        :param document: Optional ParsedDocument already opened for this file. Passing the
+                         extractor's document lets the loader reuse its parse instead of
+                         opening the file again.
+        :param metrics: Optional Metrics; the load is timed as the 'load.text' stage.
+        """
+        with metrics.timer("load.text"):
+            content = FileLoader._load_text(file_path, document)
+        metrics.increment("text_chars", len(content))
+        return content
+
+    @staticmethod
+    def _load_text(file_path, document):
         file_extension = os.path.splitext(file_path)[1].lower()
+        if document is not None:
+            return FileLoader._read_text(file_extension, document)
+        # A document opened here is not shared with anyone, so it is closed once read
+        document = ParsedDocument(file_path)
+        try:
+            return FileLoader._read_text(file_extension, document)
+        finally:
+            document.close()
 
+    @staticmethod
+    def _read_text(file_extension, document):
         try:
             # Check if the file is a PDF
             if file_extension == '.pdf':
                 # Load and extract content from PDF
-                with open(file_path, 'rb') as file:
-                    reader = PyPDF2.PdfReader(file)
-                    content = ""
+                reader = document.pdf_reader
 
-                    # Check if the PDF is encrypted
-                    if reader.is_encrypted:
-                        if reader.decrypt("") == 0:
-                            return "Error loading PDF: The file is password-protected."
+                # Check if the PDF is encrypted
+                if reader.is_encrypted:
+                    if reader.decrypt("") == 0:
+                        return "Error loading PDF: The file is password-protected."
 
-                    # Extract text from each page
-                    for page in range(len(reader.pages)):
-                        content += reader.pages[page].extract_text()
-
-                return content
+                # Extract text from each page; joining once avoids quadratic string concatenation
+                return "".join(page.extract_text() for page in reader.pages)
 
             # Check if the file is a DOCX
             elif file_extension == '.docx':
                 # Load and extract content from DOCX
-                doc = docx.Document(file_path)
+                doc = document.docx
                 content = "\n".join([para.text for para in doc.paragraphs])
                 return content
 
             # Check if the file is a PPTX
             elif file_extension == '.pptx':
                 # Load and extract content from PPTX
-                presentation = Presentation(file_path)
-                content = ""
+                presentation = document.presentation
 
                 # Extract text from each slide
-                for slide in presentation.slides:
-                    for shape in slide.shapes:
-                        if hasattr(shape, "text"):
-                            content += shape.text + "\n"
-
-                return content
+                return "".join(shape.text + "\n"
+                               for slide in presentation.slides
+                               for shape in slide.shapes if hasattr(shape, "text"))
 
             else:
                 return "Unsupported file format."
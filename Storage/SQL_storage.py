@@ -1,144 +1,523 @@
-import mysql.connector
-from abc import ABC, abstractmethod
-import os
-from dotenv import load_dotenv
-
-import mysql.connector
 from abc import ABC, abstractmethod
+from itertools import islice
 import os
+import threading
 from dotenv import load_dotenv
+from Storage.blob_store import blob_digest
+from Data_extraction.parsed_document import buffer_bytes
+from metrics import timed
 
 class MySQLStorage():
-    table_name = 1
-    def __init__(self, extractor):
+    # Connection pools shared by every MySQLStorage instance of this process, keyed by connection settings
+    _pools = {}
+    # (pool name, table layout) pairs whose tables were already created by this process
+    _schema_ready = set()
+    # Serialises pool creation and the DDL between the threads of one process (pipeline storage workers)
+    _schema_lock = threading.Lock()
+    DEFAULT_POOL_SIZE = 5
+    DEFAULT_BATCH_SIZE = 500
+    # "per_table" creates one extracted_table_<document id>_<table index> per extracted table, "normalized" stores
+    # every table in the shared extracted_tables / extracted_table_cells tables
+    TABLE_LAYOUTS = ("per_table", "normalized")
+
+    def __init__(self, extractor, batch_size=DEFAULT_BATCH_SIZE, pool_size=DEFAULT_POOL_SIZE,
+                 table_layout="per_table", dedupe_images=False, metrics=None):
         """
         Initialize MySQLStorage with an extractor and create necessary database tables.
 
         :param extractor: An instance of the data extractor.
+        :param batch_size: Number of rows sent per executemany() round trip.
+        :param pool_size: Size of the connection pool shared by all instances in this process.
+        :param table_layout: How extracted tables are stored, one of TABLE_LAYOUTS.
+        :param dedupe_images: Store each distinct image once in image_blobs, keyed by its SHA-256;
+                              extracted_images rows then only reference it by content_hash.
+        :param metrics: Optional Metrics for insert timings and row counts; defaults to the extractor's.
         """
+        if table_layout not in self.TABLE_LAYOUTS:
+            raise ValueError(f"Unknown table layout '{table_layout}'. Expected one of: {', '.join(self.TABLE_LAYOUTS)}.")
         load_dotenv()
         
         self.extractor = extractor
-        self.conn = mysql.connector.connect(
-            host= os.getenv('DB_HOST'),
-            user= os.getenv('DB_USER'),
-            password= os.getenv('DB_PASSWORD'),
-            database= os.getenv('DB_DATABASE'),  # MySQL database name
-            auth_plugin='mysql_native_password'  # Use the native authentication plugin
-        )
+        self.metrics = metrics or extractor.metrics
+        self.batch_size = batch_size
+        self.table_layout = table_layout
+        self.dedupe_images = dedupe_images
+        self.document_id = None
+        # Image hashes already known to be in image_blobs while saving this document
+        self._stored_blobs = set()
+        # Borrow a connection from the pool instead of opening a new one for every document
+        self.pool = self._get_pool(pool_size)
+        self.conn = self.pool.get_connection()
         self.cursor = self.conn.cursor()  # Create a cursor to interact with the database
-        self.create_tables()  # Create tables if they don't exist
+
+        # Run the DDL only once per process and layout. Tables are created complete with
+        # CREATE TABLE IF NOT EXISTS, and upgrades of older tables tolerate a concurrent worker
+        # having applied them first, so workers in other processes can race on it
+        schema_key = (self.pool.pool_name, self.table_layout)
+        with MySQLStorage._schema_lock:
+            if schema_key not in MySQLStorage._schema_ready:
+                self.create_tables()  # Create tables if they don't exist
+                MySQLStorage._schema_ready.add(schema_key)
+
+    @classmethod
+    def _get_pool(cls, pool_size):
+        config = {
+            'host': os.getenv('DB_HOST'),
+            'user': os.getenv('DB_USER'),
+            'password': os.getenv('DB_PASSWORD'),
+            'database': os.getenv('DB_DATABASE'),  # MySQL database name
+            'auth_plugin': 'mysql_native_password'  # Use the native authentication plugin
+        }
+        pool_key = tuple(sorted(config.items()))
+        with cls._schema_lock:
+            if pool_key not in cls._pools:
+                # The driver is only imported once SQL storage is actually used
+                import mysql.connector.pooling
+                cls._pools[pool_key] = mysql.connector.pooling.MySQLConnectionPool(
+                    pool_name=f"extractor_pool_{len(cls._pools) + 1}",
+                    pool_size=pool_size,
+                    **config
+                )
+            return cls._pools[pool_key]
 
     def create_tables(self):
         """
         Create tables for storing extracted text, links, images, and tables in the MySQL database.
         The tables are created if they do not already exist.
+
+        Every artifact row references its documents row, so one file's output can be queried
+        or deleted through the (document_id, page_number) indexes instead of a full scan.
         """
-        self.cursor.execute('''CREATE TABLE IF NOT EXISTS extracted_text (content TEXT)''')
-        self.cursor.execute('''CREATE TABLE IF NOT EXISTS extracted_links (link TEXT, page_number INTEGER)''')
-        self.cursor.execute('''CREATE TABLE IF NOT EXISTS extracted_images (image LONGBLOB, image_format TEXT, resolution TEXT, page_number INTEGER)''')
+        self.cursor.execute('''CREATE TABLE IF NOT EXISTS documents (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            file_path VARCHAR(760) NOT NULL,
+            content_hash CHAR(64) NOT NULL,
+            file_type VARCHAR(16),
+            file_size BIGINT,
+            page_count INTEGER,
+            extracted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY uq_documents_file_path (file_path),
+            KEY idx_documents_content_hash (content_hash)
+        )''')
+        self.cursor.execute('''CREATE TABLE IF NOT EXISTS extracted_text (
+            content TEXT,
+            document_id BIGINT,
+            page_number INTEGER,
+            KEY idx_extracted_text_document_page (document_id, page_number)
+        )''')
+        self.cursor.execute('''CREATE TABLE IF NOT EXISTS extracted_links (
+            link TEXT,
+            page_number INTEGER,
+            document_id BIGINT,
+            KEY idx_extracted_links_document_page (document_id, page_number)
+        )''')
+        self.cursor.execute('''CREATE TABLE IF NOT EXISTS extracted_images (
+            image LONGBLOB,
+            image_format TEXT,
+            resolution TEXT,
+            page_number INTEGER,
+            document_id BIGINT,
+            content_hash CHAR(64),
+            KEY idx_extracted_images_document_page (document_id, page_number)
+        )''')
+        self.cursor.execute('''CREATE TABLE IF NOT EXISTS image_blobs (
+            content_hash CHAR(64) PRIMARY KEY,
+            image LONGBLOB NOT NULL,
+            image_format TEXT,
+            resolution TEXT,
+            byte_size BIGINT
+        )''')
+        # The extracted_table_<document id>_<table index> tables of the per_table layout, by document
+        self.cursor.execute('''CREATE TABLE IF NOT EXISTS document_tables (
+            document_id BIGINT NOT NULL,
+            table_name VARCHAR(64) NOT NULL,
+            PRIMARY KEY (document_id, table_name),
+            FOREIGN KEY (document_id) REFERENCES documents (id) ON DELETE CASCADE
+        )''')
+
+        # Tables created before documents were tracked are upgraded in place; for tables created above
+        # the columns and indexes already exist, so nothing is altered
+        for table in ('extracted_text', 'extracted_links', 'extracted_images'):
+            self._ensure_column(table, 'document_id', 'BIGINT')
+            self._ensure_column(table, 'page_number', 'INTEGER')
+            self._ensure_index(table, f'idx_{table}_document_page', '(document_id, page_number)')
+        self._ensure_column('extracted_images', 'content_hash', 'CHAR(64)')
+
+        if self.table_layout == "normalized":
+            self.cursor.execute('''CREATE TABLE IF NOT EXISTS extracted_tables (
+                document_id BIGINT NOT NULL,
+                table_index INTEGER NOT NULL,
+                row_count INTEGER NOT NULL,
+                column_count INTEGER NOT NULL,
+                PRIMARY KEY (document_id, table_index),
+                FOREIGN KEY (document_id) REFERENCES documents (id) ON DELETE CASCADE
+            )''')
+            self.cursor.execute('''CREATE TABLE IF NOT EXISTS extracted_table_cells (
+                document_id BIGINT NOT NULL,
+                table_index INTEGER NOT NULL,
+                row_index INTEGER NOT NULL,
+                col_index INTEGER NOT NULL,
+                value TEXT,
+                PRIMARY KEY (document_id, table_index, row_index, col_index),
+                FOREIGN KEY (document_id, table_index) REFERENCES extracted_tables (document_id, table_index) ON DELETE CASCADE
+            )''')
         self.conn.commit()  # Commit the table creation to the database
 
-    def save(self):
+    def _ensure_column(self, table, column, definition):
+        self.cursor.execute('''SELECT COUNT(*) FROM information_schema.COLUMNS
+                               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s''',
+                            (table, column))
+        if not self.cursor.fetchone()[0]:
+            self._run_upgrade(f"ALTER TABLE {table} ADD COLUMN `{column}` {definition}")
+
+    def _ensure_index(self, table, index, columns):
+        self.cursor.execute('''SELECT COUNT(*) FROM information_schema.STATISTICS
+                               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s''',
+                            (table, index))
+        if not self.cursor.fetchone()[0]:
+            self._run_upgrade(f"CREATE INDEX {index} ON {table} {columns}")
+
+    def _run_upgrade(self, statement):
+        """Run a schema upgrade, ignoring the error raised when another worker already applied it."""
+        import mysql.connector
+        from mysql.connector import errorcode
+        try:
+            self.cursor.execute(statement)
+        except mysql.connector.Error as err:
+            if err.errno not in (errorcode.ER_DUP_FIELDNAME, errorcode.ER_DUP_KEYNAME):
+                raise
+
+    def save(self, data=None):
         """
         Save the extracted data (text, links, images, tables) to the MySQL database.
-        This method performs the following operations:
+        This method performs the following operations, for the artifacts selected on the extractor:
         - Save extracted text
         - Save extracted links
         - Save extracted images
         - Save extracted tables
+
+        :param data: Optional dict already produced by FileProcessor.extract_data(). When given, it is
+                     stored as-is instead of running the extractor again.
         """
-        # Save extracted text
-        text_content, _ = self.extractor.extract_text()  # Extract the text, discard metadata
-        if text_content:  # Only insert if there is text data
-            self.cursor.execute('INSERT INTO extracted_text (content) VALUES (%s)', (text_content,))
-        
-        # Save extracted links
-        links = self.extractor.extract_links()  # Extract links from the document
-        for link in links:
-            self.cursor.execute('INSERT INTO extracted_links (link, page_number) VALUES (%s, %s)', 
-                                (link['url'], link.get('page_number', link.get('slide_number'))))  # Insert links into the database
-
-        # Save extracted images
-        images = self.extractor.extract_images()
+        if data is None:
+            data = self.extractor.extract_selected()
+
+        # Save extracted text, links, images and tables in a single transaction
+        text_content, _ = data['text']  # Discard metadata
+        self._save_in_transaction([(text_content, None)] if text_content is not None else None,
+                                  data.get('links'), data.get('images'), data.get('tables'))
+
+        print(f"Data saved to MySQL database")  # Confirmation message
+
+    def save_stream(self):
+        """
+        Save the extracted data page by page, consuming the extractor's generators.
+        Every page (or DOCX paragraph / PPTX slide) of text becomes its own extracted_text row,
+        and images and tables are inserted as they are produced, so memory use stays flat.
+        """
+        wants = self.extractor.wants
+        self._save_in_transaction(
+            ((page['text'], page.get('page_number', page.get('slide_number'))) for page in self.extractor.iter_pages())
+            if wants("text") else None,
+            self.extractor.extract_links() if wants("links") else None,
+            self.extractor.iter_images() if wants("images") else None,
+            self.extractor.iter_tables() if wants("tables") else None
+        )
+
+        print(f"Data saved to MySQL database")  # Confirmation message
+
+    def _save_in_transaction(self, text_chunks, links, images, tables):
+        """
+        Insert all artifacts of one document and commit once; roll everything back on failure.
+        An artifact passed as None was not selected and is left out.
+        """
+        if tables is not None and self.table_layout == "per_table":
+            # Its DDL would commit the transaction half way, so the schema is created first.
+            # The table names derive from the document id, so the documents row is created before it
+            self.document_id = self._reserve_document_id()
+            tables = self._create_per_table_schema(list(tables))
+        try:
+            self.document_id = self._upsert_document()
+            if text_chunks is not None:
+                self._save_text(text_chunks)
+            if links is not None:
+                self._save_links(links)
+            if images is not None:
+                self._save_images(images)
+            if tables is not None:
+                self._save_tables(tables)
+            with self.metrics.timer("store.sql.commit"):
+                self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def _insert_many(self, query, rows):
+        """
+        Insert rows with executemany() in chunks of `batch_size`.
+        mysql.connector rewrites each chunk into a single multi-row INSERT, and consuming `rows`
+        chunk by chunk keeps generators (streaming mode) bounded in memory.
+        """
+        rows = iter(rows)
+        inserted = 0
+        while True:
+            chunk = list(islice(rows, self.batch_size))
+            if not chunk:
+                return inserted
+            self.cursor.executemany(query, chunk)
+            inserted += len(chunk)
+            self.metrics.increment("rows_inserted", len(chunk))
+
+    @timed("store.sql.text")
+    def _save_text(self, chunks):
+        # Only insert if there is text data; chunks are (text, page_number) pairs
+        self._insert_many('INSERT INTO extracted_text (document_id, content, page_number) VALUES (%s, %s, %s)',
+                          ((self.document_id, text_content, page_number)
+                           for text_content, page_number in chunks if text_content))
+
+    @timed("store.sql.links")
+    def _save_links(self, links):
+        self._insert_many('INSERT INTO extracted_links (document_id, link, page_number) VALUES (%s, %s, %s)',
+                          ((self.document_id, link.url, link.location)
+                           for link in links))
+
+    @timed("store.sql.images")
+    def _save_images(self, images):
+        if self.dedupe_images:
+            self._save_images_deduplicated(images)
+            return
+
+        # The connector needs bytes; buffer_bytes hands over the extractor's bytes without copying them.
+        # The page_number column holds the slide number for PPTX files
+        self._insert_many('INSERT INTO extracted_images (document_id, image, image_format, resolution, page_number) VALUES (%s, %s, %s, %s, %s)',
+                          ((self.document_id, buffer_bytes(image_data), img.image_format, img.image_resolution,
+                            img.location) for img, image_data in self._image_bytes(images)))
+
+    def _image_bytes(self, images):
+        # Pairs every image with its bytes, fetched on demand when the extractor left them out
         for img in images:
-            # Convert the memoryview object to bytes before saving to MySQL
-            img_data = bytes(img['image'])  # Convert memoryview to bytes
-            # Use 'slide_number' instead of 'page_number' for PPTX files
-            self.cursor.execute('INSERT INTO extracted_images (image, image_format, resolution, page_number) VALUES (%s, %s, %s, %s)',
-                                (img_data, img['image_format'], img['image_resolution'], img.get('page_number', img.get('slide_number'))))
+            image_data = self.extractor.load_image_bytes(img)
+            self.metrics.increment("image_bytes", len(image_data))
+            yield img, image_data
 
-        
-        # Save extracted tables
-        tables = self.extractor.extract_tables()  # Extract tables from the document
-        for table_id, table in enumerate(tables):
+    def _save_images_deduplicated(self, images):
+        """
+        Insert only the images whose bytes are not stored yet, and one light occurrence row
+        (hash, format, resolution, page/slide) per image. Images are handled in chunks of
+        `batch_size`, with one lookup per chunk to skip blobs stored by earlier documents.
+        """
+        images = self._image_bytes(images)
+        while True:
+            chunk = []
+            for img, image_data in islice(images, self.batch_size):
+                chunk.append((blob_digest(image_data), img, image_data))
+            if not chunk:
+                return
+
+            new_blobs = {}
+            for digest, img, image_data in chunk:
+                if digest not in self._stored_blobs:
+                    new_blobs.setdefault(digest, (img, image_data))
+            if new_blobs:
+                placeholders = ', '.join(['%s'] * len(new_blobs))
+                self.cursor.execute(f'SELECT content_hash FROM image_blobs WHERE content_hash IN ({placeholders})',
+                                    tuple(new_blobs))
+                for (existing,) in self.cursor.fetchall():
+                    new_blobs.pop(existing, None)
+
+            # ON DUPLICATE KEY keeps concurrent writers of the same blob from failing each other
+            self._insert_many('''INSERT INTO image_blobs (content_hash, image, image_format, resolution, byte_size)
+                                 VALUES (%s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE content_hash = content_hash''',
+                              ((digest, buffer_bytes(image_data), img.image_format, img.image_resolution, len(image_data))
+                               for digest, (img, image_data) in new_blobs.items()))
+            self._stored_blobs.update(digest for digest, _, _ in chunk)
+
+            self._insert_many('INSERT INTO extracted_images (document_id, content_hash, image_format, resolution, page_number) VALUES (%s, %s, %s, %s, %s)',
+                              ((self.document_id, digest, img.image_format, img.image_resolution, img.location)
+                               for digest, img, _ in chunk))
+
+    def _document_values(self):
+        document = self.extractor.document
+        return (os.path.abspath(self.extractor.file_path), document.content_hash,
+                self.extractor.file_extension.lstrip('.'), document.file_size, document.page_count)
+
+    def _reserve_document_id(self):
+        """
+        Return the id of the file's documents row, committing a new row when the file was never stored.
+        An existing row is left as it is; _upsert_document() updates it within the document's transaction.
+        """
+        self.cursor.execute(
+            '''INSERT INTO documents (file_path, content_hash, file_type, file_size, page_count)
+               VALUES (%s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)''',
+            self._document_values())
+        document_id = self.cursor.lastrowid
+        self.conn.commit()
+        return document_id
+
+    @timed("store.sql.document")
+    def _upsert_document(self):
+        """
+        Insert or update the documents row of the file and return its id.
+        Re-ingesting a path reuses its row and replaces the artifacts stored for it,
+        so running the same file twice never leaves duplicates behind.
+        """
+        self.cursor.execute(
+            '''INSERT INTO documents (file_path, content_hash, file_type, file_size, page_count, extracted_at)
+               VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+               ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id), content_hash = VALUES(content_hash),
+                   file_type = VALUES(file_type), file_size = VALUES(file_size),
+                   page_count = VALUES(page_count), extracted_at = CURRENT_TIMESTAMP''',
+            self._document_values())
+        document_id = self.cursor.lastrowid
+
+        # Drop the artifacts of a previous run of this document before inserting the new ones
+        for table in ('extracted_text', 'extracted_links', 'extracted_images'):
+            self.cursor.execute(f'DELETE FROM {table} WHERE document_id = %s', (document_id,))
+        self._clear_per_table_tables(self.cursor, document_id)
+        if self.table_layout == "normalized":
+            # Cells are removed by the ON DELETE CASCADE of extracted_table_cells
+            self.cursor.execute('DELETE FROM extracted_tables WHERE document_id = %s', (document_id,))
+        return document_id
+
+    @staticmethod
+    def _clear_per_table_tables(cursor, document_id):
+        """
+        Delete the rows of the per_table tables the document owns, and their document_tables entries.
+        Returns the names of those tables. Only DML runs, so this stays within the caller's transaction.
+        """
+        cursor.execute('SELECT table_name FROM document_tables WHERE document_id = %s', (document_id,))
+        table_names = [table_name for (table_name,) in cursor.fetchall()]
+        for table_name in table_names:
+            # The table name derives from the document id, so every row in it is the document's
+            cursor.execute(f'DELETE FROM {table_name}')
+        cursor.execute('DELETE FROM document_tables WHERE document_id = %s', (document_id,))
+        return table_names
+
+    def _create_per_table_schema(self, tables):
+        """
+        Create the extracted_table_<document id>_<table index> table of every non-empty table of the
+        per_table layout, or add the columns an existing one is missing, and return the (table, table name,
+        columns) to insert. MySQL commits implicitly on DDL, so this runs before the document's transaction
+        starts. The names only depend on the document, so threads and worker processes never share a table.
+        """
+        schema = []
+        for table_index, table in enumerate(tables):
             if not table:  # Skip empty tables
                 continue
 
-            # Get the column names from the first row
-            column_names = table[0]
-
-            # Sanitize column names for SQL compatibility (replace spaces and other special characters)
-            sanitized_columns = []
-            for col in column_names:
-                sanitized_col = col.strip().replace(" ", "_").replace("-", "_").replace(".", "_")
-                sanitized_columns.append(sanitized_col)
+            # Sanitize the header row into column names (replace spaces and other special characters)
+            sanitized_columns = [col.strip().replace(" ", "_").replace("-", "_").replace(".", "_") for col in table[0]]
 
             # Create a new SQL table for each extracted table
-            table_name = f'extracted_table_{MySQLStorage.table_name}'  # Unique table name for each table
-            MySQLStorage.table_name += 1
-            
-            # Prepare the column definitions for table creation
-            sanitized_column_defs = [f'`{col}` TEXT' for col in sanitized_columns]
-            
-            # Check if the table already exists
-            try:
-                self.cursor.execute(f"SHOW TABLES LIKE '{table_name}'")
-                result = self.cursor.fetchone()
-
-                if result:  # Table exists
-                    print(f"Table {table_name} already exists. Skipping creation.")
-
-                    # Check the existing columns in the table
-                    self.cursor.execute(f"SHOW COLUMNS FROM {table_name}")
-                    existing_columns = [col[0] for col in self.cursor.fetchall()]
-
-                    # Check for columns that need to be added
-                    for col in sanitized_columns:
-                        if col not in existing_columns:
-                            alter_query = f"ALTER TABLE {table_name} ADD COLUMN `{col}` TEXT"
-                            self.cursor.execute(alter_query)
-                            print(f"Added column `{col}` to table {table_name}.")
-
-                else:  # Create the table if it doesn't exist
-                    create_table_query = f"CREATE TABLE {table_name} (id INT AUTO_INCREMENT PRIMARY KEY, {', '.join(sanitized_column_defs)})"
-                    self.cursor.execute(create_table_query)
-                    print(f"Table created: {table_name}")
-
-            except mysql.connector.Error as err:
-                print(f"Error checking/creating table {table_name}: {err}")
-                continue  # Skip to the next table if there's an error
-
-            # Prepare the column names for insertion (same as headers without data types)
-            column_names_for_insert = [f'`{col}`' for col in sanitized_columns]
-
-            # Insert the remaining rows (skip the first row as it contains headers)
-            for row in table[1:]:
-                try:
-                    # Dynamically build the SQL query for inserting data
-                    insert_query = f"INSERT INTO {table_name} ({', '.join(column_names_for_insert)}) VALUES ({', '.join(['%s'] * len(row))})"
-                    self.cursor.execute(insert_query, tuple(row))  # Insert the row into the table
-                except mysql.connector.Error as err:
-                    print(f"Error inserting into table {table_name}: {err} for row: {row}")
-                    continue  # Skip to the next row if there's an error
-
-        # Commit the transaction after all inserts
-        self.conn.commit()
+            table_name = f'extracted_table_{self.document_id}_{table_index}'
 
+            self.cursor.execute(f"SHOW TABLES LIKE '{table_name}'")
+            if self.cursor.fetchone():  # Table exists
+                print(f"Table {table_name} already exists. Skipping creation.")
+                self.cursor.execute(f"SHOW COLUMNS FROM {table_name}")
+                existing_columns = [col[0] for col in self.cursor.fetchall()]
+                for col in sanitized_columns:
+                    if col not in existing_columns:
+                        self.cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN `{col}` TEXT")
+                        print(f"Added column `{col}` to table {table_name}.")
+            else:
+                column_defs = ', '.join(f'`{col}` TEXT' for col in sanitized_columns)
+                self.cursor.execute(f"CREATE TABLE {table_name} (id INT AUTO_INCREMENT PRIMARY KEY, {column_defs})")
+                print(f"Table created: {table_name}")
+            schema.append((table, table_name, sanitized_columns))
+        return schema
 
+    @timed("store.sql.tables")
+    def _save_tables(self, tables):
+        """
+        Insert the tables of the document; for the per_table layout, `tables` is what
+        _create_per_table_schema() returned. Errors propagate, so the whole document is rolled back.
+        """
+        if self.table_layout == "normalized":
+            self._save_tables_normalized(tables)
+            return
 
-        print(f"Data saved to MySQL database")  # Confirmation message
+        # Record which tables the document owns, so re-ingesting or deleting it clears them
+        self._insert_many('INSERT INTO document_tables (document_id, table_name) VALUES (%s, %s)',
+                          ((self.document_id, table_name) for _, table_name, _ in tables))
+        for table, table_name, columns in tables:
+            self.metrics.increment("table_cells", len(table.cells))
+            column_count = len(columns)
+            # Build the INSERT statement once per table instead of once per row
+            insert_query = (f"INSERT INTO {table_name} ({', '.join(f'`{col}`' for col in columns)}) "
+                            f"VALUES ({', '.join(['%s'] * column_count)})")
+            # Insert the remaining rows (skip the first row as it contains headers).
+            # Rows are padded/truncated to the header width so a ragged row cannot fail a whole batch
+            self._insert_many(insert_query, (tuple((list(row) + [None] * column_count)[:column_count])
+                                             for row in table[1:]))
+
+    def _save_tables_normalized(self, tables):
+        """
+        Store every table as cells keyed by (document_id, table_index, row, col).
+        No DDL runs here and table indexes are local to the document, so concurrent
+        writers never contend on a shared counter. The header row is kept as row 0.
+        """
+        for table_index, table in enumerate(tables):
+            if not table:  # Skip empty tables
+                continue
+            column_count = max(len(row) for row in table)
+            self.metrics.increment("table_cells", len(table.cells))
+            self.cursor.execute(
+                'INSERT INTO extracted_tables (document_id, table_index, row_count, column_count) VALUES (%s, %s, %s, %s)',
+                (self.document_id, table_index, len(table), column_count))
+            self._insert_many(
+                'INSERT INTO extracted_table_cells (document_id, table_index, row_index, col_index, value) VALUES (%s, %s, %s, %s, %s)',
+                ((self.document_id, table_index, row_index, col_index, value)
+                 for row_index, row in enumerate(table)
+                 for col_index, value in enumerate(row)))
+
+    @classmethod
+    def delete_document(cls, file_path, pool_size=DEFAULT_POOL_SIZE):
+        """
+        Delete the documents row of `file_path` and every artifact stored for it,
+        e.g. once the source file was deleted. The per_table tables of the document are dropped.
+        """
+        load_dotenv()
+        conn = cls._get_pool(pool_size).get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT id FROM documents WHERE file_path = %s', (os.path.abspath(file_path),))
+            row = cursor.fetchone()
+            table_names = []
+            if row is not None:
+                for table in ('extracted_text', 'extracted_links', 'extracted_images'):
+                    cursor.execute(f'DELETE FROM {table} WHERE document_id = %s', row)
+                table_names = cls._clear_per_table_tables(cursor, row[0])
+                # Normalized tables and their cells follow through ON DELETE CASCADE
+                cursor.execute('DELETE FROM documents WHERE id = %s', row)
+            conn.commit()
+            # DDL commits implicitly, so the emptied tables are only dropped once the deletion is committed
+            for table_name in table_names:
+                cursor.execute(f'DROP TABLE IF EXISTS {table_name}')
+        finally:
+            cursor.close()
+            conn.close()
+
+    @classmethod
+    def delete_unreferenced_blobs(cls, pool_size=DEFAULT_POOL_SIZE):
+        """
+        Delete the image_blobs rows no extracted_images row references any more, e.g. after
+        delete_document() or a changed document was stored again. Returns how many were deleted.
+        """
+        load_dotenv()
+        conn = cls._get_pool(pool_size).get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''DELETE image_blobs FROM image_blobs
+                              LEFT JOIN extracted_images ON extracted_images.content_hash = image_blobs.content_hash
+                              WHERE extracted_images.content_hash IS NULL''')
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            cursor.close()
+            conn.close()
 
     def close(self):
-        """Close the database connection to free up resources."""
+        """Return the database connection to the pool."""
+        self.cursor.close()
         self.conn.close()
@@ -0,0 +1,69 @@
+import os
+import glob
+import hashlib
+import tempfile
+
+
+def blob_digest(data):
+    """Return the SHA-256 hex digest identifying an image (or any blob) by its content."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore:
+    """
+    Content-addressed directory of blobs shared by all documents.
+
+    Each blob is written once to `root/<digest[:2]>/<digest>.<ext>`; storing the same bytes again
+    (the same logo on every slide, or in every deck) only returns the existing path. Sharding by
+    the first two hex characters keeps directories small on large corpora.
+
+    Methods:
+        put(data, extension): Stores the blob if it is new and returns (digest, path).
+        path_for(digest, extension): Returns where a blob with this digest lives.
+        remove_unreferenced(referenced): Deletes the blobs whose digest is not in `referenced`.
+    """
+
+    def __init__(self, root):
+        """
+        :param root: Directory holding the blob shards; created if missing.
+        """
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def path_for(self, digest, extension):
+        return os.path.join(self.root, digest[:2], f"{digest}.{extension}")
+
+    def put(self, data, extension):
+        digest = blob_digest(data)
+        blob_path = self.path_for(digest, extension)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            # Write under a temporary name so concurrent workers never see a partial blob; mkstemp gives
+            # every writer its own name, whether it is another process or a pipeline thread of this one
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(blob_path), prefix=f"{digest}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as blob_file:
+                    blob_file.write(data)
+                os.replace(temp_path, blob_path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        return digest, blob_path
+
+    def remove_unreferenced(self, referenced):
+        """
+        Delete every blob whose digest is not in `referenced` and return how many were deleted.
+        A blob is written before the index that lists it, so this must not run while documents
+        are being stored into this store.
+        """
+        removed = 0
+        for blob_path in glob.glob(os.path.join(self.root, "*", "*")):
+            name = os.path.basename(blob_path)
+            if name.endswith(".tmp") or name.split(".", 1)[0] in referenced:
+                continue
+            try:
+                os.remove(blob_path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
@@ -0,0 +1,319 @@
+import os
+import glob
+import json
+import threading
+from metrics import timed
+
+
+class ShardWriter:
+    """
+    Appends records to `<root>/<name>-<writer_id>-<NNNNN>.<extension>`, starting a new shard once
+    the current one reaches `max_bytes`.
+
+    The writer id is the process id, so concurrent batch workers never write into the same file;
+    a later process reusing an id simply appends to that shard. Writes are serialised by a lock,
+    so pipeline threads of one process can share a writer.
+    """
+
+    def __init__(self, root, name, extension, max_bytes, on_rollover=None):
+        """
+        :param root: Export directory.
+        :param name: Shard family, e.g. 'text' or 'images'.
+        :param extension: File extension of the shards.
+        :param max_bytes: Size after which the next write goes to a new shard.
+        :param on_rollover: Optional callable receiving the path of every shard that was completed.
+        """
+        self.root = root
+        self.name = name
+        self.extension = extension
+        self.max_bytes = max_bytes
+        self.on_rollover = on_rollover
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.path = None
+        self._file = None
+        self._shard = None
+
+    def write(self, data):
+        """Append `data` (bytes) and return the (shard path, offset) it was written at."""
+        with self.lock:
+            if self._file is None:
+                self._open(self._last_shard())
+            elif self._file.tell() >= self.max_bytes:
+                self._roll()
+            offset = self._file.tell()
+            self._file.write(data)
+            return self.path, offset
+
+    def flush(self):
+        with self.lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        """Close the current shard; it counts as completed, like a shard that rolled over."""
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                if self.on_rollover is not None:
+                    self.on_rollover(self.path)
+
+    def _shard_path(self, shard):
+        return os.path.join(self.root, f"{self.name}-{self.pid}-{shard:05d}.{self.extension}")
+
+    def _last_shard(self):
+        # Continue after the shards an earlier process with the same id left behind
+        pattern = os.path.join(self.root, f"{self.name}-{self.pid}-*.*")
+        shards = [os.path.basename(path).split("-")[-1].split(".", 1) for path in glob.glob(pattern)]
+        if not shards:
+            return 0
+        last = max(int(shard) for shard, _ in shards)
+        # A shard converted to another format (table spools become Parquet) is complete
+        if any(int(shard) == last and extension != self.extension for shard, extension in shards):
+            return last + 1
+        return last
+
+    def _open(self, shard):
+        self._shard = shard
+        self.path = self._shard_path(shard)
+        self._file = open(self.path, "ab")
+        if self._file.tell() >= self.max_bytes:
+            self._roll()
+
+    def _roll(self):
+        self._file.close()
+        if self.on_rollover is not None:
+            self.on_rollover(self.path)
+        self._open(self._shard + 1)
+
+
+def _spool_to_parquet(spool_path):
+    """
+    Convert a completed NDJSON table spool to Parquet and remove the spool.
+    Without pyarrow the spool is kept as it is, so tables are then exported as NDJSON.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.json as pa_json
+        import pyarrow.parquet as pq
+    except ImportError:
+        return
+    if not os.path.exists(spool_path) or os.path.getsize(spool_path) == 0:
+        return
+    schema = pa.schema([("document_id", pa.string()), ("file_path", pa.string()), ("table_index", pa.int32()),
+                        ("page_number", pa.int32()), ("row_index", pa.int32()), ("col_index", pa.int32()),
+                        ("value", pa.string())])
+    table = pa_json.read_json(spool_path, parse_options=pa_json.ParseOptions(explicit_schema=schema))
+    parquet_path = spool_path[:-len(".ndjson")] + ".parquet"
+    # Written under a temporary name, so readers never pick up a partial Parquet file
+    pq.write_table(table, parquet_path + ".tmp")
+    os.replace(parquet_path + ".tmp", parquet_path)
+    os.remove(spool_path)
+
+
+class ExportStorage:
+    """
+    Appends the records of every document to a few large, sharded files under one export directory,
+    instead of one directory of small files per document:
+
+        documents-*.ndjson  one record per document (path, content hash, type, size, pages, metadata)
+        text-*.ndjson       text per page / DOCX paragraph / PPTX slide
+        links-*.ndjson      one record per link
+        image_packs-*.bin   packed image bytes, located through the images-*.ndjson index
+                            (blob file, offset, length, format, resolution, page)
+        tables-*.parquet    one row per table cell, with document and page columns
+                            (NDJSON when pyarrow is not installed)
+
+    Only the artifacts selected on the extractor are exported; a documents record is always written,
+    with null metadata when metadata was not selected.
+
+    Every record carries `document_id` (the SHA-256 of the file) and `file_path`. Shards are append-only:
+    the latest documents record of a file_path tells readers which document_id is current, or that
+    the file was deleted (see record_deletion). Shards roll over
+    at `max_shard_bytes`. Table cells are spooled as NDJSON and converted to Parquet when their shard
+    is completed; call ExportStorage.finalize(output_dir) once all writers are done.
+
+    Methods:
+        save(data): Exports already extracted data (or extracts it).
+        save_stream(): Exports page by page from the extractor's generators.
+        finalize(output_dir): Closes this process's shards and converts leftover table spools.
+        record_deletion(output_dir, file_path): Appends a tombstone for a deleted source file.
+    """
+
+    DEFAULT_MAX_SHARD_BYTES = 128 * 1024 * 1024
+    # Shard writers of this process, shared by every ExportStorage instance: keyed by (pid, root, name)
+    _writers = {}
+    _writers_lock = threading.Lock()
+
+    def __init__(self, extractor, output_dir, max_shard_bytes=DEFAULT_MAX_SHARD_BYTES, metrics=None):
+        """
+        :param extractor: An instance of the data extractor.
+        :param output_dir: Export directory shared by all documents.
+        :param max_shard_bytes: Size at which a shard is completed and a new one started.
+        :param metrics: Optional Metrics for write timings and byte counts; defaults to the extractor's.
+        """
+        self.extractor = extractor
+        self.metrics = metrics or extractor.metrics
+        self.output_dir = os.path.abspath(output_dir)
+        self.max_shard_bytes = max_shard_bytes
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.document_id = extractor.document.content_hash
+        self.file_path = os.path.abspath(extractor.file_path)
+
+    def save(self, data=None):
+        """
+        Export the extracted data (metadata, text, links, images, tables).
+
+        :param data: Optional dict already produced by FileProcessor.extract_data(). When given, it is
+                     written as-is instead of running the extractor again.
+        """
+        if data is None:
+            data = self.extractor.extract_selected()
+
+        # The documents record is always written; the other families only for selected artifacts
+        wants = self.extractor.wants
+        text, metadata = data['text']
+        self._write_document(metadata)
+        if wants("text"):
+            self._write_text([(text, None)])
+        if wants("links"):
+            self._write_links(data['links'])
+        if wants("images"):
+            self._write_images(data['images'])
+        if wants("tables"):
+            self._write_tables(data['tables'])
+        self._flush()
+
+        print(f"Data exported to {self.output_dir}")
+
+    def save_stream(self):
+        """
+        Export the extracted data page by page, consuming the extractor's generators,
+        so memory use stays flat regardless of the document size.
+        """
+        wants = self.extractor.wants
+        self._write_document(self.extractor.extract_metadata() if wants("metadata") else None)
+        if wants("text"):
+            self._write_text((page['text'], page.get('page_number', page.get('slide_number')))
+                             for page in self.extractor.iter_pages())
+        if wants("links"):
+            self._write_links(self.extractor.extract_links())
+        if wants("images"):
+            self._write_images(self.extractor.iter_images())
+        if wants("tables"):
+            self._write_tables(self.extractor.iter_tables())
+        self._flush()
+
+        print(f"Data exported to {self.output_dir}")
+
+    @classmethod
+    def finalize(cls, output_dir):
+        """
+        Close the shards this process has open under `output_dir` and convert every table spool
+        left in it to Parquet. Run it once after all writers (batch workers, pipeline threads) are done.
+        """
+        root = os.path.abspath(output_dir)
+        with cls._writers_lock:
+            for key in [key for key in cls._writers if key[1] == root]:
+                cls._writers.pop(key).close()
+        for spool_path in glob.glob(os.path.join(root, "tables-*.ndjson")):
+            _spool_to_parquet(spool_path)
+
+    @classmethod
+    def record_deletion(cls, output_dir, file_path, max_shard_bytes=DEFAULT_MAX_SHARD_BYTES):
+        """
+        Append a tombstone ({'file_path', 'deleted': true}) to the documents shards. Shards are
+        append-only, so readers drop the records of a file whose latest documents record is a tombstone.
+        """
+        writer = cls._shard_writer(os.path.abspath(output_dir), "documents", "ndjson", max_shard_bytes)
+        record = {"file_path": os.path.abspath(file_path), "deleted": True}
+        writer.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+        writer.flush()
+
+    @classmethod
+    def _shard_writer(cls, root, name, extension, max_bytes, on_rollover=None):
+        key = (os.getpid(), root, name)
+        with cls._writers_lock:
+            if key not in cls._writers:
+                cls._writers[key] = ShardWriter(root, name, extension, max_bytes, on_rollover)
+            return cls._writers[key]
+
+    def _writer(self, name, extension, on_rollover=None):
+        return self._shard_writer(self.output_dir, name, extension, self.max_shard_bytes, on_rollover)
+
+    def _append(self, name, records, extension="ndjson", on_rollover=None):
+        writer = self._writer(name, extension, on_rollover)
+        for record in records:
+            # default=str covers the datetimes of DOCX/PPTX core properties
+            line = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+            writer.write(line)
+            self.metrics.increment("bytes_written", len(line))
+
+    @timed("store.export.metadata")
+    def _write_document(self, metadata):
+        document = self.extractor.document
+        self._append("documents", [{
+            "document_id": self.document_id,
+            "file_path": self.file_path,
+            "file_type": self.extractor.file_extension.lstrip('.'),
+            "file_size": document.file_size,
+            "page_count": document.page_count,
+            "metadata": metadata,
+        }])
+
+    @timed("store.export.text")
+    def _write_text(self, chunks):
+        self._append("text", ({"document_id": self.document_id, "file_path": self.file_path,
+                               "page_number": page_number, "text": text}
+                              for text, page_number in chunks if text))
+
+    @timed("store.export.links")
+    def _write_links(self, links):
+        self._append("links", ({"document_id": self.document_id, "file_path": self.file_path,
+                                "page_number": link.location, "url": link.url}
+                               for link in links))
+
+    @timed("store.export.images")
+    def _write_images(self, images):
+        blobs = self._writer("image_packs", "bin")
+        index = []
+        for image_index, img in enumerate(images):
+            image_bytes = self.extractor.load_image_bytes(img)
+            blob_path, offset = blobs.write(image_bytes)
+            self.metrics.increment("image_bytes", len(image_bytes))
+            self.metrics.increment("bytes_written", len(image_bytes))
+            index.append({
+                "document_id": self.document_id,
+                "file_path": self.file_path,
+                "image_index": image_index,
+                "page_number": img.location,
+                "image_format": img.image_format,
+                "image_resolution": img.image_resolution,
+                "blob_file": os.path.basename(blob_path),
+                "offset": offset,
+                "length": len(image_bytes),
+            })
+        self._append("images", index)
+
+    @timed("store.export.tables")
+    def _write_tables(self, tables):
+        # Cells are spooled as NDJSON; completed spools are converted to Parquet
+        self._append("tables", self._table_cells(tables), on_rollover=_spool_to_parquet)
+
+    def _table_cells(self, tables):
+        for table_index, table in enumerate(tables):
+            self.metrics.increment("table_cells", len(table.cells))
+            for row_index, row in enumerate(table):
+                for col_index, value in enumerate(row):
+                    yield {"document_id": self.document_id, "file_path": self.file_path,
+                           "table_index": table_index, "page_number": table.location,
+                           "row_index": row_index, "col_index": col_index, "value": value}
+
+    def _flush(self):
+        # Each document is durable once save() returns, even though the shards stay open
+        with ExportStorage._writers_lock:
+            writers = [writer for key, writer in ExportStorage._writers.items()
+                       if key[0] == os.getpid() and key[1] == self.output_dir]
+        for writer in writers:
+            writer.flush()
@@ -1,61 +1,148 @@
-from abc import ABC, abstractmethod
 import os
 import csv
-from Loaders.file_loader import FileLoader
-from Data_extraction.file_extractor import FileDataExtractor
+from Data_extraction.file_extractor import TEXT_SEPARATORS
+from Storage.blob_store import BlobStore
+from metrics import timed
 
 class FileStorage():
-    def __init__(self, extractor, output_dir):
+    def __init__(self, extractor, output_dir, blob_dir=None, metrics=None):
         """
         Initialize FileStorage with an extractor and output directory.
 
         :param extractor: An instance of the data extractor.
         :param output_dir: The directory where extracted data will be saved.
+        :param blob_dir: Optional shared, content-addressed image store. When given, each distinct
+                         image is written there once and the document only gets an images.csv index.
+        :param metrics: Optional Metrics for write timings and byte counts; defaults to the extractor's.
         """
         self.extractor = extractor
+        self.metrics = metrics or extractor.metrics
         self.output_dir = output_dir
+        self.blob_store = BlobStore(blob_dir) if blob_dir else None
         # Create the output directory if it does not exist
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def save(self):
+    def save(self, data=None):
         """
         Save the extracted data (text, metadata, images, links, tables) to the specified output directory.
+
+        :param data: Optional dict already produced by FileProcessor.extract_data(). When given, it is
+                     written as-is instead of running the extractor again.
+        """
+        if data is None:
+            data = self.extractor.extract_selected()
+
+        # Only the artifacts selected on the extractor are written
+        wants = self.extractor.wants
+        text, metadata = data['text']
+        if wants("text"):
+            self._write_text([text])
+        if wants("metadata"):
+            self._write_metadata(metadata)
+
+        # Save extracted links, images and tables
+        if wants("links"):
+            self._write_links(data['links'])
+        if wants("images"):
+            self._write_images(data['images'])
+        if wants("tables"):
+            self._write_tables(data['tables'])
+
+        print(f"Data saved to file system in directory {self.output_dir}")
+
+    def save_stream(self):
+        """
+        Save the extracted data page by page, consuming the extractor's generators.
+        Each page's text, each image and each table is written out as soon as it is produced,
+        so memory use stays flat regardless of the document size.
         """
-        # Save extracted text
-        text, metadata = self.extractor.extract_text()
+        wants = self.extractor.wants
+        separator = TEXT_SEPARATORS.get(self.extractor.file_extension, "\n")
+        if wants("text"):
+            self._write_text((page['text'] for page in self.extractor.iter_pages()), separator)
+        if wants("metadata"):
+            self._write_metadata(self.extractor.extract_metadata())
+        if wants("links"):
+            self._write_links(self.extractor.extract_links())
+        if wants("images"):
+            self._write_images(self.extractor.iter_images())
+        if wants("tables"):
+            self._write_tables(self.extractor.iter_tables())
+
+        print(f"Data saved to file system in directory {self.output_dir}")
+
+    @timed("store.file.text")
+    def _write_text(self, chunks, separator=""):
         text_file_path = os.path.join(self.output_dir, 'extracted_text.txt')
         with open(text_file_path, 'w', encoding='utf-8') as text_file:
-            text_file.write(text)
+            for idx, chunk in enumerate(chunks):
+                if idx:
+                    text_file.write(separator)
+                text_file.write(chunk)
+        self._count_written(text_file_path)
 
+    @timed("store.file.metadata")
+    def _write_metadata(self, metadata):
         # Save metadata to a separate file
         metadata_file_path = os.path.join(self.output_dir, "metadata.txt")
         with open(metadata_file_path, "w") as metadata_file:
             for key, value in metadata.items():
                 metadata_file.write(f"{key}: {value}\n")
+        self._count_written(metadata_file_path)
 
-        # Save extracted links
-        links = self.extractor.extract_links()
+    @timed("store.file.links")
+    def _write_links(self, links):
         links_file_path = os.path.join(self.output_dir, 'extracted_links.txt')
         with open(links_file_path, 'w', encoding='utf-8') as links_file:
             for link in links:
-                links_file.write(f"{link['url']} (Page/Slide: {link.get('page_number', link.get('slide_number'))})\n")
+                links_file.write(f"{link.url} (Page/Slide: {link.location})\n")
+        self._count_written(links_file_path)
+
+    @timed("store.file.images")
+    def _write_images(self, images):
+        if self.blob_store is not None:
+            self._write_image_index(images)
+            return
 
-        # Save extracted images
-        images = self.extractor.extract_images()
         images_dir = os.path.join(self.output_dir, 'images')
         os.makedirs(images_dir, exist_ok=True)
         for idx, img in enumerate(images):
-            image_file_path = os.path.join(images_dir, f'image_{idx+1}.{img["image_format"]}')
+            image_file_path = os.path.join(images_dir, f'image_{idx+1}.{img.image_format}')
             with open(image_file_path, 'wb') as image_file:
-                image_file.write(img['image'])
+                image_bytes = self.extractor.load_image_bytes(img)
+                image_file.write(image_bytes)
+            self.metrics.increment("image_bytes", len(image_bytes))
+            self.metrics.increment("bytes_written", len(image_bytes))
 
+    def _write_image_index(self, images):
+        """
+        Store image bytes in the shared blob store and list every occurrence in images.csv.
+        Repeated images (a logo on every slide) cost one blob plus one index row each.
+        """
+        index_file_path = os.path.join(self.output_dir, 'images.csv')
+        with open(index_file_path, 'w', newline='', encoding='utf-8') as index_file:
+            writer = csv.writer(index_file)
+            writer.writerow(['image', 'content_hash', 'image_format', 'image_resolution', 'page_or_slide', 'blob_path'])
+            for idx, img in enumerate(images):
+                image_bytes = self.extractor.load_image_bytes(img)
+                digest, blob_path = self.blob_store.put(image_bytes, img.image_format)
+                self.metrics.increment("image_bytes", len(image_bytes))
+                writer.writerow([idx + 1, digest, img.image_format, img.image_resolution, img.location,
+                                 os.path.relpath(blob_path, self.output_dir)])
+        self._count_written(index_file_path)
+
+    @timed("store.file.tables")
+    def _write_tables(self, tables):
         # Save extracted tables to CSV files
-        tables = self.extractor.extract_tables()
         for table_id, table in enumerate(tables):
             table_file_path = os.path.join(self.output_dir, f'table_{table_id+1}.csv')
             with open(table_file_path, 'w', newline='', encoding='utf-8') as csv_file:
                 writer = csv.writer(csv_file)
                 for row in table:
                     writer.writerow(row)  # Write each row of the table to the CSV file
+                    self.metrics.increment("table_cells", len(row))
+            self._count_written(table_file_path)
 
-        print(f"Data saved to file system in directory {self.output_dir}")
+    def _count_written(self, path):
+        if self.metrics.enabled:
+            self.metrics.increment("bytes_written", os.path.getsize(path))
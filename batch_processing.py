@@ -0,0 +1,377 @@
+import os
+import copy
+import glob
+import time
+import signal
+import hashlib
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from file_processing import FileProcessor
+from metrics import Metrics
+from Data_extraction.file_extractor import select_artifacts
+from Data_extraction.result_cache import ExtractionCache
+from resource_limits import ResourceLimitExceeded, ResourceLimits, limit_failure, run_sandboxed
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.pptx')
+
+
+def run_config(runner):
+    """
+    The settings of a batch or pipeline run that change the stored output; a manifest
+    re-processes files stored with other settings.
+
+    :param runner: A BatchProcessor or ExtractionPipeline.
+    """
+    return {"storage_type": runner.storage_type, "output_dir": os.path.abspath(runner.output_dir),
+            "pdf_engine": runner.pdf_engine, "ooxml_engine": runner.ooxml_engine, "table_layout": runner.table_layout,
+            "dedupe_images": runner.dedupe_images, "artifacts": list(runner.artifacts),
+            "page_range": list(runner.page_range) if runner.page_range is not None else None,
+            "max_chars": runner.max_chars, "max_tables": runner.max_tables,
+            "ocr": runner.ocr.config() if runner.ocr is not None else None}
+
+
+def print_batch_summary(results):
+    """Print the per-status counts of a batch run and the error of every file that did not succeed."""
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    summary = ", ".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+    print(f"Batch finished ({summary or 'no files'})")
+    for result in results:
+        if result["status"] not in ("ok", "skipped"):
+            print(f"  {result['file_path']}: {result['error']}")
+
+
+def _raise_timeout(signum, frame):
+    raise TimeoutError("Processing exceeded the per-file timeout.")
+
+
+def _extract_one(file_path, pdf_engine, cache_dir, quiet, ooxml_engine, artifacts, page_range, max_chars,
+                 max_tables, ocr, limits, collect_metrics=False):
+    """
+    Extract a single file inside a sandboxed child process (see run_sandboxed) and return the result
+    dict with the extracted data under 'data' (and its Metrics report under 'metrics' with
+    `collect_metrics`); the worker stores it.
+    """
+    metrics = Metrics() if collect_metrics else None
+    with contextlib.ExitStack() as stack:
+        if quiet:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        processor = FileProcessor(file_path, pdf_engine=pdf_engine, cache=ExtractionCache(cache_dir) if cache_dir else None,
+                                  metrics=metrics, ooxml_engine=ooxml_engine, artifacts=artifacts,
+                                  page_range=page_range, max_chars=max_chars, max_tables=max_tables, ocr=ocr,
+                                  limits=limits)
+        stack.callback(processor.extractor.close)
+        result = {"file_path": file_path, "status": "ok", "error": None, "data": processor.extract_data()}
+    if metrics is not None:
+        result["metrics"] = metrics.report()
+        # The worker opens the document again to store it, and counts it then
+        for name in ("files", "bytes_read", "pages"):
+            result["metrics"]["counters"].pop(name, None)
+    return result
+
+
+def _process_one(file_path, storage_type, output_dir, timeout, pdf_engine, cache_dir, table_layout, dedupe_images,
+                 quiet=False, ooxml_engine="default", artifacts=None, page_range=None, max_chars=None,
+                 max_tables=None, ocr=None, limits=None, collect_metrics=False):
+    """
+    Process a single file inside a worker process and report the outcome as a dict.
+    Exceptions never escape, so one bad document cannot take the batch down.
+    With `quiet`, the progress messages printed while processing are discarded.
+    With `collect_metrics`, the stage timings and counters of the file are returned under 'metrics'
+    (a Metrics report) for the parent to merge, since a Metrics object cannot cross processes.
+    """
+    metrics = Metrics() if collect_metrics else None
+    result = _process_in_worker(file_path, storage_type, output_dir, timeout, pdf_engine, cache_dir, table_layout,
+                                dedupe_images, quiet, ooxml_engine, artifacts, page_range, max_chars, max_tables,
+                                ocr, limits, metrics)
+    if metrics is not None:
+        result["metrics"] = metrics.report()
+    return result
+
+
+def _process_in_worker(file_path, storage_type, output_dir, timeout, pdf_engine, cache_dir, table_layout,
+                       dedupe_images, quiet, ooxml_engine, artifacts, page_range, max_chars, max_tables, ocr,
+                       limits, metrics):
+    """
+    Body of _process_one(), recording into `metrics` (a Metrics or None).
+
+    With `limits` (ResourceLimits), the file is extracted in a sandboxed child process of the worker
+    (see run_sandboxed) and the worker stores the data it returns, so the storage backends (and the
+    export shards, named after the writing process) stay with the long-lived worker. A file over a
+    limit is reported with status 'rejected' or 'timeout' and the 'limit', 'value' and 'maximum' it hit.
+    """
+    file_type = os.path.splitext(file_path)[1][1:].lower()
+    storage_path = BatchProcessor.storage_path_for(output_dir, file_path, storage_type)
+
+    started = time.monotonic()
+    extracted = None
+    if limits is not None:
+        result = run_sandboxed(limits, _extract_one, file_path, pdf_engine, cache_dir, quiet, ooxml_engine,
+                               artifacts, page_range, max_chars, max_tables, ocr, limits, metrics is not None)
+        if result["status"] != "ok":
+            return result
+        extracted = result["data"]
+        if metrics is not None:
+            metrics.merge(result["metrics"])
+
+    # Storing gets what is left of the timeout, enforced with SIGALRM in the worker (POSIX only)
+    remaining = timeout - (time.monotonic() - started) if timeout else None
+    if remaining is not None and remaining <= 0:
+        return {"file_path": file_path, "status": "timeout", "error": "Processing exceeded the per-file timeout."}
+    use_alarm = bool(remaining) and hasattr(signal, "setitimer")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, remaining)
+
+    try:
+        with contextlib.ExitStack() as stack:
+            if quiet:
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+            FileProcessor.process_file(
+                file_type=file_type,
+                file_path=file_path,
+                storage_type=storage_type,
+                storage_path=storage_path,
+                pdf_engine=pdf_engine,
+                ooxml_engine=ooxml_engine,
+                artifacts=artifacts,
+                page_range=page_range,
+                max_chars=max_chars,
+                max_tables=max_tables,
+                ocr=ocr,
+                limits=limits,
+                metrics=metrics,
+                # Extracted in the sandbox, so the cache was already filled there
+                cache_dir=cache_dir if extracted is None else None,
+                data=extracted,
+                table_layout=table_layout,
+                # Shared across the whole batch, so templated images are stored once
+                blob_dir=BatchProcessor.blob_dir_for(output_dir) if dedupe_images else None,
+                dedupe_images=dedupe_images
+            )
+        return {"file_path": file_path, "status": "ok", "error": None}
+    except TimeoutError as e:
+        return {"file_path": file_path, "status": "timeout", "error": str(e)}
+    except ResourceLimitExceeded as e:
+        return limit_failure(file_path, e)
+    except MemoryError:
+        if limits is None or limits.max_memory is None:
+            raise
+        return limit_failure(file_path, ResourceLimitExceeded("max_memory", None, limits.max_memory))
+    except Exception as e:
+        return {"file_path": file_path, "status": "failed", "error": f"{type(e).__name__}: {e}"}
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class BatchProcessor:
+    """
+    Process many PDF, DOCX and PPTX files in parallel worker processes.
+
+    Extraction is CPU-bound parsing, so files are fanned out over a ProcessPoolExecutor.
+    At most `max_in_flight` files are submitted at any time, every file gets its own
+    timeout, and failures (including crashed workers) are recorded instead of aborting the run.
+
+    Methods:
+        collect_files(source): Resolves a directory, glob pattern or manifest file into file paths.
+        run(source): Processes every collected file and returns one result dict per file.
+    """
+
+    def __init__(self, storage_type="file", output_dir="./output", workers=None,
+                 max_in_flight=None, timeout=None, pdf_engine="default", cache_dir=None,
+                 table_layout="normalized", dedupe_images=True, quiet=False, manifest_path=None,
+                 ooxml_engine="default", artifacts=None, page_range=None, max_chars=None, max_tables=None,
+                 ocr=None, limits=None, metrics=None):
+        """
+        :param storage_type: 'file' or 'sql', passed on to FileProcessor.process_file().
+        :param output_dir: Root directory for file storage; each file gets its own folder (see storage_path_for).
+        :param workers: Number of worker processes (defaults to the number of CPUs).
+        :param max_in_flight: Maximum number of submitted but unfinished files (defaults to 2 * workers).
+        :param timeout: Per-file timeout in seconds, or None for no limit. Files are then extracted in a
+                        sandboxed child process that is killed at the timeout (see `limits`).
+        :param pdf_engine: PDF backend passed on to FileDataExtractor.
+        :param cache_dir: Directory of the extraction result cache, or None to bypass it.
+        :param table_layout: MySQLStorage table layout; the normalized layout lets workers write concurrently.
+        :param dedupe_images: Store each distinct image once (in output_dir/blobs or the image_blobs table).
+        :param quiet: Discard the messages printed by the workers; per-file results are still returned.
+        :param manifest_path: Optional ProcessingManifest database. Files processed before with the same
+                              settings and unchanged since are skipped, and outputs of deleted files are removed.
+        :param ooxml_engine: DOCX/PPTX backend passed on to FileDataExtractor.
+        :param artifacts: Artifact types to extract and store (see select_artifacts); all by default.
+        :param page_range: Optional zero-based, half-open (start, stop) range of pages or slides to extract.
+        :param max_chars: Optional budget of text characters extracted per file.
+        :param max_tables: Optional budget of tables extracted per file.
+        :param ocr: Optional PageOCR for PDF pages without a text layer; every worker process runs its own
+                    OCR pool of `ocr.workers` processes.
+        :param limits: Optional ResourceLimits. Each file is then extracted in a sandboxed child process of
+                       its worker, killed at `limits.timeout` (or `timeout`) and capped at `limits.max_memory`;
+                       files over a limit get status 'rejected' (or 'timeout') instead of stalling the batch.
+        :param metrics: Optional Metrics; every worker collects the timings and counters of its files,
+                        which are merged into it as the results come in.
+        """
+        self.storage_type = storage_type
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or self.workers * 2
+        self.limits = limits
+        if timeout is not None and (limits is None or limits.timeout is None):
+            # The sandbox enforces the per-file timeout by killing the extraction, which also stops parsers
+            # stuck in native code, where a signal is never handled
+            self.limits = copy.copy(limits) if limits is not None else ResourceLimits()
+            self.limits.timeout = timeout
+        self.timeout = timeout
+        self.pdf_engine = pdf_engine
+        self.ooxml_engine = ooxml_engine
+        # Resolved here, so an invalid selection fails before any worker is started
+        self.artifacts = select_artifacts(artifacts)
+        self.page_range = page_range
+        self.max_chars = max_chars
+        self.max_tables = max_tables
+        self.ocr = ocr
+        self.cache_dir = cache_dir
+        self.table_layout = table_layout
+        self.dedupe_images = dedupe_images
+        self.quiet = quiet
+        self.manifest_path = manifest_path
+        self.metrics = metrics
+
+    @staticmethod
+    def storage_path_for(output_dir, file_path, storage_type="file"):
+        """
+        Output folder of one file, '<name>_<hash>_files', where the short hash of the absolute path keeps
+        same-named files from different folders apart. Export storage shares output_dir between all files instead.
+        """
+        if storage_type == "export":
+            return output_dir
+        path_hash = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()[:8]
+        return os.path.join(output_dir, f'{os.path.basename(file_path)}_{path_hash}_files')
+
+    @staticmethod
+    def blob_dir_for(output_dir):
+        """Image blob store shared by every file written under output_dir."""
+        return os.path.join(output_dir, 'blobs')
+
+    @staticmethod
+    def collect_files(source):
+        """
+        Resolve the batch source into a sorted list of supported file paths.
+
+        :param source: A directory (searched recursively), a glob pattern, or a manifest file
+                       listing one path per line (blank lines and '#' comments are ignored).
+                       A list of such sources is resolved into their union.
+        """
+        if isinstance(source, (list, tuple)):
+            return sorted({path for item in source for path in BatchProcessor.collect_files(item)})
+
+        if os.path.isdir(source):
+            paths = [os.path.join(root, name)
+                     for root, _, names in os.walk(source) for name in names]
+        elif any(char in source for char in "*?["):
+            paths = glob.glob(source, recursive=True)
+        elif os.path.isfile(source) and not source.lower().endswith(SUPPORTED_EXTENSIONS):
+            base_dir = os.path.dirname(os.path.abspath(source))
+            with open(source, encoding="utf-8") as manifest:
+                lines = [line.strip() for line in manifest]
+            # Relative entries are resolved against the manifest's own directory
+            paths = [os.path.join(base_dir, line) for line in lines if line and not line.startswith("#")]
+        else:
+            paths = [source]
+
+        return sorted(path for path in paths
+                      if path.lower().endswith(SUPPORTED_EXTENSIONS) and os.path.isfile(path))
+
+    def run_config(self):
+        """Settings that change the stored output; a manifest re-processes files stored with other settings."""
+        return run_config(self)
+
+    def run(self, source):
+        """
+        Process every file resolved from `source` and return a list of result dicts
+        with 'file_path', 'status' ('ok', 'failed', 'timeout', 'rejected' or 'skipped') and 'error'.
+        """
+        pending = self.collect_files(source)
+        skipped, manifest = [], None
+        if self.manifest_path:
+            from processing_manifest import ProcessingManifest
+            manifest = ProcessingManifest(self.manifest_path)
+            purged = manifest.purge_missing()
+            pending, skipped = manifest.plan(pending, self.run_config())
+        print(f"Batch: {len(pending)} file(s) to process with {self.workers} worker(s)"
+              + (f", {len(skipped)} unchanged" if skipped else ""))
+
+        results, suspects = self._run_pool(pending)
+
+        # Files that were in flight when a worker crashed are retried one at a time,
+        # so the document that actually crashed the worker is the only one marked as failed
+        for file_path in suspects:
+            retried, _ = self._run_pool([file_path], workers=1)
+            results.extend(retried or [{"file_path": file_path, "status": "failed",
+                                        "error": "Worker process crashed."}])
+
+        if self.storage_type == "export":
+            # Every worker has exited, so the table spools they left can be converted
+            from Storage.export_storage import ExportStorage
+            ExportStorage.finalize(self.output_dir)
+        if manifest is not None:
+            manifest.record_results(results, self.storage_type, self.run_config(),
+                                    lambda file_path: self.storage_path_for(self.output_dir, file_path,
+                                                                            self.storage_type))
+            manifest.close()
+            if self.dedupe_images and (purged or pending):
+                # Purged and re-processed files can leave images that nothing references any more
+                from processing_manifest import remove_unreferenced_blobs
+                remove_unreferenced_blobs(self.storage_type, self.output_dir, self.blob_dir_for(self.output_dir))
+        results = skipped + results
+        print_batch_summary(results)
+        return results
+
+    def _run_pool(self, file_paths, workers=None):
+        results, suspects = [], []
+        queue = list(reversed(file_paths))
+        executor = ProcessPoolExecutor(max_workers=workers or self.workers)
+        in_flight = {}
+        try:
+            while queue or in_flight:
+                # Keep the number of submitted files bounded
+                while queue and len(in_flight) < self.max_in_flight:
+                    file_path = queue.pop()
+                    future = executor.submit(_process_one, file_path, self.storage_type, self.output_dir,
+                                             self.timeout, self.pdf_engine, self.cache_dir,
+                                             self.table_layout, self.dedupe_images, self.quiet, self.ooxml_engine,
+                                             self.artifacts, self.page_range, self.max_chars, self.max_tables,
+                                             self.ocr, self.limits, self.metrics is not None)
+                    in_flight[future] = file_path
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                pool_broken = False
+                for future in done:
+                    file_path = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        if len(file_paths) == 1:
+                            result = {"file_path": file_path, "status": "failed",
+                                      "error": "Worker process crashed."}
+                        else:
+                            suspects.append(file_path)
+                            pool_broken = True
+                            continue
+                    worker_metrics = result.pop("metrics", None)
+                    if worker_metrics is not None:
+                        self.metrics.merge(worker_metrics)
+                    print(f"[{result['status'].upper()}] {file_path}")
+                    results.append(result)
+
+                if pool_broken and (queue or in_flight):
+                    # A crashed worker breaks the whole pool: collect what is left and start a new one
+                    suspects.extend(in_flight.values())
+                    in_flight = {}
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = ProcessPoolExecutor(max_workers=workers or self.workers)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        return results, suspects
@@ -0,0 +1,204 @@
+import os
+import sys
+import json
+import time
+import glob
+import argparse
+import platform
+import resource
+import tempfile
+import contextlib
+import multiprocessing
+from pathlib import Path
+
+# Add the parent directory to sys.path for module discovery
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.synthetic_documents import generate
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CORPUS = [str(REPO_ROOT / "test_files" / "pdf"), str(REPO_ROOT / "test_files" / "docx"),
+                  str(REPO_ROOT / "test_files" / "pptx"), str(REPO_ROOT / "Samples")]
+EXTRACTOR_METHODS = ("extract_text", "extract_metadata", "extract_links", "extract_images", "extract_tables")
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".pptx")
+
+
+def _peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _run_case(file_path, method, pdf_engine, results, ooxml_engine="default"):
+    """
+    Run one benchmark case in a fresh child process, so peak RSS and CPU time belong to this case alone.
+    Imports happen before the clock starts; the parse is part of every case, as it is for a real caller.
+    """
+    try:
+        from Data_extraction.file_extractor import FileDataExtractor
+        from Data_extraction.parsed_document import ParsedDocument
+        from file_processing import FileProcessor
+        from metrics import Metrics
+    except ImportError as e:
+        results.put({"wall_seconds": None, "cpu_seconds": None, "peak_rss_bytes": None, "rss_growth_bytes": None,
+                     "pages": None, "items": None, "error": f"ImportError: {e}", "metrics": None})
+        return
+
+    rss_before = _peak_rss_bytes()
+    metrics = Metrics()
+    error = None
+    items = None
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        if method == "process_file":
+            with tempfile.TemporaryDirectory() as output_dir, open(os.devnull, "w") as devnull, \
+                    contextlib.redirect_stdout(devnull):
+                file_type = os.path.splitext(file_path)[1][1:].lower()
+                FileProcessor.process_file(file_type, file_path, "file", output_dir, pdf_engine=pdf_engine,
+                                           metrics=metrics, ooxml_engine=ooxml_engine)
+        else:
+            with FileDataExtractor(file_path, pdf_engine=pdf_engine, metrics=metrics,
+                                   ooxml_engine=ooxml_engine) as extractor:
+                result = getattr(extractor, method)()
+                if method == "extract_text":
+                    items = len(result[0])  # Characters
+                elif isinstance(result, (list, dict)):
+                    items = len(result)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+    pages = None
+    try:
+        with ParsedDocument(file_path) as document:
+            pages = document.page_count
+    except Exception:
+        pass
+
+    results.put({
+        "wall_seconds": wall,
+        "cpu_seconds": cpu,
+        "peak_rss_bytes": _peak_rss_bytes(),
+        "rss_growth_bytes": _peak_rss_bytes() - rss_before,
+        "pages": pages,
+        "items": items,
+        "error": error,
+        "metrics": metrics.report(),
+    })
+
+
+def collect_corpus(paths):
+    """Expand directories and glob patterns into a sorted list of supported documents."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = glob.glob(os.path.join(path, "*"))
+        else:
+            candidates = glob.glob(path)
+        files.extend(candidate for candidate in candidates
+                     if os.path.isfile(candidate) and candidate.lower().endswith(SUPPORTED_EXTENSIONS))
+    return sorted(set(files))
+
+
+def benchmark_file(file_path, methods, pdf_engine="default", repeat=1, timeout=300, ooxml_engine="default"):
+    """
+    Benchmark every method on one file. Each run is a separate child process; with `repeat` > 1
+    the fastest run is kept (the least disturbed by the rest of the machine).
+
+    :return: One result dict per method.
+    """
+    context = multiprocessing.get_context("spawn")
+    size = os.path.getsize(file_path)
+    results = []
+    for method in methods:
+        runs = []
+        for _ in range(max(1, repeat)):
+            queue = context.Queue()
+            process = context.Process(target=_run_case, args=(file_path, method, pdf_engine, queue, ooxml_engine))
+            process.start()
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+                runs.append({"wall_seconds": None, "cpu_seconds": None, "peak_rss_bytes": None,
+                             "rss_growth_bytes": None, "pages": None, "items": None,
+                             "error": f"Timed out after {timeout}s", "metrics": None})
+            elif queue.empty():
+                runs.append({"wall_seconds": None, "cpu_seconds": None, "peak_rss_bytes": None,
+                             "rss_growth_bytes": None, "pages": None, "items": None,
+                             "error": f"Worker exited with code {process.exitcode}", "metrics": None})
+            else:
+                runs.append(queue.get())
+
+        timed = [run for run in runs if run["wall_seconds"] is not None]
+        best = min(timed, key=lambda run: run["wall_seconds"]) if timed else runs[0]
+        result = {"file": os.path.relpath(file_path, REPO_ROOT), "method": method,
+                  "pdf_engine": pdf_engine, "ooxml_engine": ooxml_engine, "bytes": size, **best}
+        result["pages_per_second"] = (best["pages"] / best["wall_seconds"]
+                                      if best["pages"] and best["wall_seconds"] else None)
+        result["mb_per_second"] = (size / (1024 * 1024) / best["wall_seconds"]
+                                   if best["wall_seconds"] else None)
+        results.append(result)
+        print(_format_result(result))
+    return results
+
+
+def _format_result(result):
+    if result["wall_seconds"] is None:
+        return f"{result['file']:<45} {result['method']:<17} {result['error']}"
+    status = f"  [{result['error']}]" if result["error"] else ""
+    return (f"{result['file']:<45} {result['method']:<17} "
+            f"wall {result['wall_seconds']:8.3f}s  cpu {result['cpu_seconds']:8.3f}s  "
+            f"rss {result['peak_rss_bytes'] / (1024 * 1024):7.1f}MB  "
+            f"{result['mb_per_second']:7.2f}MB/s{status}")
+
+
+def run_benchmarks(paths, methods, pdf_engine="default", repeat=1, timeout=300, ooxml_engine="default"):
+    """Benchmark every file in `paths` and return the JSON-serialisable report."""
+    files = collect_corpus(paths)
+    print(f"Benchmarking {len(files)} file(s), methods: {', '.join(methods)}")
+    results = []
+    for file_path in files:
+        results.extend(benchmark_file(file_path, methods, pdf_engine, repeat, timeout, ooxml_engine))
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pdf_engine": pdf_engine,
+        "ooxml_engine": ooxml_engine,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark FileDataExtractor and FileProcessor.process_file.")
+    parser.add_argument("paths", nargs="*", default=DEFAULT_CORPUS,
+                        help="Files, directories or glob patterns (default: test_files/* and Samples/)")
+    parser.add_argument("--methods", default=",".join(EXTRACTOR_METHODS + ("process_file",)),
+                        help="Comma-separated methods to run")
+    parser.add_argument("--pdf-engine", default="default", help="PDF engine passed to FileDataExtractor")
+    parser.add_argument("--ooxml-engine", default="default", help="DOCX/PPTX engine passed to FileDataExtractor")
+    parser.add_argument("--synthetic", default=None,
+                        help="Comma-separated page counts of synthetic documents to add, e.g. 10,100,1000")
+    parser.add_argument("--synthetic-dir", default=str(REPO_ROOT / "benchmarks" / "synthetic"),
+                        help="Where synthetic documents are generated (reused between runs)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; the fastest is reported")
+    parser.add_argument("--timeout", type=int, default=300, help="Seconds before a case is abandoned")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON report path")
+    args = parser.parse_args(argv)
+
+    paths = list(args.paths)
+    if args.synthetic:
+        sizes = [int(size) for size in args.synthetic.split(",") if size.strip()]
+        paths.extend(generate(args.synthetic_dir, sizes))
+
+    report = run_benchmarks(paths, [method.strip() for method in args.methods.split(",") if method.strip()],
+                            args.pdf_engine, args.repeat, args.timeout, args.ooxml_engine)
+    with open(args.output, "w", encoding="utf-8") as report_file:
+        json.dump(report, report_file, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
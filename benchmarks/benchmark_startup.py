@@ -0,0 +1,99 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# Modules that should only be imported by the jobs that need them
+HEAVY_MODULES = ("fitz", "pdfplumber", "PyPDF2", "PIL", "docx", "pptx", "mysql.connector", "tabulate", "sqlite3")
+
+# Each scenario is the body of a fresh interpreter; it reports the heavy modules it ended up importing
+SCENARIOS = {
+    "import_main": "import main",
+    "import_file_processing": "import file_processing",
+    "import_batch_processing": "import batch_processing",
+    "docx_to_file": (
+        "import tempfile, contextlib, io\n"
+        "from file_processing import FileProcessor\n"
+        "with tempfile.TemporaryDirectory() as out, contextlib.redirect_stdout(io.StringIO()):\n"
+        "    FileProcessor.process_file('docx', {docx!r}, 'file', out)\n"
+    ),
+    "pdf_to_file": (
+        "import tempfile, contextlib, io\n"
+        "from file_processing import FileProcessor\n"
+        "with tempfile.TemporaryDirectory() as out, contextlib.redirect_stdout(io.StringIO()):\n"
+        "    FileProcessor.process_file('pdf', {pdf!r}, 'file', out)\n"
+    ),
+}
+REPORT_LOADED = (
+    "\nimport sys, json\n"
+    f"print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))\n"
+)
+
+
+def run_scenario(code, repeat):
+    """
+    Run `code` in `repeat` fresh interpreters and return the wall times and the heavy modules loaded.
+    Interpreter startup itself is included, since that is what a short-lived job pays.
+    """
+    timings = []
+    loaded = None
+    error = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, "-c", code + REPORT_LOADED], cwd=REPO_ROOT,
+                                   capture_output=True, text=True)
+        timings.append(time.perf_counter() - start)
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"
+            break
+        loaded = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {
+        "runs": len(timings),
+        "median_seconds": statistics.median(timings),
+        "min_seconds": min(timings),
+        "heavy_modules_loaded": loaded,
+        "error": error,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure interpreter startup and import cost of the CLI.")
+    parser.add_argument("--repeat", type=int, default=10, help="Fresh interpreters per scenario")
+    parser.add_argument("--docx", default=str(REPO_ROOT / "test_files" / "docx" / "small.docx"))
+    parser.add_argument("--pdf", default=str(REPO_ROOT / "test_files" / "pdf" / "small.pdf"))
+    parser.add_argument("--output", default="startup_results.json", help="JSON report path")
+    args = parser.parse_args(argv)
+
+    # Baseline: an interpreter that imports nothing from this repository
+    scenarios = {"python_baseline": "pass"}
+    scenarios.update({name: code.format(docx=args.docx, pdf=args.pdf) for name, code in SCENARIOS.items()})
+
+    results = {}
+    for name, code in scenarios.items():
+        results[name] = run_scenario(code, max(1, args.repeat))
+        result = results[name]
+        status = f"  [{result['error']}]" if result["error"] else ""
+        print(f"{name:<25} median {result['median_seconds'] * 1000:8.1f}ms  "
+              f"loaded: {', '.join(result['heavy_modules_loaded'] or []) or '-'}{status}")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as report_file:
+        json.dump(report, report_file, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
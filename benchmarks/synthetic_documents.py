@@ -0,0 +1,114 @@
+import os
+import sys
+import zlib
+import struct
+from pathlib import Path
+
+# Add the parent directory to sys.path for module discovery
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+
+def tiny_png(width=64, height=48, color=(200, 60, 40)):
+    """Build a solid-colour RGB PNG without any imaging library."""
+    def chunk(kind, payload):
+        return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", zlib.crc32(kind + payload))
+
+    row = b"\x00" + bytes(color) * width
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(row * height))
+            + chunk(b"IEND", b""))
+
+
+PARAGRAPH = ("Synthetic benchmark paragraph {index}. The quick brown fox jumps over the lazy dog "
+             "while the extractor measures how its cost grows with the size of the document.")
+TABLE_ROWS = [["Quarter", "Revenue", "Cost"], ["Q1", "100", "80"], ["Q2", "120", "85"], ["Q3", "140", "90"]]
+LINK = "https://example.com/page/{index}"
+
+
+def make_pdf(path, pages):
+    """PDF with text, a link, an image and a ruled table on every page."""
+    import fitz
+    image = tiny_png()
+    doc = fitz.open()
+    for index in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), PARAGRAPH.format(index=index), fontsize=10)
+        page.insert_link({"kind": fitz.LINK_URI, "from": fitz.Rect(72, 90, 300, 105),
+                          "uri": LINK.format(index=index)})
+        page.insert_image(fitz.Rect(72, 120, 136, 168), stream=image)
+        # Ruled 3x4 table
+        top, left, row_height, col_width = 200, 72, 20, 120
+        for row_index, row in enumerate(TABLE_ROWS):
+            for col_index, value in enumerate(row):
+                cell = fitz.Rect(left + col_index * col_width, top + row_index * row_height,
+                                 left + (col_index + 1) * col_width, top + (row_index + 1) * row_height)
+                page.draw_rect(cell, color=(0, 0, 0), width=0.5)
+                page.insert_text((cell.x0 + 4, cell.y1 - 6), value, fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def make_docx(path, pages):
+    """DOCX with one page break, paragraph, image and table per 'page'."""
+    import io
+    from docx import Document
+    from docx.enum.text import WD_BREAK
+    image = tiny_png()
+    document = Document()
+    for index in range(pages):
+        document.add_paragraph(PARAGRAPH.format(index=index))
+        document.add_picture(io.BytesIO(image))
+        table = document.add_table(rows=len(TABLE_ROWS), cols=len(TABLE_ROWS[0]))
+        for row_index, row in enumerate(TABLE_ROWS):
+            for col_index, value in enumerate(row):
+                table.cell(row_index, col_index).text = value
+        document.add_paragraph().add_run().add_break(WD_BREAK.PAGE)
+    document.save(path)
+
+
+def make_pptx(path, slides):
+    """PPTX with a text box carrying a link, an image and a table on every slide."""
+    import io
+    from pptx import Presentation
+    from pptx.util import Inches
+    image = tiny_png()
+    presentation = Presentation()
+    layout = presentation.slide_layouts[6]  # Blank
+    for index in range(slides):
+        slide = presentation.slides.add_slide(layout)
+        text_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(8), Inches(1))
+        text_box.text_frame.text = PARAGRAPH.format(index=index)
+        text_box.click_action.hyperlink.address = LINK.format(index=index)
+        slide.shapes.add_picture(io.BytesIO(image), Inches(0.5), Inches(1.7))
+        shape = slide.shapes.add_table(len(TABLE_ROWS), len(TABLE_ROWS[0]), Inches(0.5), Inches(3), Inches(6), Inches(2))
+        for row_index, row in enumerate(TABLE_ROWS):
+            for col_index, value in enumerate(row):
+                shape.table.cell(row_index, col_index).text = value
+    presentation.save(path)
+
+
+def generate(output_dir, sizes=(10, 100, 1000)):
+    """
+    Generate synthetic PDF, DOCX and PPTX documents of each size (pages or slides).
+    Existing files are reused, so repeated benchmark runs do not pay for generation.
+
+    :param output_dir: Directory receiving 'synthetic_<size>.<ext>' files.
+    :param sizes: Page/slide counts to generate.
+    :return: List of generated file paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    makers = {'pdf': make_pdf, 'docx': make_docx, 'pptx': make_pptx}
+    paths = []
+    for size in sizes:
+        for extension, maker in makers.items():
+            path = os.path.join(output_dir, f"synthetic_{size}.{extension}")
+            if not os.path.exists(path):
+                print(f"Generating {path}")
+                maker(path, size)
+            paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    generate(sys.argv[1] if len(sys.argv) > 1 else "./benchmarks/synthetic")
@@ -1,46 +1,121 @@
 from Loaders.file_loader import FileLoader
 from Data_extraction.file_extractor import FileDataExtractor
-from Storage.file_Storage import FileStorage
-from Storage.SQL_storage import MySQLStorage
-from tabulate import tabulate
+from Data_extraction.result_cache import ExtractionCache
 
 
 class FileProcessor:
-    def __init__(self, file_path):
+    def __init__(self, file_path, pdf_engine="default", page_workers=None, cache=None, include_image_bytes=True,
+                 metrics=None, ooxml_engine="default", artifacts=None, page_range=None, max_chars=None,
+                 max_tables=None, ocr=None, limits=None):
+        """
+        :param file_path: Path of the PDF, DOCX or PPTX file.
+        :param cache: Optional ExtractionCache; None bypasses caching entirely.
+        :param include_image_bytes: When False, images are an inventory only; storage fetches the bytes on demand.
+        :param metrics: Optional Metrics shared by the loader, extractor and storage of this file.
+        :param artifacts: Artifact types to extract and store (see select_artifacts); the rest is never computed.
+        :param page_range: Optional zero-based, half-open (start, stop) range of the pages to extract.
+        :param max_chars: Optional budget: extraction stops after this many characters of text.
+        :param max_tables: Optional budget: extraction stops after this many tables.
+        :param ocr: Optional PageOCR recognising the text of PDF pages without a text layer.
+        :param limits: Optional ResourceLimits; documents over its page, OOXML size or image byte limits
+                       are rejected.
+        """
         self.file_path = file_path
-        self.extractor = FileDataExtractor(self.file_path)
+        self.extractor = FileDataExtractor(self.file_path, pdf_engine=pdf_engine, page_workers=page_workers,
+                                           include_image_bytes=include_image_bytes, metrics=metrics,
+                                           ooxml_engine=ooxml_engine, artifacts=artifacts, page_range=page_range,
+                                           max_chars=max_chars, max_tables=max_tables, ocr=ocr, limits=limits)
+        self.cache = cache
+        self._cache_key = None
 
     def load_data(self):
-        # Load the file content using the loader
-        content = FileLoader.load_file(self.file_path)  # Ensure file_path is passed here as well
+        # Load the file content using the loader, reusing the extractor's parsed document.
+        # The single-pass and page-parallel PDF paths and the streaming OOXML engine already produce the text,
+        # so no extra PyPDF2 pass or object model is built for it. The loader reads whole documents,
+        # so a page range, character budget or OCR is also served by the extractor.
+        cached = self._cached_data()
+        if cached is not None:
+            content, _ = cached['text']
+        elif (self.extractor.file_extension == '.pdf' and
+              (self.extractor.pdf_engine == "single_pass" or (self.extractor.page_workers or 1) > 1)) or \
+                (self.extractor.file_extension != '.pdf' and self.extractor.ooxml_engine == "streaming") or \
+                self.extractor.page_range is not None or self.extractor.max_chars is not None or \
+                self.extractor.ocr is not None:
+            content, _ = self.extractor.extract_text()
+        else:
+            content = FileLoader.load_file(self.file_path, self.extractor.document, self.extractor.metrics)
         print(content)
         return content
 
     def extract_data(self):
-        # Extract and return data such as text, links, images, and tables
-        data = {
-            'text': self.extractor.extract_text(),
-            'links': self.extractor.extract_links(),
-            'images': self.extractor.extract_images(),
-            'tables': self.extractor.extract_tables(),
-        }
+        # Extract and return the selected data (text, metadata, links, images, tables),
+        # served from the cache when this exact file content was extracted before
+        cached = self._cached_data()
+        if cached is not None:
+            return cached
+
+        data = self.extractor.extract_selected()
+        if self.cache is not None:
+            self.cache.put(self._get_cache_key(), data)
         return data
 
-    def store_data(self, storage_type="file", storage_path=None):
-        # Handle file storage or SQL storage based on user choice
+    def _get_cache_key(self):
+        # Hashing the file is the expensive part of a lookup, so the key is computed once
+        if self._cache_key is None:
+            self._cache_key = self.cache.key(self.file_path, self.extractor.cache_config(),
+                                             digest=self.extractor.document.content_hash)
+        return self._cache_key
+
+    def _cached_data(self):
+        if self.cache is None:
+            return None
+        return self.cache.get(self._get_cache_key())
+
+    def store_data(self, storage_type="file", storage_path=None, data=None, stream=False, table_layout="per_table",
+                   blob_dir=None, dedupe_images=False):
+        """
+        Handle file, export or SQL storage based on user choice.
+
+        :param storage_type: 'file', 'export' or 'sql'.
+        :param storage_path: Output folder of file storage, or the shared shard folder of export storage
+                             (see ExportStorage).
+        :param data: Already extracted data, so the extractors do not run a second time.
+        :param stream: Consume the extractor page by page instead (see FileDataExtractor.streams_pages()).
+        :param table_layout: MySQLStorage table layout, 'per_table' or 'normalized'.
+        :param blob_dir: Optional BlobStore directory shared by the file storage of all documents.
+        :param dedupe_images: Store each distinct image once in SQL storage.
+        """
+        # Storage backends are imported on first use, so a file-storage run never loads the MySQL driver
+        if stream and not self.extractor.streams_pages():
+            raise ValueError("stream=True needs the default PDF engine and a single page worker.")
         if storage_type == "file":
             if not storage_path:
                 raise ValueError("Storage path is required for file storage.")
-            storage = FileStorage(self.extractor, storage_path)
+            from Storage.file_Storage import FileStorage
+            storage = FileStorage(self.extractor, storage_path, blob_dir=blob_dir)
+        elif storage_type == "export":
+            if not storage_path:
+                raise ValueError("Storage path is required for export storage.")
+            from Storage.export_storage import ExportStorage
+            storage = ExportStorage(self.extractor, storage_path)
         else:
-            storage = MySQLStorage(self.extractor)
+            from Storage.SQL_storage import MySQLStorage
+            storage = MySQLStorage(self.extractor, table_layout=table_layout, dedupe_images=dedupe_images)
 
         # Save the extracted data and close SQL storage if used
-        storage.save()
-        if storage_type == "sql":
-            storage.close()
+        try:
+            if stream:
+                storage.save_stream()
+            else:
+                storage.save(data)
+        finally:
+            # Return the pooled connection even when the save fails
+            if storage_type == "sql":
+                storage.close()
 
     def display_extracted_data(self, file_type, data):
+        from tabulate import tabulate
+
         def display_metadata(metadata, allowed_keys):
             for key, value in metadata.items():
                 if key in allowed_keys:
@@ -48,9 +123,9 @@ class FileProcessor:
 
         print(f"\n========== Extracted Data from {file_type.upper()} ==========\n")
 
-        # Display text
-        if 'text' in data:
-            text, metadata = data['text']
+        # Display text; either part is None when it was not selected
+        text, metadata = data.get('text', (None, None))
+        if text is not None:
             print("----- Extracted Text -----\n")
             print(text[:500] + '...' if len(text) > 500 else text)
 
@@ -60,15 +135,16 @@ class FileProcessor:
             'pptx': ['author', 'title', 'slide_count', 'created', 'last_modified_by', 'company', 'category'],
             'docx': ['author', 'title', 'revision', 'created', 'last_modified_by', 'word_count', 'character_count']
         }
-        display_metadata(metadata, metadata_keys.get(file_type, []))
+        if metadata is not None:
+            display_metadata(metadata, metadata_keys.get(file_type, []))
 
         # Display images with metadata according to file type
         if 'images' in data and data['images']:
             print(f"----- Extracted Images ({file_type.upper()}) -----\n")
             location_key = {'pptx': 'slide_number', 'pdf': 'page_number', 'docx': 'section'}  # updated key from 'pptx' to 'ppt'
             for idx, image in enumerate(data['images']):
-                print(f"Image {idx + 1}: Format: {image['image_format']}, Resolution: {image['image_resolution']}, "
-                    f"{location_key[file_type].capitalize()}: {image.get(location_key[file_type], 'N/A')}")
+                print(f"Image {idx + 1}: Format: {image.image_format}, Resolution: {image.image_resolution}, "
+                    f"{location_key[file_type].capitalize()}: {image.location if image.location is not None else 'N/A'}")
             print("\n")
 
         # Display links
@@ -76,7 +152,7 @@ class FileProcessor:
             print("----- Extracted Links -----\n")
             location_key = {'pptx': 'slide_number', 'pdf': 'page_number', 'docx': 'section'}
             for link in data['links']:
-                print(f"URL: {link['url']} ({location_key[file_type].capitalize()} {link.get(location_key[file_type], 'N/A')})")
+                print(f"URL: {link.url} ({location_key[file_type].capitalize()} {link.location if link.location is not None else 'N/A'})")
             print("\n")
 
         # Display tables
@@ -90,14 +166,49 @@ class FileProcessor:
         print(f"========== End of Extraction for {file_type.upper()} ==========\n")
 
     @staticmethod
-    def process_file(file_type, file_path, storage_type="file", storage_path=None):
-        # Create a FileProcessor instance to handle the file processing
-        processor = FileProcessor(file_path)
+    def process_file(file_type, file_path, storage_type="file", storage_path=None, pdf_engine="default",
+                     page_workers=None, stream=False, cache_dir=None, table_layout="per_table",
+                     blob_dir=None, dedupe_images=False, metrics=None, display=False, ooxml_engine="default",
+                     artifacts=None, page_range=None, max_chars=None, max_tables=None, ocr=None, limits=None,
+                     data=None):
+        """
+        Create a FileProcessor for the file, then load, extract, display and store its data.
+
+        :param cache_dir: Directory of the ExtractionCache, or None to bypass caching.
+        :param metrics: Optional Metrics collecting the stage timings and counters.
+        :param display: Print the loaded text and extracted data; tabulating large tables to the terminal
+                        costs real time in batch runs.
+        :param artifacts: Artifact types to extract and store (see select_artifacts); the rest is never computed.
+        :param page_range: Optional zero-based, half-open (start, stop) range of the pages to extract.
+        :param max_chars: Optional budget: extraction stops after this many characters of text.
+        :param max_tables: Optional budget: extraction stops after this many tables.
+        :param ocr: Optional PageOCR recognising the text of PDF pages without a text layer.
+        :param limits: Optional ResourceLimits; only its size limits are checked here, run this under
+                       run_sandboxed() for the time and memory limits.
+        :param data: Data already extracted elsewhere (a sandboxed child process), stored as-is.
+        """
+        cache = ExtractionCache(cache_dir) if cache_dir else None
+        processor = FileProcessor(file_path, pdf_engine=pdf_engine, page_workers=page_workers, cache=cache,
+                                  metrics=metrics, ooxml_engine=ooxml_engine, artifacts=artifacts,
+                                  page_range=page_range, max_chars=max_chars, max_tables=max_tables, ocr=ocr,
+                                  limits=limits)
         print(f"Processing {file_type.upper()} file: {file_path}")
 
-        # Load, extract, display, and store data
-        processor.load_data()
-        data = processor.extract_data()
-        processor.display_extracted_data(file_type, data)
-        processor.store_data(storage_type, storage_path)
+        # Load, extract, display, and store data; the document is parsed once for all steps
+        try:
+            if stream and data is None:
+                # Streaming keeps memory bounded, so nothing is materialised for display
+                processor.store_data(storage_type, storage_path, stream=True, table_layout=table_layout,
+                                     blob_dir=blob_dir, dedupe_images=dedupe_images)
+            else:
+                if display and processor.extractor.wants("text"):
+                    processor.load_data()
+                if data is None:
+                    data = processor.extract_data()
+                if display:
+                    processor.display_extracted_data(file_type, data)
+                processor.store_data(storage_type, storage_path, data, table_layout=table_layout,
+                                     blob_dir=blob_dir, dedupe_images=dedupe_images)
+        finally:
+            processor.extractor.close()
         print(f"Data Stored Successfully ({storage_type.upper()})\n\n\n")
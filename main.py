@@ -1,29 +1,341 @@
 import os
+import sys
+import json
+import argparse
+import contextlib
 from file_processing import FileProcessor
+from Data_extraction.file_extractor import ARTIFACTS, select_artifacts
+
+# Extraction results are cached here, so re-running over unchanged files skips extraction
+CACHE_DIR = './.extraction_cache'
+# Texts of OCR'd page images, shared by every run (see PageOCR)
+OCR_CACHE_DIR = os.path.join(CACHE_DIR, 'ocr')
+OUTPUT_DIR = './output'
+# Default ProcessingManifest database of --incremental runs, inside the output directory
+MANIFEST_NAME = 'processed_files.sqlite'
+SUPPORTED_FILE_TYPES = ('pdf', 'docx', 'pptx')
+# Storage layout of every run, whatever the number of files, so one output or database never mixes two;
+# --table-layout normalized and --dedupe-images switch to the alternatives
+TABLE_LAYOUT = 'per_table'
+DEDUPE_IMAGES = False
+
+
+def page_range_arg(value):
+    """
+    Parse a one-based, inclusive page selection ('3', '1-5', '10-', '-4') into the zero-based,
+    half-open (start, stop) page range of FileDataExtractor.
+    """
+    first, separator, last = value.partition("-")
+    if not first.strip() and not last.strip():
+        raise argparse.ArgumentTypeError(f"invalid page range '{value}', expected e.g. 3, 1-5 or 10-")
+    try:
+        start = int(first) if first.strip() else 1
+        stop = (int(last) if last.strip() else sys.maxsize) if separator else start
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid page range '{value}', expected e.g. 3, 1-5 or 10-")
+    if start < 1:
+        raise argparse.ArgumentTypeError(f"invalid page range '{value}', pages are numbered from 1")
+    if stop < start:
+        raise argparse.ArgumentTypeError(f"invalid page range '{value}', the last page comes before the first")
+    return start - 1, stop
+
+
+def budget_arg(value):
+    """Parse a non-negative --max-chars/--max-tables budget."""
+    try:
+        budget = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid budget '{value}', expected a whole number")
+    if budget < 0:
+        raise argparse.ArgumentTypeError(f"invalid budget '{value}', it must not be negative")
+    return budget
+
+
+def workers_arg(value):
+    """Parse a positive --workers count."""
+    try:
+        workers = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid worker count '{value}', expected a whole number")
+    if workers < 1:
+        raise argparse.ArgumentTypeError(f"invalid worker count '{value}', it must be at least 1")
+    return workers
+
+
+def megabytes_arg(value):
+    """Parse a positive --max-memory/--max-ooxml-mb/--max-image-mb size in megabytes into bytes."""
+    try:
+        megabytes = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size '{value}', expected a number of megabytes")
+    if megabytes <= 0:
+        raise argparse.ArgumentTypeError(f"invalid size '{value}', it must be positive")
+    return int(megabytes * 1024 * 1024)
+
+
+def build_limits(args):
+    """The ResourceLimits selected on the command line, or None when no limit is set."""
+    if args.max_memory is None and args.max_pages is None and args.max_ooxml_mb is None \
+            and args.max_image_mb is None:
+        return None
+    from resource_limits import ResourceLimits
+    return ResourceLimits(timeout=args.timeout, max_memory=args.max_memory, max_pages=args.max_pages,
+                          max_ooxml_bytes=args.max_ooxml_mb, max_image_bytes=args.max_image_mb)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Extract text, metadata, links, images and tables from PDF, DOCX and PPTX files.",
+        epilog="Without any path, the file path and storage type are asked for interactively."
+    )
+    parser.add_argument("paths", nargs="*",
+                        help="Files, directories, glob patterns or manifests (.txt/.lst, one path per line)")
+    parser.add_argument("--storage", choices=("file", "export", "sql"), default="file",
+                        help="Where extracted data is stored: one folder per file, shared sharded files, or MySQL")
+    parser.add_argument("--output", default=OUTPUT_DIR, help="Root directory for file and export storage")
+    parser.add_argument("--workers", type=workers_arg, default=1,
+                        help="Worker processes; several files or workers > 1 run as a batch")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Overlap extraction and storage in threads instead of worker processes")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Per-file timeout in seconds (not with --pipeline)")
+    parser.add_argument("--table-layout", choices=("normalized", "per_table"), default=TABLE_LAYOUT,
+                        help="SQL tables layout: all tables in extracted_tables/table_cells, or one SQL table per table")
+    parser.add_argument("--dedupe-images", action="store_true", default=DEDUPE_IMAGES,
+                        help="Store each distinct image once, in <output>/blobs or the image_blobs table")
+    parser.add_argument("--pdf-engine", choices=("default", "single_pass"), default="default")
+    parser.add_argument("--ooxml-engine", choices=("default", "streaming"), default="default",
+                        help="DOCX/PPTX backend: the python-docx/python-pptx object model, or XML streamed from the zip")
+    parser.add_argument("--include", default=None,
+                        help=f"Comma-separated artifacts to extract and store (default: all of {','.join(ARTIFACTS)})")
+    parser.add_argument("--exclude", default=None, help="Comma-separated artifacts to skip, e.g. images,tables")
+    parser.add_argument("--pages", type=page_range_arg, default=None,
+                        help="Only extract these pages or slides, e.g. 1-5 (DOCX pages follow its page breaks)")
+    parser.add_argument("--max-chars", type=budget_arg, default=None,
+                        help="Stop extracting text after this many characters")
+    parser.add_argument("--max-tables", type=budget_arg, default=None,
+                        help="Stop extracting tables after this many tables")
+    parser.add_argument("--ocr", action="store_true",
+                        help="OCR PDF pages without a text layer with Tesseract (needs pytesseract and tesseract)")
+    parser.add_argument("--ocr-workers", type=int, default=1,
+                        help="OCR worker processes per document (0 for all CPUs)")
+    parser.add_argument("--ocr-dpi", type=int, default=200, help="Resolution pages are rendered at for OCR")
+    parser.add_argument("--ocr-lang", default="eng", help="Tesseract languages, e.g. eng+deu")
+    parser.add_argument("--max-memory", type=megabytes_arg, default=None,
+                        help="Address-space ceiling in MB of the sandboxed process handling each file (libraries included; "
+                             "not with --pipeline)")
+    parser.add_argument("--max-pages", type=budget_arg, default=None,
+                        help="Reject documents with more pages or slides than this")
+    parser.add_argument("--max-ooxml-mb", type=megabytes_arg, default=None,
+                        help="Reject DOCX/PPTX files that decompress to more than this many MB (zip bombs)")
+    parser.add_argument("--max-image-mb", type=megabytes_arg, default=None,
+                        help="Reject documents holding more than this many MB of images")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the extraction cache")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only process new or changed files, and remove the outputs of deleted ones")
+    parser.add_argument("--manifest", default=None,
+                        help="Manifest database used by --incremental (default: <output>/processed_files.sqlite)")
+    parser.add_argument("--display", action="store_true",
+                        help="Print the extracted data of every file (single-file runs only)")
+    parser.add_argument("--format", choices=("text", "json", "ndjson"), default="text",
+                        help="Format of the per-file results written to stdout")
+    parser.add_argument("--quiet", action="store_true", help="Suppress progress messages")
+    parser.add_argument("--metrics", default=None,
+                        help="Write stage timings and counters as JSON to this path")
+    parser.add_argument("--prometheus", default=None,
+                        help="Write the same metrics in Prometheus textfile format to this path")
+    return parser
+
+
+def collect_paths(parser, paths):
+    """Resolve the command-line paths into supported files, stopping with an error on invalid input."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path) or any(char in path for char in "*?[") \
+                or os.path.splitext(path)[1].lower() in ('.txt', '.lst'):
+            from batch_processing import BatchProcessor
+            resolved = BatchProcessor.collect_files(path)
+            if not resolved:
+                parser.error(f"No PDF, DOCX or PPTX files found in '{path}'.")
+            files.extend(resolved)
+        elif not os.path.exists(path):
+            parser.error(f"File does not exist: {path}")
+        elif os.path.splitext(path)[1][1:].lower() not in SUPPORTED_FILE_TYPES:
+            parser.error(f"Unsupported file type: {path}. Only PDF, DOCX, and PPTX files are supported.")
+        else:
+            files.append(path)
+    # Keep the command-line order, dropping files named twice
+    return list(dict.fromkeys(files))
+
+
+def run(args, files, metrics):
+    """Process `files` according to the parsed arguments and return one result dict per file."""
+    from batch_processing import BatchProcessor
+    cache_dir = None if args.no_cache else CACHE_DIR
+    manifest_path = None
+    if args.incremental:
+        manifest_path = args.manifest or os.path.join(args.output, MANIFEST_NAME)
+
+    if args.pipeline:
+        from pipeline import ExtractionPipeline
+        return ExtractionPipeline(storage_type=args.storage, output_dir=args.output, extract_workers=args.workers,
+                                  store_workers=args.workers, pdf_engine=args.pdf_engine,
+                                  ooxml_engine=args.ooxml_engine, artifacts=args.artifacts, page_range=args.pages,
+                                  max_chars=args.max_chars, max_tables=args.max_tables, ocr=args.ocr_engine,
+                                  limits=args.limits, cache_dir=cache_dir, metrics=metrics,
+                                  table_layout=args.table_layout, dedupe_images=args.dedupe_images,
+                                  manifest_path=manifest_path).run(files)
+
+    # Incremental runs go through the batch runner, which owns the manifest bookkeeping,
+    # and so do runs with limits or a timeout, which need its workers
+    if len(files) > 1 or args.workers != 1 or manifest_path or args.limits or args.timeout is not None:
+        return BatchProcessor(storage_type=args.storage, output_dir=args.output, workers=args.workers,
+                              timeout=args.timeout, pdf_engine=args.pdf_engine, table_layout=args.table_layout,
+                              dedupe_images=args.dedupe_images,
+                              ooxml_engine=args.ooxml_engine, artifacts=args.artifacts, page_range=args.pages,
+                              max_chars=args.max_chars, max_tables=args.max_tables, ocr=args.ocr_engine,
+                              limits=args.limits, cache_dir=cache_dir, metrics=metrics,
+                              quiet=args.quiet or args.format != "text", manifest_path=manifest_path).run(files)
+
+    # A single file is processed in this process, with the original per-file output layout
+    file_path = files[0]
+    try:
+        FileProcessor.process_file(
+            file_type=os.path.splitext(file_path)[1][1:].lower(),
+            file_path=file_path,
+            storage_type=args.storage,
+            storage_path=BatchProcessor.storage_path_for(args.output, file_path, args.storage),
+            pdf_engine=args.pdf_engine,
+            ooxml_engine=args.ooxml_engine,
+            artifacts=args.artifacts,
+            page_range=args.pages,
+            max_chars=args.max_chars,
+            max_tables=args.max_tables,
+            ocr=args.ocr_engine,
+            cache_dir=cache_dir,
+            table_layout=args.table_layout,
+            blob_dir=BatchProcessor.blob_dir_for(args.output) if args.dedupe_images else None,
+            dedupe_images=args.dedupe_images,
+            metrics=metrics,
+            display=args.display
+        )
+        if args.storage == "export":
+            from Storage.export_storage import ExportStorage
+            ExportStorage.finalize(args.output)
+        return [{"file_path": file_path, "status": "ok", "error": None}]
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        print(f"[FAILED] {file_path}: {error}")
+        return [{"file_path": file_path, "status": "failed", "error": error}]
+
+
+def write_results(args, results):
+    from batch_processing import BatchProcessor
+    for result in results:
+        result["output"] = (BatchProcessor.storage_path_for(args.output, result["file_path"], args.storage)
+                            if args.storage != "sql" and result["status"] in ("ok", "skipped") else None)
+
+    if args.format == "json":
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    elif args.format == "ndjson":
+        for result in results:
+            sys.stdout.write(json.dumps(result) + "\n")
+    # In text format the progress messages already reported every file
+
 
 class Main:
-    def main(self):
+    def main(self, argv=None):
+        parser = build_parser()
+        args = parser.parse_args(argv)
+        if not args.paths:
+            return self.interactive()
+
+        if args.pipeline and (args.timeout is not None or args.max_memory is not None):
+            # Pipeline threads share one process that cannot be interrupted or capped per file,
+            # so these limits would silently not apply
+            parser.error("--timeout and --max-memory are not supported with --pipeline; "
+                         "run without --pipeline to sandbox each file.")
+        files = collect_paths(parser, args.paths)
+        try:
+            args.artifacts = select_artifacts(args.include, args.exclude)
+        except ValueError as e:
+            parser.error(str(e))
+        args.limits = build_limits(args)
+        args.ocr_engine = None
+        if args.ocr:
+            from Data_extraction.ocr import PageOCR
+            args.ocr_engine = PageOCR(workers=args.ocr_workers or None, dpi=args.ocr_dpi, languages=args.ocr_lang,
+                                      cache_dir=None if args.no_cache else OCR_CACHE_DIR)
+        metrics = None
+        if args.metrics or args.prometheus:
+            from metrics import Metrics
+            metrics = Metrics()
+
+        # Progress messages never mix with machine-readable results: they go to stderr,
+        # or nowhere with --quiet
+        with contextlib.ExitStack() as stack:
+            if args.quiet:
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+            elif args.format != "text":
+                stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+            results = run(args, files, metrics)
+
+        write_results(args, results)
+        if args.metrics:
+            metrics.write_json(args.metrics)
+        if args.prometheus:
+            metrics.write_prometheus(args.prometheus)
+        return 0 if all(result["status"] in ("ok", "skipped") for result in results) else 1
+
+    def interactive(self):
         filePath = input("Enter File Path : ")
         storage_type = input("Enter the storage type (sql or file): ")
 
+        # A directory, glob pattern or manifest (.txt/.lst, one path per line) runs in batch mode
+        if os.path.isdir(filePath) or any(char in filePath for char in "*?[") \
+                or os.path.splitext(filePath)[1].lower() in ('.txt', '.lst'):
+            workers = input("Enter the number of worker processes (blank for all CPUs): ").strip()
+            # Process pools are only loaded for batch runs
+            from batch_processing import BatchProcessor
+            BatchProcessor(
+                storage_type=storage_type,
+                output_dir=OUTPUT_DIR,
+                workers=int(workers) if workers else None,
+                cache_dir=CACHE_DIR,
+                table_layout=TABLE_LAYOUT,
+                dedupe_images=DEDUPE_IMAGES
+            ).run(filePath)
+            return 0
+
         # Extract the file extension
         file_type = os.path.splitext(filePath)[1][1:]  # Extracts the file extension
         print(file_type)
         if not os.path.exists(filePath):
             print("File does not exist.")  # File doesn't exist
+            return 2
         # Check file extension and validate type
-        if file_type in ['pdf', 'docx', 'pptx']:
+        if file_type in SUPPORTED_FILE_TYPES:
             print("File is valid.")  # File exists and is valid
         else:
             print("Unsupported file type. Only PDF, DOCX, and PPTX files are supported.")
+            return 2
 
+        # Output folders are named as in batch runs, so both can share OUTPUT_DIR
+        from batch_processing import BatchProcessor
         FileProcessor.process_file(
-            file_type=file_type, 
-            file_path=filePath, 
-            storage_type=storage_type, 
-            storage_path=f'./output/{os.path.basename(filePath)}_files'
+            file_type=file_type,
+            file_path=filePath,
+            storage_type=storage_type,
+            storage_path=BatchProcessor.storage_path_for(OUTPUT_DIR, filePath, storage_type),
+            cache_dir=CACHE_DIR,
+            table_layout=TABLE_LAYOUT,
+            blob_dir=BatchProcessor.blob_dir_for(OUTPUT_DIR) if DEDUPE_IMAGES else None,
+            dedupe_images=DEDUPE_IMAGES,
+            display=True
         )
+        return 0
 
 if __name__ == "__main__":
     instance = Main()
-    instance.main()
+    sys.exit(instance.main())
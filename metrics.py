@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import threading
+import functools
+from contextlib import nullcontext
+
+
+class Metrics:
+    """
+    Collects per-stage durations and counters for the extraction and storage steps.
+
+    Stages are dotted names such as 'extract.tables' or 'store.sql.images'; each one records how
+    many times it ran and the total seconds spent in it. Counters accumulate quantities such as
+    'bytes_read', 'pages', 'images', 'table_cells' or 'rows_inserted'. One instance can be shared
+    by several threads (see ExtractionPipeline).
+
+    Methods:
+        timer(stage): Context manager adding the duration of its block to `stage`.
+        increment(name, value): Adds `value` to a counter.
+        report(): Returns the stages and counters as a dict.
+        merge(report): Adds the stages and counters of another instance's report().
+        write_json(path): Writes report() as JSON.
+        write_prometheus(path): Writes the metrics in the Prometheus textfile exposition format.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+
+    def timer(self, stage):
+        return _StageTimer(self, stage)
+
+    def record(self, stage, seconds):
+        with self._lock:
+            calls, total = self._stages.get(stage, (0, 0.0))
+            self._stages[stage] = (calls + 1, total + seconds)
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def report(self):
+        with self._lock:
+            return {
+                "stages": {stage: {"calls": calls, "seconds": seconds}
+                           for stage, (calls, seconds) in sorted(self._stages.items())},
+                "counters": dict(sorted(self._counters.items())),
+            }
+
+    def merge(self, report):
+        """Add a report() of another Metrics, e.g. one collected in a batch worker process."""
+        with self._lock:
+            for stage, values in report["stages"].items():
+                calls, total = self._stages.get(stage, (0, 0.0))
+                self._stages[stage] = (calls + values["calls"], total + values["seconds"])
+            for name, value in report["counters"].items():
+                self._counters[name] = self._counters.get(name, 0) + value
+
+    def write_json(self, path):
+        _write_atomically(path, json.dumps(self.report(), indent=2))
+
+    def write_prometheus(self, path, prefix="file_extraction"):
+        """
+        Write the metrics for node_exporter's textfile collector. The file is replaced atomically,
+        so the collector never reads a half-written file.
+        """
+        report = self.report()
+        lines = [
+            f"# HELP {prefix}_stage_seconds_total Seconds spent in each extraction/storage stage.",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        lines += [f'{prefix}_stage_seconds_total{{stage="{stage}"}} {values["seconds"]:.6f}'
+                  for stage, values in report["stages"].items()]
+        lines += [
+            f"# HELP {prefix}_stage_calls_total Number of times each stage ran.",
+            f"# TYPE {prefix}_stage_calls_total counter",
+        ]
+        lines += [f'{prefix}_stage_calls_total{{stage="{stage}"}} {values["calls"]}'
+                  for stage, values in report["stages"].items()]
+        for name, value in report["counters"].items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        _write_atomically(path, "\n".join(lines) + "\n")
+
+
+class NullMetrics:
+    """
+    Metrics sink used when instrumentation is off: every call is a no-op, so the hooks
+    left in the extractors and storages cost one attribute lookup and a method call.
+    """
+
+    enabled = False
+    _timer = nullcontext()
+
+    def timer(self, stage):
+        return self._timer
+
+    def record(self, stage, seconds):
+        pass
+
+    def increment(self, name, value=1):
+        pass
+
+    def report(self):
+        return {"stages": {}, "counters": {}}
+
+
+# Shared default for every component created without a metrics object
+NULL_METRICS = NullMetrics()
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.record(self.stage, time.perf_counter() - self.start)
+
+
+def timed(stage):
+    """Method decorator adding each call's duration to `stage` on `self.metrics`."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not self.metrics.enabled:
+                return method(self, *args, **kwargs)
+            with self.metrics.timer(stage):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_iter(stage, counter=None):
+    """
+    Generator-method decorator. Only the time spent producing items is added to `stage` (not
+    the time the consumer spends between items), and each yielded item increments `counter`.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            metrics = self.metrics
+            if not metrics.enabled:
+                yield from method(self, *args, **kwargs)
+                return
+            iterator = method(self, *args, **kwargs)
+            elapsed, items = 0.0, 0
+            try:
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        elapsed += time.perf_counter() - start
+                    items += 1
+                    yield item
+            finally:
+                # Recorded once, also when the consumer stops early
+                metrics.record(stage, elapsed)
+                if counter:
+                    metrics.increment(counter, items)
+        return wrapper
+    return decorator
+
+
+def _write_atomically(path, content):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as output_file:
+        output_file.write(content)
+    os.replace(temp_path, path)
@@ -0,0 +1,188 @@
+import queue
+import threading
+from file_processing import FileProcessor
+from batch_processing import BatchProcessor, print_batch_summary, run_config
+from Data_extraction.result_cache import ExtractionCache
+from Data_extraction.file_extractor import select_artifacts
+from resource_limits import ResourceLimitExceeded, limit_failure
+
+# Marks the end of the work in a stage queue
+_DONE = object()
+
+
+class ExtractionPipeline:
+    """
+    Process files through two overlapping stages: extraction and storage.
+
+    Extraction threads parse documents and hand the extracted data to storage threads through
+    a bounded queue, so document N+1 is parsed while document N is written to disk or MySQL.
+    When storage falls behind, the full queue blocks the extraction stage (backpressure), which
+    keeps at most `queue_size` extracted documents in memory.
+
+    Methods:
+        run(source): Processes every file resolved from `source` and returns one result dict per file.
+    """
+
+    def __init__(self, storage_type="file", output_dir="./output", extract_workers=2, store_workers=2,
+                 queue_size=4, pdf_engine="default", cache_dir=None, table_layout="normalized",
+                 dedupe_images=True, metrics=None, manifest_path=None, ooxml_engine="default", artifacts=None,
+                 page_range=None, max_chars=None, max_tables=None, ocr=None, limits=None):
+        """
+        :param storage_type: 'file' or 'sql'.
+        :param output_dir: Root directory for file storage; each file gets its own folder (see storage_path_for).
+        :param extract_workers: Number of extraction threads.
+        :param store_workers: Number of storage threads.
+        :param queue_size: Maximum number of extracted documents waiting to be stored.
+        :param pdf_engine: PDF backend passed on to FileDataExtractor.
+        :param cache_dir: Directory of the extraction result cache, or None to bypass it.
+        :param table_layout: MySQLStorage table layout.
+        :param dedupe_images: Store each distinct image once (in output_dir/blobs or the image_blobs table).
+        :param metrics: Optional Metrics shared by all stages; it is thread-safe, so totals cover the whole run.
+        :param manifest_path: Optional ProcessingManifest database; unchanged files are skipped
+                              (see BatchProcessor).
+        :param ooxml_engine: DOCX/PPTX backend passed on to FileDataExtractor.
+        :param artifacts: Artifact types to extract and store (see select_artifacts); all by default.
+        :param page_range: Optional zero-based, half-open (start, stop) range of pages or slides to extract.
+        :param max_chars: Optional budget of text characters extracted per file.
+        :param max_tables: Optional budget of tables extracted per file.
+        :param ocr: Optional PageOCR for PDF pages without a text layer.
+        :param limits: Optional ResourceLimits. Threads share one process, so only its page, OOXML size and
+                       image byte limits apply; use BatchProcessor for the time and memory limits.
+        """
+        self.storage_type = storage_type
+        self.output_dir = output_dir
+        self.extract_workers = max(1, extract_workers)
+        self.store_workers = max(1, store_workers)
+        self.queue_size = max(1, queue_size)
+        self.pdf_engine = pdf_engine
+        self.ooxml_engine = ooxml_engine
+        self.artifacts = select_artifacts(artifacts)
+        self.page_range = page_range
+        self.max_chars = max_chars
+        self.max_tables = max_tables
+        self.ocr = ocr
+        self.limits = limits
+        self.cache_dir = cache_dir
+        self.table_layout = table_layout
+        self.dedupe_images = dedupe_images
+        self.metrics = metrics
+        self.manifest_path = manifest_path
+        self._results = []
+        self._results_lock = threading.Lock()
+
+    def run(self, source):
+        """
+        Process every file resolved from `source` (a directory, glob pattern, manifest or single file)
+        and return a list of result dicts with 'file_path', 'status' and 'error'.
+        """
+        file_paths = BatchProcessor.collect_files(source)
+        skipped, manifest = [], None
+        if self.manifest_path:
+            from processing_manifest import ProcessingManifest
+            manifest = ProcessingManifest(self.manifest_path)
+            purged = manifest.purge_missing()
+            file_paths, skipped = manifest.plan(file_paths, self.run_config())
+        print(f"Pipeline: {len(file_paths)} file(s), {self.extract_workers} extraction / "
+              f"{self.store_workers} storage worker(s)" + (f", {len(skipped)} unchanged" if skipped else ""))
+
+        pending = queue.Queue()
+        for file_path in file_paths:
+            pending.put(file_path)
+        extracted = queue.Queue(maxsize=self.queue_size)
+        self._results = []
+
+        extractors = [threading.Thread(target=self._extract_stage, args=(pending, extracted), daemon=True)
+                      for _ in range(self.extract_workers)]
+        storers = [threading.Thread(target=self._store_stage, args=(extracted,), daemon=True)
+                   for _ in range(self.store_workers)]
+        for thread in extractors + storers:
+            thread.start()
+
+        for thread in extractors:
+            thread.join()
+        # Extraction is finished: tell every storage thread to stop once the queue is drained
+        for _ in storers:
+            extracted.put(_DONE)
+        for thread in storers:
+            thread.join()
+        if self.storage_type == "export":
+            from Storage.export_storage import ExportStorage
+            ExportStorage.finalize(self.output_dir)
+        if manifest is not None:
+            manifest.record_results(self._results, self.storage_type, self.run_config(),
+                                    lambda file_path: BatchProcessor.storage_path_for(self.output_dir, file_path,
+                                                                                      self.storage_type))
+            manifest.close()
+            if self.dedupe_images and (purged or file_paths):
+                # Purged and re-processed files can leave images that nothing references any more
+                from processing_manifest import remove_unreferenced_blobs
+                remove_unreferenced_blobs(self.storage_type, self.output_dir,
+                                          BatchProcessor.blob_dir_for(self.output_dir))
+
+        results = skipped + self._results
+        print_batch_summary(results)
+        return results
+
+    def run_config(self):
+        """Settings that change the stored output, the same as for BatchProcessor.run_config()."""
+        return run_config(self)
+
+    def _extract_stage(self, pending, extracted):
+        cache = ExtractionCache(self.cache_dir) if self.cache_dir else None
+        while True:
+            try:
+                file_path = pending.get_nowait()
+            except queue.Empty:
+                return
+
+            processor = None
+            try:
+                # The size limits are checked as the extractor opens the document
+                processor = FileProcessor(file_path, pdf_engine=self.pdf_engine, cache=cache, metrics=self.metrics,
+                                          ooxml_engine=self.ooxml_engine, artifacts=self.artifacts,
+                                          page_range=self.page_range, max_chars=self.max_chars,
+                                          max_tables=self.max_tables, ocr=self.ocr, limits=self.limits)
+                data = processor.extract_data()
+            except Exception as e:
+                if processor is not None:
+                    processor.extractor.close()
+                if isinstance(e, ResourceLimitExceeded):
+                    self._record_result(limit_failure(file_path, e))
+                else:
+                    self._record(file_path, "failed", f"Extraction: {type(e).__name__}: {e}")
+                continue
+            # Blocks while the storage stage is behind, bounding the documents held in memory
+            extracted.put((processor, data))
+
+    def _store_stage(self, extracted):
+        while True:
+            item = extracted.get()
+            if item is _DONE:
+                return
+
+            processor, data = item
+            file_path = processor.file_path
+            try:
+                processor.store_data(
+                    self.storage_type,
+                    BatchProcessor.storage_path_for(self.output_dir, file_path, self.storage_type),
+                    data,
+                    table_layout=self.table_layout,
+                    blob_dir=BatchProcessor.blob_dir_for(self.output_dir) if self.dedupe_images else None,
+                    dedupe_images=self.dedupe_images
+                )
+                self._record(file_path, "ok", None)
+            except ResourceLimitExceeded as e:
+                self._record_result(limit_failure(file_path, e))
+            except Exception as e:
+                self._record(file_path, "failed", f"Storage: {type(e).__name__}: {e}")
+            finally:
+                processor.extractor.close()
+
+    def _record(self, file_path, status, error):
+        self._record_result({"file_path": file_path, "status": status, "error": error})
+
+    def _record_result(self, result):
+        print(f"[{result['status'].upper()}] {result['file_path']}")
+        with self._results_lock:
+            self._results.append(result)
@@ -0,0 +1,173 @@
+import os
+import csv
+import glob
+import json
+import time
+import shutil
+import sqlite3
+from Data_extraction.parsed_document import file_digest
+
+
+class ProcessingManifest:
+    """
+    SQLite record of every processed file, so a run only processes new or changed files.
+
+    Each entry holds the file's absolute path, mtime, size and content hash, the storage type and
+    output location it was written to, and the run settings (`config`) that produced it. A file is
+    skipped when its size and mtime are unchanged; when only the mtime moved (a copy or a touch),
+    the content hash decides. Entries of files that no longer exist are purged together with
+    their outputs.
+
+    Methods:
+        plan(file_paths, config): Splits files into those to process and skipped result dicts.
+        record(file_path, storage_type, output_location, config): Marks a file as processed.
+        record_results(results, storage_type, config, output_location): Records the successful files of a run.
+        purge_missing(): Removes the outputs and entries of deleted files.
+
+    Deduplicated images shared through a blob store outlive the outputs that referenced them;
+    remove_unreferenced_blobs() deletes them once a run has purged or rewritten outputs.
+    """
+
+    def __init__(self, manifest_path):
+        """
+        :param manifest_path: SQLite database file; created with its parent directory if missing.
+        """
+        self.manifest_path = manifest_path
+        directory = os.path.dirname(os.path.abspath(manifest_path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(manifest_path)
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS processed_files (
+            file_path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            storage_type TEXT NOT NULL,
+            output_location TEXT,
+            config TEXT NOT NULL,
+            processed_at REAL NOT NULL
+        )''')
+        self.conn.commit()
+        # File stats taken by plan(), recorded once the file is processed: a file changed
+        # while it was being processed is then seen as changed again by the next run
+        self._planned = {}
+
+    def plan(self, file_paths, config):
+        """
+        Return (pending, skipped): the files that need processing, and a result dict with status
+        'skipped' for every file whose processed output is still current.
+
+        :param config: JSON-serialisable run settings (storage type, output dir, engine...);
+                       a file processed with other settings is processed again.
+        """
+        config_key = json.dumps(config, sort_keys=True)
+        pending, skipped = [], []
+        for file_path in file_paths:
+            path = os.path.abspath(file_path)
+            stat = os.stat(path)
+            entry = self.conn.execute(
+                'SELECT mtime_ns, size, content_hash, config FROM processed_files WHERE file_path = ?',
+                (path,)).fetchone()
+            content_hash = None
+            if entry is not None and entry[3] == config_key and entry[1] == stat.st_size:
+                if entry[0] == stat.st_mtime_ns:
+                    skipped.append({"file_path": file_path, "status": "skipped", "error": None})
+                    continue
+                # Same size but a new mtime: only hashing tells whether the content changed
+                content_hash = file_digest(path)
+                if content_hash == entry[2]:
+                    self.conn.execute('UPDATE processed_files SET mtime_ns = ? WHERE file_path = ?',
+                                      (stat.st_mtime_ns, path))
+                    self.conn.commit()
+                    skipped.append({"file_path": file_path, "status": "skipped", "error": None})
+                    continue
+            self._planned[path] = (stat.st_mtime_ns, stat.st_size, content_hash)
+            pending.append(file_path)
+        return pending, skipped
+
+    def record(self, file_path, storage_type, output_location, config):
+        """Mark `file_path` as processed into `output_location` with the given settings."""
+        path = os.path.abspath(file_path)
+        mtime_ns, size, content_hash = self._planned.pop(path, (None, None, None))
+        if mtime_ns is None:
+            stat = os.stat(path)
+            mtime_ns, size = stat.st_mtime_ns, stat.st_size
+        content_hash = content_hash or file_digest(path)
+        self.conn.execute(
+            '''INSERT OR REPLACE INTO processed_files
+               (file_path, mtime_ns, size, content_hash, storage_type, output_location, config, processed_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+            (path, mtime_ns, size, content_hash, storage_type, output_location,
+             json.dumps(config, sort_keys=True), time.time()))
+        self.conn.commit()
+
+    def record_results(self, results, storage_type, config, output_location):
+        """
+        Record every successfully processed file of a batch or pipeline run.
+
+        :param output_location: Callable returning the output location of a file path.
+        """
+        for result in results:
+            if result["status"] == "ok":
+                self.record(result["file_path"], storage_type, output_location(result["file_path"]), config)
+
+    def purge_missing(self):
+        """
+        Remove the outputs and manifest entries of every recorded file that no longer exists.
+        Returns the paths that were purged.
+        """
+        entries = self.conn.execute(
+            'SELECT file_path, storage_type, output_location FROM processed_files').fetchall()
+        purged = []
+        for file_path, storage_type, output_location in entries:
+            if os.path.exists(file_path):
+                continue
+            remove_outputs(file_path, storage_type, output_location)
+            self.conn.execute('DELETE FROM processed_files WHERE file_path = ?', (file_path,))
+            self.conn.commit()
+            print(f"Removed outputs of deleted file {file_path}")
+            purged.append(file_path)
+        return purged
+
+    def close(self):
+        self.conn.close()
+
+
+def remove_outputs(file_path, storage_type, output_location):
+    """Delete what a processed file left in its storage backend."""
+    if storage_type == "file":
+        # The output folder belongs to this file alone (see BatchProcessor.storage_path_for)
+        shutil.rmtree(output_location, ignore_errors=True)
+    elif storage_type == "export":
+        # Shards are append-only and shared, so the deletion is recorded for downstream loaders
+        from Storage.export_storage import ExportStorage
+        ExportStorage.record_deletion(output_location, file_path)
+    elif storage_type == "sql":
+        from Storage.SQL_storage import MySQLStorage
+        MySQLStorage.delete_document(file_path)
+
+
+def remove_unreferenced_blobs(storage_type, output_dir, blob_dir):
+    """
+    Delete the deduplicated images that no stored document references any more, once outputs were
+    purged or rewritten. Must run once no worker is storing into `output_dir`.
+
+    File storage keeps them in `blob_dir`, referenced from the images.csv of each file's output
+    folder under `output_dir`; SQL storage keeps them in image_blobs. Export shards are append-only,
+    so their images stay.
+    """
+    if storage_type == "file":
+        if not os.path.isdir(blob_dir):
+            return
+        from Storage.blob_store import BlobStore
+        referenced = set()
+        for index_path in glob.glob(os.path.join(output_dir, "*_files", "images.csv")):
+            with open(index_path, newline="", encoding="utf-8") as index_file:
+                referenced.update(row["content_hash"] for row in csv.DictReader(index_file))
+        removed = BlobStore(blob_dir).remove_unreferenced(referenced)
+    elif storage_type == "sql":
+        from Storage.SQL_storage import MySQLStorage
+        removed = MySQLStorage.delete_unreferenced_blobs()
+    else:
+        return
+    if removed:
+        print(f"Removed {removed} image blob(s) no longer referenced")
@@ -0,0 +1,167 @@
+import signal
+import multiprocessing
+
+# Human-readable names of the limits, used in error messages
+LIMIT_NAMES = {
+    "timeout": "Processing time (seconds)",
+    "max_memory": "Memory (bytes)",
+    "max_pages": "Page count",
+    "max_ooxml_bytes": "Decompressed size (bytes)",
+    "max_image_bytes": "Image data (bytes)",
+}
+
+
+class ResourceLimitExceeded(Exception):
+    """Raised when a document exceeds one of its ResourceLimits."""
+
+    def __init__(self, limit, value, maximum):
+        """
+        :param limit: Name of the limit, one of LIMIT_NAMES.
+        :param value: The value the document reached (None when it is not known).
+        :param maximum: The configured limit.
+        """
+        self.limit = limit
+        self.value = value
+        self.maximum = maximum
+        reached = f" {value}" if value is not None else ""
+        super().__init__(f"{LIMIT_NAMES[limit]}{reached} exceeds the limit of {maximum}.")
+
+    def __reduce__(self):
+        # Rebuilt from its fields when it crosses processes (page-parallel workers), not from the message
+        return type(self), (self.limit, self.value, self.maximum)
+
+
+class ResourceLimits:
+    """
+    Per-document limits protecting a run from pathological files: malformed PDFs that hang a parser,
+    zip bombs disguised as DOCX/PPTX, decks full of huge images.
+
+    The size limits are checked by FileDataExtractor: page count and decompressed OOXML size (the
+    sizes the zip declares, which zipfile enforces while reading) before anything is parsed, image
+    bytes before the OOXML media is read and while PDF images are extracted. The time and memory
+    limits need a process of their own: run_sandboxed() runs the extraction in a child process and
+    kills it at the timeout, which also stops parsers stuck in native code that a signal cannot
+    interrupt. `max_memory` is an address-space limit (RLIMIT_AS), not an RSS limit: it counts virtual
+    memory, including mapped libraries and the document's memory map, so set it well above the
+    resident size a document is expected to need.
+
+    Every limit is optional; None leaves that resource unlimited.
+
+    Methods:
+        check_document(document): Checks a ParsedDocument against the size limits.
+        check_image_bytes(total): Checks the image bytes extracted from a document so far.
+        apply_memory_limit(): Sets the memory ceiling of the current process.
+    """
+
+    def __init__(self, timeout=None, max_memory=None, max_pages=None, max_ooxml_bytes=None, max_image_bytes=None):
+        """
+        :param timeout: Wall-clock seconds a document may take (extraction and storage).
+        :param max_memory: Virtual address space, in bytes, of the process extracting a document.
+        :param max_pages: Maximum number of PDF pages or PPTX slides (DOCX pages as recorded by Word).
+        :param max_ooxml_bytes: Maximum total decompressed size of the parts of a DOCX/PPTX file.
+        :param max_image_bytes: Maximum total size of the images of one document.
+        """
+        self.timeout = timeout
+        self.max_memory = max_memory
+        self.max_pages = max_pages
+        self.max_ooxml_bytes = max_ooxml_bytes
+        self.max_image_bytes = max_image_bytes
+
+    def check_document(self, document):
+        """Raise ResourceLimitExceeded when `document` (a ParsedDocument) exceeds a size limit."""
+        if self.max_pages is not None:
+            page_count = document.page_count
+            if page_count is not None and page_count > self.max_pages:
+                raise ResourceLimitExceeded("max_pages", page_count, self.max_pages)
+
+        if document.file_extension in ('.docx', '.pptx') and \
+                (self.max_ooxml_bytes is not None or self.max_image_bytes is not None):
+            # Only the zip directory is read; no part is decompressed
+            parts = document.archive.infolist()
+            if self.max_ooxml_bytes is not None:
+                total = sum(info.file_size for info in parts)
+                if total > self.max_ooxml_bytes:
+                    raise ResourceLimitExceeded("max_ooxml_bytes", total, self.max_ooxml_bytes)
+            if self.max_image_bytes is not None:
+                # Embedded images live in word/media/ and ppt/media/
+                total = sum(info.file_size for info in parts if "/media/" in info.filename)
+                self.check_image_bytes(total)
+
+    def check_image_bytes(self, total):
+        if self.max_image_bytes is not None and total > self.max_image_bytes:
+            raise ResourceLimitExceeded("max_image_bytes", total, self.max_image_bytes)
+
+    def apply_memory_limit(self):
+        """
+        Cap the address space of the current process at `max_memory`; allocations beyond it raise
+        MemoryError. Only the soft limit is lowered. POSIX only; a no-op elsewhere.
+        """
+        if self.max_memory is None:
+            return
+        try:
+            # Imported here: the resource module only exists on POSIX systems
+            import resource
+        except ImportError:
+            return
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        soft = self.max_memory if hard == resource.RLIM_INFINITY else min(self.max_memory, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def limit_failure(file_path, error):
+    """Structured result of a document rejected by a limit (see ResourceLimitExceeded)."""
+    return {"file_path": file_path, "status": "timeout" if error.limit == "timeout" else "rejected",
+            "error": str(error), "limit": error.limit, "value": error.value, "maximum": error.maximum}
+
+
+def _run_child(connection, limits, target, file_path, args, kwargs):
+    limits.apply_memory_limit()
+    try:
+        result = target(file_path, *args, **kwargs)
+    except ResourceLimitExceeded as e:
+        result = limit_failure(file_path, e)
+    except MemoryError:
+        result = limit_failure(file_path, ResourceLimitExceeded("max_memory", None, limits.max_memory))
+    except Exception as e:
+        result = {"file_path": file_path, "status": "failed", "error": f"{type(e).__name__}: {e}"}
+    connection.send(result)
+    connection.close()
+
+
+def run_sandboxed(limits, target, file_path, *args, **kwargs):
+    """
+    Call `target(file_path, *args, **kwargs)` in a child process under `limits` and return the result
+    dict ('file_path', 'status', 'error') it returns.
+
+    The child gets the memory ceiling, and is killed when it runs past `limits.timeout`. Whatever
+    happens to it (a limit, an exception, a crash), a structured result dict comes back, so one bad
+    document never takes its caller down.
+    """
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    child = multiprocessing.Process(target=_run_child, args=(sender, limits, target, file_path, args, kwargs))
+    child.start()
+    sender.close()
+    try:
+        if receiver.poll(limits.timeout):
+            try:
+                return receiver.recv()
+            except EOFError:
+                pass  # The child died before it could report; see its exit code below
+        else:
+            child.kill()
+            return limit_failure(file_path, ResourceLimitExceeded("timeout", None, limits.timeout))
+    finally:
+        child.join()
+        receiver.close()
+
+    if child.exitcode is not None and child.exitcode < 0:
+        try:
+            cause = signal.Signals(-child.exitcode).name
+        except ValueError:
+            cause = f"signal {-child.exitcode}"
+        # The kernel's OOM killer, or a native library aborting on a failed allocation under the ceiling
+        if limits.max_memory is not None and cause in ("SIGKILL", "SIGABRT"):
+            return limit_failure(file_path, ResourceLimitExceeded("max_memory", None, limits.max_memory))
+    else:
+        cause = f"exit code {child.exitcode}"
+    return {"file_path": file_path, "status": "failed", "error": f"Worker process crashed ({cause})."}
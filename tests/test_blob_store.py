@@ -0,0 +1,19 @@
+import os
+import threading
+
+from Storage.blob_store import BlobStore, blob_digest
+
+
+def test_concurrent_puts_of_the_same_blob(tmp_path):
+    store = BlobStore(str(tmp_path))
+    data = os.urandom(1 << 20)
+    threads = [threading.Thread(target=store.put, args=(data, "png")) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Threads of one process write their own temporary files, so one complete blob is left
+    blob_path = store.path_for(blob_digest(data), "png")
+    assert os.listdir(os.path.dirname(blob_path)) == [os.path.basename(blob_path)]
+    with open(blob_path, "rb") as blob_file:
+        assert blob_file.read() == data
@@ -0,0 +1,47 @@
+import os
+
+from Storage.export_storage import ShardWriter
+
+
+def shard_names(root):
+    return sorted(os.listdir(root))
+
+
+def test_shards_roll_over_at_max_bytes(tmp_path):
+    completed = []
+    writer = ShardWriter(str(tmp_path), "text", "ndjson", max_bytes=10, on_rollover=completed.append)
+    pid = os.getpid()
+    locations = [writer.write(b"123456") for _ in range(5)]
+    writer.close()
+
+    first, second, third = (str(tmp_path / f"text-{pid}-{shard:05d}.ndjson") for shard in range(3))
+    # A shard takes writes until it has reached max_bytes, so records are never split
+    assert locations == [(first, 0), (first, 6), (second, 0), (second, 6), (third, 0)]
+    assert completed == [first, second, third]
+    assert [os.path.getsize(path) for path in (first, second, third)] == [12, 12, 6]
+
+
+def test_a_later_writer_resumes_the_last_shard(tmp_path):
+    writer = ShardWriter(str(tmp_path), "text", "ndjson", max_bytes=10)
+    writer.write(b"1234")
+    writer.close()
+    path, offset = ShardWriter(str(tmp_path), "text", "ndjson", max_bytes=10).write(b"5678")
+    assert (os.path.basename(path), offset) == (f"text-{os.getpid()}-00000.ndjson", 4)
+
+
+def test_a_full_last_shard_is_not_resumed(tmp_path):
+    writer = ShardWriter(str(tmp_path), "text", "ndjson", max_bytes=4)
+    writer.write(b"12345")
+    writer.close()
+    path, offset = ShardWriter(str(tmp_path), "text", "ndjson", max_bytes=4).write(b"6")
+    assert (os.path.basename(path), offset) == (f"text-{os.getpid()}-00001.ndjson", 0)
+
+
+def test_a_converted_last_shard_is_not_resumed(tmp_path):
+    pid = os.getpid()
+    # Shard 2 of the table spools was converted to Parquet; shard 1 is an older spool
+    for name in (f"tables-{pid}-00001.ndjson", f"tables-{pid}-00002.parquet", f"tables-{os.getpid() + 1}-00007.ndjson"):
+        (tmp_path / name).write_bytes(b"x")
+    path, _ = ShardWriter(str(tmp_path), "tables", "ndjson", max_bytes=100).write(b"{}")
+    assert os.path.basename(path) == f"tables-{pid}-00003.ndjson"
+    assert f"tables-{pid}-00003.ndjson" in shard_names(tmp_path)
@@ -1,28 +1,29 @@
 import pytest
 import sys
 from pathlib import Path
-import psutil
 import os
 
 # Add the parent directory to sys.path for module discovery
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-# Import your modules
-from Loaders.docx_loader import DOCXLoader
-from Loaders.pdf_loader import PDFLoader
-from Loaders.ppt_loader import PPTLoader
-from Storage.SQL_storage import MySQLStorage
+# The per-format loaders were merged into FileLoader, which dispatches on the file extension
+from Loaders.file_loader import FileLoader
+
 @pytest.fixture
 def docx_loader():
-    return DOCXLoader()
+    return FileLoader()
 
 @pytest.fixture
 def pdf_loader():
-    return PDFLoader()
+    return FileLoader()
 
 @pytest.fixture
 def ppt_loader():
-    return PPTLoader()
+    return FileLoader()
+
+@pytest.fixture
+def file_loader():
+    return FileLoader()
 
 # PDF Extractor Tests
 def test_extract_text_from_pdf_with_text_only(pdf_loader):
@@ -241,6 +242,7 @@ def test_stress_test_with_large_number_of_files(file_loader):
     assert all(results), "Failed to extract from a large number of files."
 
 def test_measure_memory_usage_for_large_files(file_loader):
+    psutil = pytest.importorskip("psutil")
     process = psutil.Process(os.getpid())
     memory_before = process.memory_info().rss
     very_large_file_path = Path(__file__).resolve().parents[1] / "test_files/very_large_file.pdf"
@@ -0,0 +1,187 @@
+import glob
+import xml.etree.ElementTree as ET
+from pathlib import Path
+import pytest
+
+from Data_extraction.file_extractor import ARTIFACTS, FileDataExtractor, select_artifacts
+from Data_extraction.ooxml_engine import W, DocxPageCounter
+
+ROOT = Path(__file__).resolve().parents[1]
+SAMPLE_PDF = ROOT / "Samples" / "Sample_file.pdf"
+# The readable DOCX/PPTX test files; corrupt.* and password.* are not zip files
+OOXML_FILES = sorted(path for path in glob.glob(str(ROOT / "test_files" / "*" / "*.[dp][op][ct]x"))
+                     + [str(ROOT / "Samples" / "Sample_file.docx"), str(ROOT / "Samples" / "Sample_file.pptx")]
+                     if Path(path).stem not in ("corrupt", "password"))
+
+
+def test_select_artifacts():
+    assert select_artifacts() == ARTIFACTS
+    assert select_artifacts("tables, TEXT") == ("text", "tables")
+    assert select_artifacts(None, ["images", "tables"]) == ("text", "metadata", "links")
+    assert select_artifacts("text,links", "links") == ("text",)
+
+
+@pytest.mark.parametrize("include, exclude", [("text,pictures", None), (None, "text,metadata,links,images,tables"),
+                                              ("", None)])
+def test_select_artifacts_rejects_bad_selections(include, exclude):
+    with pytest.raises(ValueError):
+        select_artifacts(include, exclude)
+
+
+def paragraph(xml):
+    return ET.fromstring(f'<w:p xmlns:w="{W[1:-1]}">{xml}</w:p>')
+
+
+def test_docx_page_counter():
+    counter = DocxPageCounter()
+    assert counter.advance(paragraph("<w:r><w:t>first page</w:t></w:r>")) == 0
+    # Text before an explicit break stays on its page; the next paragraph starts on the new one
+    assert counter.advance(paragraph('<w:r><w:t>end of 1</w:t><w:br w:type="page"/></w:r>')) == 0
+    # Word's rendered-break marker right after an explicit break is the same break
+    assert counter.advance(paragraph("<w:r><w:lastRenderedPageBreak/><w:t>second page</w:t></w:r>")) == 1
+    assert counter.advance(paragraph("<w:r><w:lastRenderedPageBreak/><w:t>third page</w:t></w:r>")) == 2
+    # A leading break moves the paragraph to the next page
+    assert counter.advance(paragraph('<w:pPr><w:pageBreakBefore/></w:pPr><w:r><w:t>fourth</w:t></w:r>')) == 3
+    # A section break starts the next page after the paragraph, unless it is continuous
+    assert counter.advance(paragraph("<w:pPr><w:sectPr/></w:pPr><w:r><w:t>end of 4</w:t></w:r>")) == 3
+    assert counter.advance(paragraph(
+        '<w:pPr><w:sectPr><w:type w:val="continuous"/></w:sectPr></w:pPr><w:r><w:t>fifth</w:t></w:r>')) == 4
+    assert counter.advance(paragraph("<w:r><w:t>still fifth</w:t></w:r>")) == 4
+
+
+@pytest.fixture
+def paged_docx(tmp_path):
+    docx = pytest.importorskip("docx")
+    document = docx.Document()
+    for page in range(1, 4):
+        document.add_paragraph(f"Page {page} text")
+        table = document.add_table(rows=2, cols=2)
+        table.cell(0, 0).text = f"table {page}"
+        if page < 3:
+            document.add_page_break()
+    path = tmp_path / "paged.docx"
+    document.save(path)
+    return str(path)
+
+
+@pytest.mark.parametrize("ooxml_engine", ["default", "streaming"])
+def test_docx_page_range(paged_docx, ooxml_engine):
+    with FileDataExtractor(paged_docx, page_range=(1, 2), ooxml_engine=ooxml_engine) as extractor:
+        text, _ = extractor.extract_text()
+        tables = extractor.extract_tables()
+    assert "Page 2 text" in text
+    assert "Page 1" not in text and "Page 3" not in text
+    assert [table[0][0] for table in tables] == ["table 2"]
+
+
+@pytest.mark.parametrize("ooxml_engine", ["default", "streaming"])
+def test_budgets(paged_docx, ooxml_engine):
+    with FileDataExtractor(paged_docx, max_chars=8, max_tables=2, ooxml_engine=ooxml_engine) as extractor:
+        text, _ = extractor.extract_text()
+        tables = extractor.extract_tables()
+    assert text == "Page 1 t"
+    assert [table[0][0] for table in tables] == ["table 1", "table 2"]
+
+
+def test_pdf_budgets_and_page_range():
+    pytest.importorskip("fitz")
+    with FileDataExtractor(str(SAMPLE_PDF)) as extractor:
+        full_text, _ = extractor.extract_text()
+        page_count = len(extractor.document.fitz_doc)
+    for pdf_engine in ("default", "single_pass"):
+        with FileDataExtractor(str(SAMPLE_PDF), pdf_engine=pdf_engine, max_chars=50, max_tables=0) as extractor:
+            text, _ = extractor.extract_text()
+            assert len(text) == 50
+            assert extractor.extract_tables() == []
+        with FileDataExtractor(str(SAMPLE_PDF), pdf_engine=pdf_engine, page_range=(page_count, page_count + 5)) \
+                as extractor:
+            assert extractor.extract_text()[0] == ""
+    assert len(full_text) > 50
+
+
+@pytest.mark.parametrize("kwargs", [{"page_range": (2, 1)}, {"page_range": (-1, 3)}, {"max_chars": -1},
+                                    {"max_tables": -2}])
+def test_invalid_limits_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        FileDataExtractor(str(SAMPLE_PDF), **kwargs)
+
+
+@pytest.mark.parametrize("path", OOXML_FILES, ids=lambda path: Path(path).name)
+def test_streaming_ooxml_matches_the_default_engine(path):
+    pytest.importorskip("docx")
+    pytest.importorskip("pptx")
+    with FileDataExtractor(path) as default, FileDataExtractor(path, ooxml_engine="streaming") as streaming:
+        expected = default.extract_selected()
+        result = streaming.extract_selected()
+        assert result == expected
+        assert [page["text"] for page in streaming.iter_pages()] == [page["text"] for page in default.iter_pages()]
+
+
+def test_streaming_is_refused_for_whole_document_pdf_engines():
+    with FileDataExtractor(str(SAMPLE_PDF), pdf_engine="single_pass") as extractor:
+        assert not extractor.streams_pages()
+        with pytest.raises(ValueError):
+            next(extractor.iter_pages())
+
+
+def test_pdf_images_are_cached_up_to_a_bound(monkeypatch):
+    pytest.importorskip("fitz")
+    from Data_extraction import file_extractor
+    monkeypatch.setattr(file_extractor, "PDF_IMAGE_CACHE_SIZE", 2)
+    with FileDataExtractor(str(SAMPLE_PDF)) as extractor:
+        extracted = []
+        monkeypatch.setattr(extractor.document.fitz_doc, "extract_image",
+                            lambda xref: extracted.append(xref) or {"image": b"", "xref": xref})
+        for xref in (1, 2, 1, 3, 1, 2):
+            assert extractor._pdf_image(xref)["xref"] == xref
+        # 1 stays cached while it is used; 2 is evicted by 3
+        assert extracted == [1, 2, 3, 2]
+        assert list(extractor._pdf_images) == [1, 2]
+
+
+@pytest.mark.parametrize("pages_per_chunk", [1, 100])
+def test_page_parallel_matches_a_serial_extraction(pages_per_chunk):
+    pytest.importorskip("fitz")
+    from metrics import Metrics
+    serial_metrics, parallel_metrics = Metrics(), Metrics()
+    with FileDataExtractor(str(SAMPLE_PDF), metrics=serial_metrics) as extractor:
+        expected = extractor.extract_selected()
+    with FileDataExtractor(str(SAMPLE_PDF), page_workers=2, pages_per_chunk=pages_per_chunk,
+                           metrics=parallel_metrics) as extractor:
+        assert extractor.extract_selected() == expected
+    # The page ranges report into the parent's metrics without counting the document or its artifacts twice
+    assert parallel_metrics.report()["counters"] == serial_metrics.report()["counters"]
+
+
+def test_a_single_page_range_is_extracted_from_the_parsed_document(monkeypatch):
+    pytest.importorskip("fitz")
+    from Data_extraction import file_extractor
+    opened = []
+    parsed_document = file_extractor.ParsedDocument
+    monkeypatch.setattr(file_extractor, "ParsedDocument", lambda path: opened.append(path) or parsed_document(path))
+    with FileDataExtractor(str(SAMPLE_PDF), page_workers=2, pages_per_chunk=100) as extractor:
+        assert extractor.extract_text()[0]
+    assert opened == [str(SAMPLE_PDF)]
+
+
+def test_page_parallel_workers_enforce_the_limits():
+    pytest.importorskip("fitz")
+    from resource_limits import ResourceLimitExceeded, ResourceLimits
+    with FileDataExtractor(str(SAMPLE_PDF), page_workers=2, pages_per_chunk=1,
+                           limits=ResourceLimits(max_image_bytes=100)) as extractor:
+        with pytest.raises(ResourceLimitExceeded):
+            extractor.extract_images()
+
+
+@pytest.mark.parametrize("path", OOXML_FILES, ids=lambda path: Path(path).name)
+def test_streaming_ooxml_iterators_parse_as_they_yield(path):
+    pytest.importorskip("docx")
+    pytest.importorskip("pptx")
+    with FileDataExtractor(path) as default:
+        expected = dict(default.extract_selected(), pages=list(default.iter_pages()))
+    for method, key in (("iter_pages", "pages"), ("iter_images", "images"), ("iter_tables", "tables"),
+                        ("extract_links", "links")):
+        with FileDataExtractor(path, ooxml_engine="streaming") as streaming:
+            assert list(getattr(streaming, method)()) == expected[key]
+            # Nothing was collected for the whole document
+            assert streaming._streaming_engine is None or streaming._streaming_engine._result is None
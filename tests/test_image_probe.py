@@ -0,0 +1,52 @@
+import io
+import struct
+import pytest
+
+from Data_extraction.image_probe import probe_image
+
+
+@pytest.mark.parametrize("pil_format, expected", [
+    ("PNG", "png"), ("JPEG", "jpeg"), ("GIF", "gif"), ("BMP", "bmp"), ("TIFF", "tiff"),
+])
+def test_probe_matches_pillow(pil_format, expected):
+    Image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    Image.new("RGB", (37, 21), (200, 30, 30)).save(buffer, format=pil_format)
+    assert probe_image(buffer.getvalue()) == (expected, 37, 21)
+    assert probe_image(memoryview(buffer.getvalue())) == (expected, 37, 21)
+
+
+def test_probe_progressive_jpeg_with_leading_segments():
+    Image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    # EXIF and quantisation segments come before the start-of-frame marker
+    Image.new("L", (300, 200)).save(buffer, format="JPEG", progressive=True, exif=b"Exif\x00\x00" + b"\x00" * 64)
+    assert probe_image(buffer.getvalue()) == ("jpeg", 300, 200)
+
+
+def test_probe_bmp_top_down():
+    header = b"BM" + b"\x00" * 16 + struct.pack("<ii", 64, -48) + b"\x00" * 8
+    assert probe_image(header) == ("bmp", 64, 48)
+
+
+def test_probe_emf():
+    # EMR_HEADER: type, size, bounds, frame, then the signature at offset 40
+    header = struct.pack("<II", 1, 108) + struct.pack("<iiii", 10, 20, 110, 70) + b"\x00" * 16 + b" EMF" + b"\x00" * 64
+    # Reported as "wmf", like Pillow, which reads both metafile formats with its WMF plugin
+    assert probe_image(header) == ("wmf", 100, 50)
+
+
+def test_probe_placeable_wmf():
+    header = b"\xd7\xcd\xc6\x9a" + b"\x00\x00" + struct.pack("<hhhhH", 0, 0, 1440, 720, 1440) + b"\x00" * 16
+    assert probe_image(header) == ("wmf", 72, 36)
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"not an image at all",
+    b"\x89PNG\r\n\x1a\n\x00",  # Truncated PNG header
+    b"\xff\xd8\xff\xda\x00\x02",  # JPEG scan without a frame header
+    b"\xd7\xcd\xc6\x9a" + b"\x00" * 12,  # WMF with zero units per inch
+])
+def test_probe_unrecognised_headers(data):
+    assert probe_image(data) is None
@@ -0,0 +1,57 @@
+import sys
+import argparse
+import pytest
+
+from main import Main, budget_arg, build_parser, megabytes_arg, page_range_arg, workers_arg
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("3", (2, 3)),
+    ("1-5", (0, 5)),
+    ("10-", (9, sys.maxsize)),
+    ("-4", (0, 4)),
+    (" 2 - 2 ", (1, 2)),
+])
+def test_page_range_arg(value, expected):
+    assert page_range_arg(value) == expected
+
+
+@pytest.mark.parametrize("value", ["0", "0-3", "5-2", "a-b", "1-2-3", "", "-"])
+def test_page_range_arg_rejects(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        page_range_arg(value)
+
+
+def test_budget_arg():
+    assert budget_arg("0") == 0
+    for value in ("-1", "2.5"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            budget_arg(value)
+
+
+def test_megabytes_arg():
+    assert megabytes_arg("1.5") == 1536 * 1024
+    for value in ("0", "big"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            megabytes_arg(value)
+
+
+def test_storage_layout_flags_default_to_per_table_without_dedupe():
+    args = build_parser().parse_args(["a.pdf"])
+    assert (args.table_layout, args.dedupe_images) == ("per_table", False)
+    args = build_parser().parse_args(["a.pdf", "--table-layout", "normalized", "--dedupe-images"])
+    assert (args.table_layout, args.dedupe_images) == ("normalized", True)
+
+
+def test_workers_arg():
+    assert workers_arg("4") == 4
+    for value in ("0", "-2", "all"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            workers_arg(value)
+
+
+@pytest.mark.parametrize("option", [["--timeout", "5"], ["--max-memory", "512"]])
+def test_pipeline_rejects_limits_it_cannot_enforce(option, capsys):
+    with pytest.raises(SystemExit):
+        Main().main(["a.pdf", "--pipeline"] + option)
+    assert "not supported with --pipeline" in capsys.readouterr().err
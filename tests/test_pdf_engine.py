@@ -0,0 +1,84 @@
+import random
+import datetime as dt
+from pathlib import Path
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from Data_extraction.pdf_engine import SinglePassPDFEngine, parse_pdf_date
+from Data_extraction.file_extractor import FileDataExtractor
+
+SAMPLE_PDF = Path(__file__).resolve().parents[1] / "Samples" / "Sample_file.pdf"
+
+
+@pytest.fixture
+def engine():
+    # The heuristics only look at the page they are given
+    return SinglePassPDFEngine.__new__(SinglePassPDFEngine)
+
+
+@pytest.fixture
+def document():
+    doc = fitz.open()
+    yield doc
+    doc.close()
+
+
+def prose_page(doc, seed):
+    rng = random.Random(seed)
+    page = doc.new_page()
+    for line in range(45):
+        words = []
+        while sum(len(word) + 1 for word in words) < 85:
+            words.append("".join(rng.choice("abcdefghijklmnop") for _ in range(rng.randint(1, 10))))
+        page.insert_text((50, 60 + line * 16), " ".join(words), fontsize=10)
+    return page.number
+
+
+def test_prose_pages_do_not_look_like_tables(engine, document):
+    page_numbers = [prose_page(document, seed) for seed in range(20)]
+    assert not any(engine._looks_like_table(document[number]) for number in page_numbers)
+
+
+def test_aligned_text_columns_look_like_a_table(engine, document):
+    page = document.new_page()
+    for row in range(6):
+        for column, x in enumerate((50, 180, 310, 440)):
+            page.insert_text((x, 100 + row * 16), f"cell {row}.{column}", fontsize=10)
+    assert engine._has_text_grid(document[page.number])
+
+
+def test_ruled_grid_looks_like_a_table(engine, document):
+    page = document.new_page()
+    for y in (100, 130, 160, 190):
+        page.draw_line((50, y), (400, y))
+    for x in (50, 200, 400):
+        page.draw_line((x, 100), (x, 190))
+    assert engine._has_ruling_lines(document[page.number])
+
+
+def test_bars_and_boxes_do_not_look_like_a_table(engine, document):
+    page = document.new_page()
+    width = page.rect.width
+    page.draw_rect(fitz.Rect(0, 0, width, 40), fill=(0.5, 0.5, 0.5))  # Filled header bar
+    page.draw_rect(fitz.Rect(0, 0, width, page.rect.height), color=(0, 0, 0))  # Page border
+    page.draw_rect(fitz.Rect(40, 780, 560, 820), color=(0, 0, 0))  # Footer box
+    assert not engine._looks_like_table(document[page.number])
+
+
+def test_parse_pdf_date():
+    assert parse_pdf_date("D:20241013231411-07'00'") == dt.datetime(
+        2024, 10, 13, 23, 14, 11, tzinfo=dt.timezone(-dt.timedelta(hours=7)))
+    assert parse_pdf_date("D:20240102030405Z") == dt.datetime(2024, 1, 2, 3, 4, 5, tzinfo=dt.timezone.utc)
+    assert parse_pdf_date("D:2024") == dt.datetime(2024, 1, 1)
+    assert parse_pdf_date("D:20241399") == ""
+    assert parse_pdf_date(None) == ""
+
+
+def test_metadata_does_not_depend_on_the_pdf_engine():
+    metadata = {}
+    for pdf_engine in ("default", "single_pass"):
+        with FileDataExtractor(str(SAMPLE_PDF), pdf_engine=pdf_engine) as extractor:
+            metadata[pdf_engine] = extractor.extract_metadata()
+    assert metadata["default"] == metadata["single_pass"]
+    assert isinstance(metadata["default"]["created"], dt.datetime)
@@ -0,0 +1,103 @@
+import os
+import csv
+import shutil
+from pathlib import Path
+import pytest
+
+from batch_processing import BatchProcessor
+from processing_manifest import ProcessingManifest
+
+CONFIG = {"storage_type": "file", "pdf_engine": "default"}
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = ProcessingManifest(str(tmp_path / "out" / "processed_files.sqlite"))
+    yield manifest
+    manifest.close()
+
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return str(path)
+
+
+def statuses(plan):
+    pending, skipped = plan
+    return pending, [result["file_path"] for result in skipped]
+
+
+def test_plan_skips_unchanged_files(tmp_path, manifest):
+    first = write(tmp_path / "in" / "a.pdf", b"first")
+    second = write(tmp_path / "in" / "b.pdf", b"second")
+    assert statuses(manifest.plan([first, second], CONFIG)) == ([first, second], [])
+    manifest.record_results([{"file_path": first, "status": "ok"}, {"file_path": second, "status": "failed"}],
+                            "file", CONFIG, lambda file_path: file_path + "_files")
+    # Failed files are not recorded, so they are retried
+    assert statuses(manifest.plan([first, second], CONFIG)) == ([second], [first])
+
+
+def test_plan_detects_changes(tmp_path, manifest):
+    path = write(tmp_path / "in" / "a.pdf", b"content")
+    manifest.plan([path], CONFIG)
+    manifest.record(path, "file", path + "_files", CONFIG)
+
+    # A touch moves the mtime, but the content hash shows nothing changed
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert statuses(manifest.plan([path], CONFIG)) == ([], [path])
+    # Other settings, or other content of the same size, mean the output is out of date
+    assert statuses(manifest.plan([path], dict(CONFIG, pdf_engine="single_pass"))) == ([path], [])
+    write(tmp_path / "in" / "a.pdf", b"CONTENT")
+    assert statuses(manifest.plan([path], CONFIG)) == ([path], [])
+
+
+def test_purge_missing_removes_outputs_of_deleted_files(tmp_path, manifest):
+    kept = write(tmp_path / "in" / "kept.pdf", b"kept")
+    deleted = write(tmp_path / "in" / "deleted.pdf", b"deleted")
+    # Same name in another folder, written to its own output folder
+    same_kept = write(tmp_path / "in" / "one" / "same.pdf", b"one")
+    same_deleted = write(tmp_path / "in" / "two" / "same.pdf", b"two")
+    outputs = {}
+    for path in (kept, deleted, same_kept, same_deleted):
+        outputs[path] = BatchProcessor.storage_path_for(str(tmp_path / "out"), path)
+        write(Path(outputs[path]) / "extracted_text.txt", b"text")
+        manifest.plan([path], CONFIG)
+        manifest.record(path, "file", outputs[path], CONFIG)
+
+    os.remove(deleted)
+    os.remove(same_deleted)
+    assert sorted(manifest.purge_missing()) == sorted(os.path.abspath(path) for path in (deleted, same_deleted))
+    assert len(set(outputs.values())) == 4
+    assert not os.path.exists(outputs[deleted]) and not os.path.exists(outputs[same_deleted])
+    assert os.path.exists(outputs[kept])
+    assert os.path.exists(outputs[same_kept])
+    assert manifest.purge_missing() == []
+
+
+def test_incremental_runs_remove_blobs_nothing_references(tmp_path):
+    pytest.importorskip("docx")
+    pytest.importorskip("pptx")
+    root = Path(__file__).resolve().parents[1]
+    source = tmp_path / "in"
+    source.mkdir()
+    for name in ("Sample_file.docx", "Sample_file.pptx"):
+        shutil.copy(root / "Samples" / name, source / name)
+    output = tmp_path / "out"
+    blob_dir = output / "blobs"
+
+    def run():
+        BatchProcessor(output_dir=str(output), workers=1, quiet=True,
+                       manifest_path=str(output / "processed_files.sqlite")).run(str(source))
+        return {path.name for path in blob_dir.glob("*/*")}
+
+    blobs = run()
+    assert len(blobs) == 2
+    os.remove(source / "Sample_file.pptx")
+    remaining = run()
+    assert len(remaining) == 1 and remaining < blobs
+    images_csv = Path(BatchProcessor.storage_path_for(str(output), str(source / "Sample_file.docx"))) / "images.csv"
+    with open(images_csv, newline="", encoding="utf-8") as index_file:
+        assert {row["content_hash"] for row in csv.DictReader(index_file)} == \
+            {name.split(".")[0] for name in remaining}
@@ -0,0 +1,98 @@
+import pickle
+from array import array
+import pytest
+
+from Data_extraction.records import LinkRecord, ImageRecord, TableRecord
+
+
+def test_link_record_reads_like_its_dict():
+    link = LinkRecord("https://example.com", 3)
+    assert link["url"] == "https://example.com"
+    assert link.get("page_number") == 3
+    assert link.get("slide_number") is None
+    assert "page_number" in link and "slide_number" not in link
+    assert link == {"url": "https://example.com", "page_number": 3}
+    with pytest.raises(KeyError):
+        link["image"]
+
+
+def test_record_dict_round_trip():
+    data = {"image": b"\x89PNG", "image_ref": 7, "image_format": "png", "image_resolution": "1x1",
+            "slide_number": 2}
+    image = ImageRecord.from_dict(data)
+    assert image.location == 2 and image.location_key == "slide_number"
+    assert isinstance(image.image, memoryview)
+    assert image.to_dict() == data
+    # A DOCX link has no location key at all
+    docx_link = LinkRecord.from_dict({"url": "https://example.com"})
+    assert docx_link.location is None and docx_link.to_dict() == {"url": "https://example.com"}
+
+
+@pytest.mark.parametrize("data", [
+    {"image": b"\x89PNG", "image_format": "png", "image_resolution": "1x1", "page_number": 1},
+    {"image": b"\xff\xd8", "image_format": "jpeg", "image_resolution": "2x2", "slide_number": 3},
+    {"image": b"\x89PNG", "image_format": "png", "image_resolution": "1x1"},
+])
+def test_image_dicts_without_a_reference_round_trip(data):
+    image = ImageRecord.from_dict(data)
+    assert image.image_ref is None
+    assert image.to_dict() == data and image == data
+    assert "image_ref" not in image
+
+
+@pytest.mark.parametrize("data", [
+    [["Name", "Age"], ["Ann", "31"]],
+    {"rows": [["Name", "Age"], ["Ann", "31"]], "page_number": 2},
+    {"rows": [["a"]], "slide_number": 4},
+])
+def test_table_record_dict_round_trip(data):
+    table = TableRecord.from_dict(data)
+    rows = data if isinstance(data, list) else data["rows"]
+    assert table.to_rows() == rows
+    # A plain list of rows has no location, so its dict only holds the rows
+    assert table.to_dict() == (data if isinstance(data, dict) else {"rows": rows})
+    assert TableRecord.from_dict(table.to_dict()) == table
+
+
+def test_record_equality():
+    assert LinkRecord("a", 1) == LinkRecord("a", 1)
+    assert LinkRecord("a", 1) != LinkRecord("a", 2)
+    assert LinkRecord("a", 1, "slide_number") != LinkRecord("a", 1)
+    assert LinkRecord("a", 1) != ImageRecord("a", None, None, None, 1)
+
+
+@pytest.mark.parametrize("record", [
+    LinkRecord("https://example.com", 4, "slide_number"),
+    ImageRecord(b"\xff\xd8bytes", 12, "jpeg", "640x480", 1),
+    ImageRecord(None, "word/media/image1.png", "png", "1x1", None, None),
+])
+def test_records_survive_pickling(record):
+    restored = pickle.loads(pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL))
+    assert restored == record
+    assert type(restored) is type(record)
+    if isinstance(record, ImageRecord) and record.image is not None:
+        assert isinstance(restored.image, memoryview)
+        assert bytes(restored.image) == bytes(record.image)
+
+
+def test_table_record_row_offsets():
+    rows = [["Name", "Age"], ["Ann", "31", "extra"], []]
+    table = TableRecord.from_rows(rows, 5)
+    assert table.cells == ("Name", "Age", "Ann", "31", "extra")
+    assert table.row_offsets == array("I", [0, 2, 5, 5])
+    assert len(table) == 3
+    assert table[1] == ["Ann", "31", "extra"]
+    assert table[-1] == []
+    assert table[1:] == rows[1:]
+    assert table.to_rows() == rows
+    with pytest.raises(IndexError):
+        table[3]
+
+
+def test_table_record_equality_and_pickling():
+    table = TableRecord.from_rows([["a", "b"], ["c", "d"]], 2, "slide_number")
+    assert table == [["a", "b"], ["c", "d"]]
+    assert table != TableRecord.from_rows([["a", "b"], ["c", "d"]], 3, "slide_number")
+    restored = pickle.loads(pickle.dumps(table))
+    assert restored == table
+    assert restored.location_key == "slide_number"
@@ -0,0 +1,36 @@
+import time
+import signal
+
+from batch_processing import BatchProcessor
+from resource_limits import ResourceLimits, run_sandboxed
+
+
+def _hang(file_path):
+    # A parser stuck in native code never runs a Python signal handler; ignoring SIGALRM has the same effect
+    signal.signal(signal.SIGALRM, signal.SIG_IGN)
+    time.sleep(30)
+    return {"file_path": file_path, "status": "ok", "error": None}
+
+
+def _succeed(file_path, value):
+    return {"file_path": file_path, "status": "ok", "error": None, "data": value}
+
+
+def test_run_sandboxed_kills_a_hung_child():
+    started = time.monotonic()
+    result = run_sandboxed(ResourceLimits(timeout=0.5), _hang, "hung.pdf")
+    assert time.monotonic() - started < 10
+    assert result["status"] == "timeout" and result["limit"] == "timeout"
+
+
+def test_run_sandboxed_returns_the_child_result():
+    assert run_sandboxed(ResourceLimits(timeout=10), _succeed, "a.pdf", [1, 2])["data"] == [1, 2]
+
+
+def test_a_batch_timeout_sandboxes_the_extraction():
+    assert BatchProcessor(timeout=5).limits.timeout == 5
+    limits = ResourceLimits(max_pages=3)
+    batch = BatchProcessor(timeout=5, limits=limits)
+    assert (batch.limits.timeout, batch.limits.max_pages) == (5, 3)
+    assert limits.timeout is None  # The caller's limits are left alone
+    assert BatchProcessor().limits is None
@@ -0,0 +1,79 @@
+import os
+import time
+import pytest
+
+from Data_extraction.result_cache import ExtractionCache
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "document.pdf"
+    path.write_bytes(b"%PDF-1.4 original")
+    return path
+
+
+def test_key_follows_content_and_config(tmp_path, source):
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    config = {"version": "6", "pdf_engine": "default"}
+    key = cache.key(str(source), config)
+    # The dict order of the config does not matter; its values and the file content do
+    assert cache.key(str(source), dict(reversed(list(config.items())))) == key
+    assert cache.key(str(source), dict(config, pdf_engine="single_pass")) != key
+    renamed = source.with_name("renamed.pdf")
+    source.rename(renamed)
+    assert cache.key(str(renamed), config) == key
+    renamed.write_bytes(b"%PDF-1.4 edited")
+    assert cache.key(str(renamed), config) != key
+
+
+def test_put_and_get(tmp_path, source):
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    key = cache.key(str(source), {"version": "6"})
+    assert cache.get(key) is None
+    cache.put(key, {"text": ("hello", {})})
+    assert cache.get(key) == {"text": ("hello", {})}
+    cache.invalidate(str(source))
+    assert cache.get(key) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    payload = "x" * 1000
+    cache = ExtractionCache(str(tmp_path / "cache"), max_bytes=3500)
+    keys = [f"{index:02d}" * 32 + "-config" for index in range(3)]
+    for age, key in enumerate(keys):
+        cache.put(key, payload)
+        # Spread the entries in time, oldest first
+        past = time.time() - 100 + age
+        os.utime(cache._entry_path(key), (past, past))
+    assert cache.get(keys[0]) == payload  # Now the most recently used
+
+    cache.put("03" * 32 + "-config", payload)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == payload and cache.get(keys[2]) == payload
+    total = sum(os.path.getsize(os.path.join(root, name))
+                for root, _, names in os.walk(cache.cache_dir) for name in names)
+    assert total <= 3500
+
+
+def test_clear(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    cache.put("ab" * 32 + "-config", [1, 2, 3])
+    cache.clear()
+    assert cache.get("ab" * 32 + "-config") is None
+
+
+def test_put_only_lists_the_cache_to_count_or_evict(tmp_path, monkeypatch):
+    cache = ExtractionCache(str(tmp_path / "cache"), max_bytes=10 ** 6)
+    listings = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, "_entries", lambda: listings.append(1) or entries())
+    for index in range(20):
+        cache.put(f"{index:02d}" * 32 + "-config", "x" * 100)
+    # The first put counts the existing entries; the others only update the running total
+    assert len(listings) == 1
+    total = sum(size for _, size, _ in entries())
+    assert (tmp_path / "cache" / ExtractionCache.SIZE_FILE).read_text() == str(total)
+    # A second instance on the same directory continues the same total
+    ExtractionCache(cache.cache_dir, max_bytes=10 ** 6).put("20" * 32 + "-config", "x" * 100)
+    assert len(listings) == 1
+    assert int((tmp_path / "cache" / ExtractionCache.SIZE_FILE).read_text()) == sum(size for _, size, _ in entries())